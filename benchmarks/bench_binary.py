@@ -0,0 +1,75 @@
+"""bench_binary.py
+    Cost of saving and loading a large model in the binary format, against the JSON format, and of opening a binary
+    file memory-mapped to answer a single query, against loading it whole.
+
+    Run with `python -m benchmarks.bench_binary --size 100000` from the repository root."""
+
+import json
+import os
+import shutil
+import tempfile
+from watsongraph.binary import MappedConceptModel
+from watsongraph.conceptmodel import ConceptModel
+from benchmarks.common import best_of, parser, report, synthetic_model
+
+try:
+    from watsongraph.compact import CompactConceptModel
+except ImportError:
+    CompactConceptModel = None
+
+
+def save_json(model, filename):
+    with open(filename, 'w') as f:
+        json.dump(model.to_json(), f)
+
+
+def load_json(filename):
+    model = ConceptModel()
+    with open(filename) as f:
+        model.load_from_json(json.load(f))
+    return model
+
+
+def load_binary(model_type, filename):
+    model = model_type()
+    model.load_binary(filename)
+    return model
+
+
+def query(filename):
+    with MappedConceptModel(filename) as model:
+        return model.neighborhood('Concept 1')
+
+
+def main():
+    arguments = parser('Binary against JSON serialization.', size=100000).parse_args()
+    repeat = arguments.repeat
+    model = synthetic_model(arguments.size, degree=10)
+    print('{0} concepts, {1} edges'.format(arguments.size, model.graph.number_of_edges()))
+    directory = tempfile.mkdtemp()
+    try:
+        json_filename = os.path.join(directory, 'model.json')
+        binary_filename = os.path.join(directory, 'model.wgcm')
+        saving = best_of(lambda: save_json(model, json_filename), repeat)
+        report('save, JSON ({0:.1f} MB)'.format(os.path.getsize(json_filename) / 2 ** 20), saving)
+        model.save_binary(binary_filename)
+        report('save, binary ({0:.1f} MB)'.format(os.path.getsize(binary_filename) / 2 ** 20),
+               best_of(lambda: model.save_binary(binary_filename), repeat), saving)
+        loading = best_of(lambda: load_json(json_filename), repeat)
+        report('load, JSON', loading)
+        report('load, binary', best_of(lambda: load_binary(ConceptModel, binary_filename), repeat), loading)
+        report('open memory-mapped and query one concept', best_of(lambda: query(binary_filename), repeat), loading)
+        if CompactConceptModel is None:
+            print('numpy is not installed: skipping CompactConceptModel.')
+            return
+        compact = CompactConceptModel.from_concept_model(model)
+        report('save, binary, CompactConceptModel', best_of(lambda: compact.save_binary(binary_filename), repeat),
+               saving)
+        report('load, binary, CompactConceptModel',
+               best_of(lambda: load_binary(CompactConceptModel, binary_filename), repeat), loading)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
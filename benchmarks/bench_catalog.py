@@ -0,0 +1,112 @@
+"""bench_catalog.py
+    Cost of building, reopening and reading an item catalog, against saving and loading items one at a time in an
+    `items.json` file, which is parsed and rewritten whole for every item.
+
+    Saving items one at a time to `items.json` takes quadratic time, so it is timed on `--legacy-size` items only.
+    Run with `python -m benchmarks.bench_catalog --size 100000` from the repository root."""
+
+import itertools
+import os
+import shutil
+import tempfile
+from watsongraph.catalog import ItemCatalog
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.item import Item
+from benchmarks.common import best_of, parser, report
+
+
+def item(i, concepts=20):
+    """
+    :return: An item whose model holds `concepts` concepts.
+    """
+    item = Item('Item {0}'.format(i))
+    item.description = 'Item number {0}.'.format(i)
+    item.model = ConceptModel(['Concept {0}'.format(j) for j in range(i, i + concepts)])
+    item.model.map_property('relevance', lambda concept: 0.5)
+    return item
+
+
+def load_item(name, filename):
+    loaded = Item(name)
+    loaded.load(filename)
+    return loaded
+
+
+def main():
+    arguments = parser('Item catalog.', size=20000)
+    arguments.add_argument('--legacy-size', type=int, default=500,
+                           help='number of items saved one at a time to items.json (default: %(default)s)')
+    arguments = arguments.parse_args()
+    repeat = arguments.repeat
+    directory = tempfile.mkdtemp()
+    working_directory = os.getcwd()
+    # `Item.save()` and `Item.load()` only look for their file in the working directory.
+    os.chdir(directory)
+    try:
+        small = [item(i) for i in range(arguments.legacy_size)]
+        filenames = ('items {0}'.format(i) for i in itertools.count())
+
+        def save_each(filename):
+            for each in small:
+                each.save(filename + '.json')
+
+        def put_each(filename):
+            with ItemCatalog(filename + '.jsonl') as catalog:
+                for each in small:
+                    catalog.put(each)
+
+        print('{0} items'.format(arguments.legacy_size))
+        before = best_of(save_each, repeat, setup=lambda: next(filenames))
+        report('save one at a time, items.json', before)
+        report('put one at a time, catalog', best_of(put_each, repeat, setup=lambda: next(filenames)), before)
+        save_each('legacy')
+        put_each('catalog')
+        name = small[-1].name
+        before = best_of(lambda: load_item(name, 'legacy.json'), repeat)
+        report('load one item, items.json', before)
+        with ItemCatalog('catalog.jsonl', max_resident=0) as catalog:
+            report('get one item, catalog', best_of(lambda: catalog.get(name), repeat), before)
+
+        items = [item(i) for i in range(arguments.size)]
+        print('{0} items'.format(arguments.size))
+
+        def put_many(filename):
+            with ItemCatalog(filename + '.jsonl') as catalog:
+                catalog.put_many(items)
+
+        report('put_many, catalog', best_of(put_many, repeat, setup=lambda: next(filenames)))
+        put_many('large')
+        # Catalogs are closed outside of the timed runs, since closing one saves its index.
+        opened = []
+
+        def reopen(_=None):
+            opened.append(ItemCatalog('large.jsonl'))
+
+        def close_all():
+            while opened:
+                opened.pop().close()
+
+        def without_index():
+            close_all()
+            os.remove('large.jsonl.idx')
+
+        scanning = best_of(reopen, repeat, setup=without_index)
+        report('reopen, scanning the whole log', scanning)
+        close_all()
+        report('reopen, with the saved index', best_of(reopen, repeat), scanning)
+        close_all()
+        names = [each.name for each in items[::100]]
+        with ItemCatalog('large.jsonl', max_resident=len(names)) as catalog:
+            decoding = best_of(lambda: [catalog.get(each) for each in names], 1)
+            report('get {0} items, decoded'.format(len(names)), decoding)
+            report('get {0} items, resident'.format(len(names)),
+                   best_of(lambda: [catalog.get(each) for each in names], repeat), decoding)
+            catalog.put_many(items[:len(items) // 2])
+            report('compact, a third of the log superseded', best_of(catalog.compact, 1))
+    finally:
+        os.chdir(working_directory)
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""bench_json.py
+    Cost of converting a model to and from JSON, against the original `to_json()` and `load_from_json()`, which
+    looked every node up by a linear scan once per property, and the peak memory of the streaming `dump_json()` and
+    `load_json()`, against going through a whole JSON string.
+
+    The original implementations take quadratic time, so they are timed on a model of `--legacy-size` concepts only.
+    Run with `python -m benchmarks.bench_json --size 100000` from the repository root."""
+
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+import warnings
+import networkx as nx
+from networkx.readwrite import json_graph
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.node import Node
+from benchmarks.common import best_of, parser, report, synthetic_model
+
+
+def legacy_get_node(model, concept):
+    for node in model.nodes():
+        if node.concept == concept:
+            return node
+    raise RuntimeError('Concept ' + concept + ' not found in ' + str(model))
+
+
+def legacy_to_json(model):
+    """
+    `ConceptModel.to_json()` as it originally was.
+    """
+    flattened_model = nx.relabel_nodes(model.graph, {node: node.concept for node in model.nodes()})
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        data_repr = json_graph.node_link_data(flattened_model)
+    for node in data_repr['nodes']:
+        for prop in legacy_get_node(model, node['id']).properties.keys():
+            node[prop] = legacy_get_node(model, node['id']).properties[prop]
+    return data_repr
+
+
+def legacy_load_from_json(data_repr):
+    """
+    `ConceptModel.load_from_json()` as it originally was.
+    """
+    model = ConceptModel()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        flattened_graph = json_graph.node_link_graph(data_repr)
+    m = {concept: Node(concept) for concept in flattened_graph.nodes()}
+    model.graph = nx.relabel_nodes(flattened_graph, m)
+    for node in data_repr['nodes']:
+        for key in [key for key in node.keys() if key != 'id']:
+            legacy_get_node(model, node['id']).set_property(key, node[key])
+    return model
+
+
+def load_from_json(data_repr):
+    model = ConceptModel()
+    model.load_from_json(data_repr)
+    return model
+
+
+class Sink:
+    """
+    A file object which throws away whatever is written to it.
+    """
+
+    def write(self, text):
+        return len(text)
+
+
+def read_json(filename):
+    with open(filename) as f:
+        return load_from_json(json.loads(f.read()))
+
+
+def stream_json(filename):
+    with open(filename) as f:
+        ConceptModel().load_json(f)
+
+
+def peak_memory(function):
+    """
+    :return: The peak number of bytes allocated while running `function`, beyond what was allocated before.
+    """
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    arguments = parser('JSON serialization.', size=100000)
+    arguments.add_argument('--legacy-size', type=int, default=2000,
+                           help='size of the model the original implementations are timed on (default: %(default)s)')
+    arguments = arguments.parse_args()
+    repeat = arguments.repeat
+
+    small = synthetic_model(arguments.legacy_size)
+    print('{0} concepts, {1} edges'.format(arguments.legacy_size, small.graph.number_of_edges()))
+    before = best_of(lambda: legacy_to_json(small), repeat)
+    report('to_json, original', before)
+    report('to_json', best_of(small.to_json, repeat), before)
+    data_repr = small.to_json(records=False)
+    before = best_of(lambda: legacy_load_from_json(data_repr), repeat)
+    report('load_from_json, original', before)
+    report('load_from_json', best_of(lambda: load_from_json(data_repr), repeat), before)
+
+    model = synthetic_model(arguments.size)
+    print('{0} concepts, {1} edges'.format(arguments.size, model.graph.number_of_edges()))
+    report('to_json', best_of(model.to_json, repeat))
+    data_repr = model.to_json()
+    report('load_from_json', best_of(lambda: load_from_json(data_repr), repeat))
+    megabytes = float(2 ** 20)
+    print('{0:<48}{1:>12.1f} MB'.format('peak memory, json.dumps(to_json())',
+                                       peak_memory(lambda: json.dumps(model.to_json())) / megabytes))
+    print('{0:<48}{1:>12.1f} MB'.format('peak memory, dump_json()',
+                                       peak_memory(lambda: model.dump_json(Sink())) / megabytes))
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, 'model.json')
+        with open(filename, 'w') as f:
+            model.dump_json(f)
+        # Both include the model being loaded, which the two ways of loading have in common.
+        baseline = peak_memory(lambda: read_json(filename))
+        print('{0:<48}{1:>12.1f} MB'.format('peak memory, load_from_json(json.loads())', baseline / megabytes))
+        print('{0:<48}{1:>12.1f} MB'.format('peak memory, load_json()',
+                                           peak_memory(lambda: stream_json(filename)) / megabytes))
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
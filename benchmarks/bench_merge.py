@@ -0,0 +1,56 @@
+"""bench_merge.py
+    Cost of merging a small model into a large one in place, against rebuilding the large model's graph with
+    `nx.compose()` as every merge originally did.
+
+    Run with `python -m benchmarks.bench_merge --size 50000` from the repository root."""
+
+import itertools
+import random
+import networkx as nx
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.node import Node
+from benchmarks.common import best_of, parser, report, synthetic_model
+
+
+def mixins(size, mixin_size, seed=0):
+    """
+    :return: A generator of models of `mixin_size` concepts new to a synthetic model of `size` concepts, each joined
+     to a concept of it.
+    """
+    rng = random.Random(seed)
+    for run in itertools.count():
+        mixin = ConceptModel()
+        graph = nx.Graph()
+        for i in range(mixin_size):
+            node = Node('Mixin {0} {1}'.format(run, i), relevance=rng.random())
+            graph.add_edge(node, Node('Concept {0}'.format(rng.randrange(size))), weight=rng.random())
+        mixin.graph = graph
+        yield mixin
+
+
+def main():
+    arguments = parser('In-place merges against nx.compose.', size=50000).parse_args()
+    model = synthetic_model(arguments.size)
+    print('{0} concepts, {1} edges'.format(arguments.size, model.graph.number_of_edges()))
+    for mixin_size in (1, 20, 1000):
+        fresh = mixins(arguments.size, mixin_size)
+        composing = best_of(lambda mixin: nx.compose(model.graph, mixin.graph), arguments.repeat,
+                            setup=lambda: next(fresh))
+        merging = best_of(model.merge_with, arguments.repeat, setup=lambda: next(fresh))
+        report('merge {0} concepts, nx.compose'.format(mixin_size), composing)
+        report('merge {0} concepts, merge_with'.format(mixin_size), merging, composing)
+    names = ('New {0}'.format(i) for i in itertools.count())
+    composing = best_of(lambda name: nx.compose(model.graph, ConceptModel([name]).graph), arguments.repeat,
+                        setup=lambda: next(names))
+    adding = best_of(model.add, arguments.repeat, setup=lambda: next(names))
+    report('add a concept, nx.compose', composing)
+    report('add a concept, add', adding, composing)
+    mixin = next(mixins(arguments.size, 1000, seed=1))
+    model.merge_with(mixin)
+    for policy in ('keep', 'max', 'mean'):
+        report('merge 1000 known concepts, {0} policy'.format(policy),
+               best_of(lambda: model.merge_with(mixin, node_policy=policy, edge_policy=policy), arguments.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""bench_node.py
+    Memory footprint and hashing cost of `Node`, against the original implementation, which kept a `__dict__` and a
+    `properties` dictionary on every node and hashed by taking the MD5 digest of its concept on every call.
+
+    Run with `python -m benchmarks.bench_node --size 1000000` from the repository root."""
+
+import gc
+import hashlib
+import tracemalloc
+import networkx as nx
+from watsongraph.node import Node
+from benchmarks.common import best_of, parser, report
+
+
+class LegacyNode:
+    """
+    The original `Node`, reduced to what hashing and storage depend on.
+    """
+    concept = ""
+    properties = None
+
+    def __init__(self, concept, **kwargs):
+        self.concept = concept
+        self.properties = kwargs
+        if not self.properties:
+            self.properties = dict()
+
+    def __eq__(self, other):
+        if self and other:
+            return self.concept == other.concept
+        else:
+            return False
+
+    def __hash__(self):
+        return int(hashlib.md5(self.concept.encode()).hexdigest(), 16)
+
+
+def footprint(node_type, labels):
+    """
+    :return: The number of bytes allocated by building a node of each label, not counting the labels themselves.
+    """
+    gc.collect()
+    tracemalloc.start()
+    nodes = [node_type(label) for label in labels]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del nodes
+    return size
+
+
+def main():
+    arguments = parser('Node memory footprint and hashing.', size=200000).parse_args()
+    labels = ['Concept {0}'.format(i) for i in range(arguments.size)]
+    print('{0} nodes'.format(arguments.size))
+    legacy, current = footprint(LegacyNode, labels), footprint(Node, labels)
+    print('{0:<48}{1:>12.1f} B/node'.format('memory, legacy', legacy / arguments.size))
+    print('{0:<48}{1:>12.1f} B/node{2:>9.1f}x'.format('memory, current', current / arguments.size, legacy / current))
+    for name, node_type in (('legacy', LegacyNode), ('current', Node)):
+        nodes = [node_type(label) for label in labels]
+        hashing = best_of(lambda: [hash(node) for node in nodes], arguments.repeat)
+        building = best_of(lambda: nx.Graph(zip(nodes, nodes[1:])), arguments.repeat)
+        lookup = best_of(lambda: set(nodes).intersection(nodes), arguments.repeat)
+        if name == 'legacy':
+            baselines = hashing, building, lookup
+        report('hash every node, ' + name, hashing, baselines[0])
+        report('build a path graph, ' + name, building, baselines[1])
+        report('intersect node sets, ' + name, lookup, baselines[2])
+
+
+if __name__ == '__main__':
+    main()
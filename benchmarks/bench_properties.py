@@ -0,0 +1,63 @@
+"""bench_properties.py
+    Cost of ranking and updating a property across a large model: `top_k()` against a full sort, and the bulk
+    getters and updaters of `ConceptModel` and, when numpy is installed, of the columns of `CompactConceptModel`.
+
+    Run with `python -m benchmarks.bench_properties --size 1000000` from the repository root."""
+
+from benchmarks.common import best_of, parser, report, synthetic_model
+
+try:
+    from watsongraph.compact import CompactConceptModel
+except ImportError:
+    CompactConceptModel = None
+
+
+def legacy_relevancies(model):
+    """
+    :return: The `(relevance, concept)` pairs of a model as `Item.relevancies()` originally built them: formatted to
+     strings first, then sorted as strings.
+    """
+    return sorted([("{0:.3f}".format(node.get_property('relevance')), node.concept) for node in model.nodes()],
+                  reverse=True)
+
+
+def rank(label, model, repeat, baseline=None):
+    """
+    Times the ranking queries of a model, and reports them against `baseline`, the time of a full sort.
+
+    :return: The time of the full sort of this model.
+    """
+    full = best_of(lambda: model.concepts_by_property('relevance'), repeat)
+    report('concepts_by_property, ' + label, full, baseline)
+    baseline = baseline if baseline is not None else full
+    for k in (10, 1000):
+        report('top_k({0}), {1}'.format(k, label), best_of(lambda: model.top_k('relevance', k), repeat), baseline)
+    return full
+
+
+def main():
+    arguments = parser('Ranking and bulk property updates.', size=200000).parse_args()
+    repeat = arguments.repeat
+    model = synthetic_model(arguments.size, degree=0)
+    print('{0} concepts'.format(arguments.size))
+    legacy = best_of(lambda: legacy_relevancies(model), repeat)
+    report('formatted sort, as Item.relevancies() was', legacy)
+    rank('ConceptModel', model, repeat, legacy)
+    report('get_properties, ConceptModel', best_of(lambda: model.get_properties('relevance'), repeat))
+    report('update_property, ConceptModel',
+           best_of(lambda: model.update_property('relevance', lambda relevance: relevance * 0.9), repeat))
+    if CompactConceptModel is None:
+        print('numpy is not installed: skipping CompactConceptModel.')
+        return
+    compact = CompactConceptModel.from_concept_model(model)
+    rank('CompactConceptModel', compact, repeat, legacy)
+    report('get_properties, CompactConceptModel', best_of(lambda: compact.get_properties('relevance'), repeat))
+    report('update_property, CompactConceptModel',
+           best_of(lambda: compact.update_property('relevance', lambda relevance: relevance * 0.9), repeat))
+    report('update_property, vectorized, CompactConceptModel',
+           best_of(lambda: compact.update_property('relevance', lambda relevance: relevance * 0.9, vectorized=True),
+                   repeat))
+
+
+if __name__ == '__main__':
+    main()
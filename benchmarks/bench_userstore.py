@@ -0,0 +1,75 @@
+"""bench_userstore.py
+    Latency of saving, loading and deleting a single account among many, in the SQLite store against the original
+    `accounts.json` format, which is parsed and rewritten whole for every operation, and the cost of importing an
+    `accounts.json` file and of bulk loads and saves.
+
+    Run with `python -m benchmarks.bench_userstore --size 100000` from the repository root."""
+
+import itertools
+import os
+import shutil
+import tempfile
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.userstore import JSONUserStore, SQLiteUserStore, import_accounts_json
+from benchmarks.common import best_of, parser, report
+
+
+def record(i, concepts=10):
+    """
+    :return: The account record of a user whose model holds `concepts` concepts.
+    """
+    model = ConceptModel(['Concept {0}'.format(j) for j in range(i, i + concepts)])
+    model.map_property('relevance', lambda concept: 0.5)
+    return {'id': 'user {0}'.format(i), 'password': 'password', 'exceptions': [], 'model': model.to_json()}
+
+
+def operations(label, store, size, repeat, baselines=None):
+    """
+    Times saving, loading and deleting single accounts of a store holding `size` of them.
+
+    :return: The times, to serve as the baselines of another store.
+    """
+    new_ids = itertools.count(size)
+    known_ids = itertools.count()
+    times = (best_of(store.save, repeat, setup=lambda: record(next(new_ids))),
+             best_of(store.load, repeat, setup=lambda: 'user {0}'.format(next(known_ids))),
+             best_of(store.delete, repeat, setup=lambda: 'user {0}'.format(next(known_ids))))
+    for operation, seconds, baseline in zip(('save', 'load', 'delete'), times, baselines or (None,) * 3):
+        report('{0} one account, {1}'.format(operation, label), seconds, baseline)
+    return times
+
+
+def main():
+    arguments = parser('Account storage.', size=10000).parse_args()
+    repeat = arguments.repeat
+    records = [record(i) for i in range(arguments.size)]
+    print('{0} accounts'.format(arguments.size))
+    directory = tempfile.mkdtemp()
+    try:
+        legacy = JSONUserStore(os.path.join(directory, 'accounts.json'))
+        legacy.save_many(records)
+        baselines = operations('accounts.json', legacy, arguments.size, repeat)
+        legacy.save_many(records)
+        filenames = ('accounts {0}.db'.format(i) for i in itertools.count())
+
+        def fresh_store():
+            return SQLiteUserStore(os.path.join(directory, next(filenames)))
+
+        report('import_accounts_json',
+               best_of(lambda store: import_accounts_json(legacy.filename, store=store), repeat, setup=fresh_store))
+        report('save_many, SQLite', best_of(lambda store: store.save_many(records), repeat, setup=fresh_store))
+        store = SQLiteUserStore(os.path.join(directory, 'accounts.db'))
+        store.save_many(records)
+        operations('SQLite', store, arguments.size, repeat, baselines)
+        some = ['user {0}'.format(i) for i in range(0, arguments.size, 10)]
+        loading = best_of(lambda: [store.load(user_id) for user_id in some], repeat)
+        report('load {0} accounts one at a time, SQLite'.format(len(some)), loading)
+        report('load_many {0} accounts, SQLite'.format(len(some)), best_of(lambda: store.load_many(some), repeat),
+               loading)
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
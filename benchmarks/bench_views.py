@@ -0,0 +1,88 @@
+"""bench_views.py
+    Cost of a single feedback event on a large user model, against the original `express_interest()` and
+    `express_disinterest()`, which called the sorting `concepts()` inside their list comprehension conditions, and
+    the cost of the set and edge views against the sorted lists they stand in for.
+
+    Run with `python -m benchmarks.bench_views --size 5000` from the repository root."""
+
+import random
+import statistics
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.item import Item
+from watsongraph.user import User
+from benchmarks.common import best_of, parser, report, synthetic_model
+
+
+def legacy_express_interest(user, item):
+    """
+    `User.express_interest()` as it originally was.
+    """
+    item_copy = item.model.copy()
+    for concept in [concept for concept in item.concepts() if concept in user.concepts()]:
+        new_relevance = min(1.0, statistics.mean([user.model.get_node(concept).get_relevance(),
+                                                  item.model.get_node(concept).get_relevance()]) * 1.2)
+        item_copy.get_node(concept).properties['relevance'] = new_relevance
+    for concept in [concept for concept in user.concepts() if concept not in item_copy.concepts()]:
+        user.model.get_node(concept).properties['relevance'] *= 0.9
+    user.model.merge_with(item_copy)
+    for concept in [concept for concept in user.concepts() if user.model.get_node(concept).get_relevance() <= 0.2]:
+        user.model.remove(concept)
+    user.exceptions.append(item.name)
+
+
+def legacy_express_disinterest(user, item):
+    """
+    `User.express_disinterest()` as it originally was.
+    """
+    user.exceptions.append(item.name)
+    for concept in [concept for concept in item.concepts() if concept in user.concepts()]:
+        user.model.get_node(concept).properties['relevance'] *= 0.75
+    for concept in [concept for concept in user.concepts() if user.model.get_node(concept).get_relevance() <= 0.2]:
+        user.model.remove(concept)
+
+
+def synthetic_item(size, concepts=20, seed=0):
+    """
+    :return: An item about `concepts` concepts, half of them among those of a synthetic model of `size` concepts.
+    """
+    rng = random.Random(seed)
+    labels = ['Concept {0}'.format(rng.randrange(size)) for _ in range(concepts // 2)]
+    labels += ['Item concept {0}'.format(i) for i in range(concepts - len(labels))]
+    item = Item('Item')
+    item.model = ConceptModel(sorted(set(labels)))
+    item.model.map_property('relevance', lambda concept: rng.random())
+    return item
+
+
+def main():
+    arguments = parser('Feedback events and model views.', size=5000).parse_args()
+    repeat = arguments.repeat
+    model = synthetic_model(arguments.size)
+    # Every relevance stays above the cutoff, so that no event removes concepts from the model.
+    model.map_property('relevance', lambda concept: 0.9)
+    item = synthetic_item(arguments.size)
+    print('{0} concepts, {1} edges'.format(arguments.size, model.graph.number_of_edges()))
+
+    def fresh_user():
+        user = User(model=model.copy(), user_id='user')
+        user.exceptions = []
+        return user
+
+    for kind, legacy in (('interest', legacy_express_interest), ('disinterest', legacy_express_disinterest)):
+        before = best_of(lambda user: legacy(user, item), repeat, setup=fresh_user)
+        after = best_of(lambda user: getattr(user, 'express_' + kind)(item), repeat, setup=fresh_user)
+        report('express_{0}, sorted concepts() lookups'.format(kind), before)
+        report('express_{0}, concept_set()'.format(kind), after, before)
+    sorting = best_of(model.concepts, repeat)
+    report('concepts()', sorting)
+    report('concept_set()', best_of(model.concept_set, repeat), sorting)
+    membership = best_of(lambda: 'Concept 1' in model.concepts(), repeat)
+    report('membership test, concepts()', membership)
+    report('membership test, concept_set()', best_of(lambda: 'Concept 1' in model.concept_set(), repeat), membership)
+    formatting = best_of(model.edges, repeat)
+    report('edges()', formatting)
+    report('iter_edges()', best_of(lambda: sum(1 for _ in model.iter_edges()), repeat), formatting)
+
+
+if __name__ == '__main__':
+    main()
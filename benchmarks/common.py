@@ -0,0 +1,85 @@
+"""common.py
+    Helpers shared by the benchmark scripts: command-line arguments, timing, synthetic models and an offline backend.
+    Every script runs without network access, so its numbers depend on the machine only."""
+
+import argparse
+import random
+import time
+import networkx as nx
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.node import Node
+from watsongraph.replay import ReplayBackend, SyntheticConceptGraph
+
+
+def parser(description, size):
+    """
+    :return: An `argparse.ArgumentParser` taking the `--size` of the workload and the number of times to `--repeat`
+     each measurement.
+    """
+    arguments = argparse.ArgumentParser(description=description)
+    arguments.add_argument('--size', type=int, default=size, help='size of the workload (default: %(default)s)')
+    arguments.add_argument('--repeat', type=int, default=3, help='runs per measurement, of which the fastest is '
+                                                                 'reported (default: %(default)s)')
+    return arguments
+
+
+def best_of(function, repeat=3, setup=None):
+    """
+    :param function: The function being timed, called without arguments, or with the return value of `setup`.
+    :param repeat: The number of runs.
+    :param setup: A function run, untimed, before each run.
+    :return: The duration of the fastest run, in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        if setup is not None:
+            function(argument)
+        else:
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label, seconds, baseline=None):
+    """
+    Prints a measurement, along with its speedup over `baseline` if one is given.
+    """
+    line = '{0:<48}{1:>12.2f} ms'.format(label, seconds * 1000)
+    if baseline is not None:
+        line += '{0:>10.1f}x'.format(baseline / seconds)
+    print(line)
+
+
+def synthetic_model(size, degree=5, seed=0):
+    """
+    :return: A `ConceptModel` of `size` concepts, each joined to about `degree` others chosen at random by edges of
+     random weight, and each with a random `relevance`.
+    """
+    rng = random.Random(seed)
+    nodes = [Node('Concept {0}'.format(i), relevance=rng.random()) for i in range(size)]
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    for _ in range(size * degree // 2):
+        source, target = rng.randrange(size), rng.randrange(size)
+        if source != target:
+            graph.add_edge(nodes[source], nodes[target], weight=rng.random())
+    model = ConceptModel()
+    model.graph = graph
+    return model
+
+
+def use_replay_backend(size=5000, latency=0.0):
+    """
+    Routes every API call through a `ReplayBackend` over a `SyntheticConceptGraph`, with the response caches turned
+    off so that every lookup reaches it.
+
+    :return: The backend.
+    """
+    backend = ReplayBackend(graph=SyntheticConceptGraph(size=size), latency=latency)
+    event_insight_lib.set_backend(backend)
+    event_insight_lib.set_related_concepts_cache(None)
+    event_insight_lib.set_annotation_cache(None)
+    return backend
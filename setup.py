@@ -1,8 +1,9 @@
-from distutils.core import setup
+from setuptools import setup
 setup(
   name = 'watsongraph',
   packages = ['watsongraph'], # this must be the same as the name above
   install_requires=['networkx', 'requests', 'mwviews'],
+  extras_require={'async': ['aiohttp'], 'compact': ['numpy']},
   version = '0.2.2',
   description = 'Concept discovery and recommendation library built on top of the IBM Watson cognitive API.',
   author = 'Aleksey Bilogur',
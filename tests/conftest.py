@@ -0,0 +1,40 @@
+"""conftest.py
+    Fixtures shared by the test suite, which runs entirely offline: every API call is answered by a `ReplayBackend`
+    over a `SyntheticConceptGraph`."""
+
+import pytest
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.replay import ReplayBackend, SyntheticConceptGraph
+
+
+@pytest.fixture
+def backend():
+    """
+    Routes every API call through a fresh `ReplayBackend`, with the response caches turned off so that its `calls`
+    count every lookup the library makes, and puts the previous clients and caches back afterwards.
+    """
+    clients = dict(event_insight_lib._clients)
+    async_clients = dict(event_insight_lib._async_clients)
+    related_concepts_cache = event_insight_lib.get_related_concepts_cache()
+    annotation_cache = event_insight_lib.get_annotation_cache()
+    replay = ReplayBackend(graph=SyntheticConceptGraph(size=500))
+    event_insight_lib.set_backend(replay)
+    event_insight_lib.set_related_concepts_cache(None)
+    event_insight_lib.set_annotation_cache(None)
+    try:
+        yield replay
+    finally:
+        event_insight_lib._clients.clear()
+        event_insight_lib._clients.update(clients)
+        event_insight_lib._async_clients.clear()
+        event_insight_lib._async_clients.update(async_clients)
+        event_insight_lib.set_related_concepts_cache(related_concepts_cache)
+        event_insight_lib.set_annotation_cache(annotation_cache)
+
+
+def edge_set(model):
+    """
+    :return: The edges of a model as a set of `(sorted endpoints, rounded weight)` pairs, which compares equal across
+     models whatever order their edges are stored in.
+    """
+    return {(tuple(sorted((source, target))), round(weight, 6)) for weight, source, target in model.iter_edges()}
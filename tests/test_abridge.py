@@ -0,0 +1,66 @@
+"""test_abridge.py
+    `abridge()` undoes an expansion from the model's provenance records, without going back to the network."""
+
+from watsongraph.conceptmodel import ConceptModel
+from tests.conftest import edge_set
+
+
+def _network_abridged(model, concept, limit):
+    """
+    :return: A copy of `model` abridged the way it was before provenance was recorded: by fetching the expansion
+     again and removing every concept in it.
+    """
+    inverse = ConceptModel()
+    inverse.augment(concept, limit=limit)
+    abridged = model.copy()
+    for removed in inverse.concept_set():
+        if removed in abridged:
+            abridged.remove(removed)
+    return abridged
+
+
+def test_local_abridge_matches_network_abridge(backend):
+    model = ConceptModel(['Concept 1'])
+    model.explode(limit=20, depth=2)
+    expected = _network_abridged(model, 'Concept 1', 20)
+    calls = backend.calls
+    model.abridge('Concept 1', limit=20)
+    assert backend.calls == calls
+    assert model.concepts() == expected.concepts()
+    assert edge_set(model) == edge_set(expected)
+
+
+def test_abridge_without_records_falls_back_to_the_network(backend):
+    model = ConceptModel(['Concept 9'])
+    model.abridge('Concept 9', limit=10)
+    assert backend.calls == 1
+    assert model.concepts() == []
+
+
+def test_records_survive_serialization(backend):
+    model = ConceptModel(['Concept 1'])
+    model.explode(limit=20, depth=2)
+    loaded = ConceptModel()
+    loaded.load_from_json(model.to_json())
+    assert loaded._expansions == model._expansions
+    assert loaded._expanded_from == model._expanded_from
+    calls = backend.calls
+    loaded.abridge('Concept 1', limit=20)
+    assert backend.calls == calls
+
+
+def test_keep_shared(backend):
+    model = ConceptModel(['Concept 1', 'Concept 2'])
+    model.explode(limit=30)
+    shared = set(model._expansions['Concept 1']) & set(model._expansions['Concept 2'])
+    assert shared
+    model.add_reference('Concept 1', 'item')
+    model.abridge('Concept 1', keep_shared=True)
+    assert shared <= model.concept_set()
+    assert 'Concept 1' in model
+    assert 'Concept 1' not in model._expansions
+    # With the expansion of Concept 1 undone, nothing else accounts for that of Concept 2.
+    expansion = set(model._expansions['Concept 2']) | {'Concept 2'}
+    model.remove_reference('Concept 1', 'item')
+    model.abridge('Concept 2', keep_shared=True)
+    assert not expansion & model.concept_set()
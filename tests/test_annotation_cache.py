@@ -0,0 +1,73 @@
+"""test_annotation_cache.py
+    Annotations are cached under a hash of the normalized text, so that texts differing only in their formatting share
+    an entry and other texts do not."""
+
+import hashlib
+import pytest
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.cache import AnnotationCache
+
+RESPONSE = {'annotations': [{'concept': {'label': 'Concept 1'}, 'score': 0.9, 'text_index': [0, 5]}]}
+
+
+@pytest.mark.parametrize('equivalent', [
+    'Apple  Inc.',
+    ' Apple Inc.\n',
+    'Apple\tInc.',
+    'Apple Inc.',
+])
+def test_equivalent_texts_share_an_entry(equivalent):
+    annotations = AnnotationCache()
+    annotations.set('Apple Inc.', 'text/plain', RESPONSE)
+    assert annotations.get(equivalent) == RESPONSE
+
+
+def test_unicode_forms_share_an_entry():
+    annotations = AnnotationCache()
+    # "Café", composed and decomposed.
+    annotations.set('Caf\u00e9', 'text/plain', RESPONSE)
+    assert annotations.get('Cafe\u0301') == RESPONSE
+
+
+@pytest.mark.parametrize('different', ['Apple Inc', 'apple inc.', 'AppleInc.', 'Apple Inc. Ltd'])
+def test_different_texts_do_not(different):
+    annotations = AnnotationCache()
+    annotations.set('Apple Inc.', 'text/plain', RESPONSE)
+    assert annotations.get(different) is None
+
+
+def test_content_type_is_part_of_the_key():
+    annotations = AnnotationCache()
+    annotations.set('Apple Inc.', 'text/plain', RESPONSE)
+    assert annotations.get('Apple Inc.', 'text/html') is None
+
+
+def test_key_is_a_sha256_of_the_normalized_text():
+    key = AnnotationCache._key(' Apple \n Inc. ', 'text/plain')
+    assert key == 'annotate_text:' + hashlib.sha256(b'text/plain\nApple Inc.').hexdigest()
+    # However long the text, the key stays the same size.
+    assert len(AnnotationCache._key('word ' * 100000, 'text/plain')) == len(key)
+
+
+def test_stats():
+    annotations = AnnotationCache()
+    assert annotations.get('Apple Inc.') is None
+    annotations.set('Apple Inc.', 'text/plain', RESPONSE)
+    assert annotations.get('Apple Inc.') == RESPONSE
+    assert annotations.get('Apple  Inc.') == RESPONSE
+    assert (annotations.stats.hits, annotations.stats.misses) == (2, 1)
+    assert annotations.stats.hit_rate() == pytest.approx(2 / 3)
+    annotations.clear()
+    assert (annotations.stats.hits, annotations.stats.misses) == (0, 0)
+    assert annotations.get('Apple Inc.') is None
+
+
+def test_annotate_text_uses_the_cache(backend):
+    event_insight_lib.set_annotation_cache(AnnotationCache())
+    first = event_insight_lib.annotate_text('Apple designs phones.')
+    assert event_insight_lib.annotate_text('  Apple designs\nphones. ') == first
+    assert backend.calls == 1
+    event_insight_lib.annotate_text('Apple designs tablets.')
+    assert backend.calls == 2
+    stats = event_insight_lib.get_annotation_cache().stats
+    assert (stats.hits, stats.misses) == (1, 2)
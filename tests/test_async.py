@@ -0,0 +1,97 @@
+"""test_async.py
+    The asyncio API, run against a local stand-in for the Concept Insights service."""
+
+import asyncio
+import json
+import time
+import urllib.parse
+import pytest
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.replay import SyntheticConceptGraph, CONCEPT_PREFIX
+from tests.conftest import edge_set
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web  # noqa: E402
+
+
+def _label(concept_id):
+    return urllib.parse.unquote(concept_id[len(CONCEPT_PREFIX):]).replace('_', ' ')
+
+
+def _stub_application(graph, requests):
+    """
+    :return: An `aiohttp` application answering the `related_concepts` and `relation_scores` endpoints from `graph`,
+     which appends the path of every request it serves to `requests`.
+    """
+    async def related_concepts(request):
+        requests.append(request.path)
+        label = _label(json.loads(request.query['concepts'])[0])
+        return web.json_response(graph.get_related_concepts(label, int(request.query['level']),
+                                                            int(request.query['limit'])))
+
+    async def relation_scores(request):
+        requests.append(request.path)
+        targets = [_label(concept_id) for concept_id in json.loads(request.query['concepts'])]
+        return web.json_response(graph.get_relation_scores(request.match_info['label'].replace('_', ' '), targets))
+
+    application = web.Application()
+    application.router.add_get('/related_concepts', related_concepts)
+    application.router.add_get('/concepts/{label}/relation_scores', relation_scores)
+    return application
+
+
+def _token_provider():
+    provider = event_insight_lib.TokenProvider(token_file=None)
+    provider._token, provider._expires = 'token', time.time() + 3600
+    return provider
+
+
+async def _run_against_stub(graph, func):
+    """
+    Serves the stub on a free local port, installs an `AsyncWatsonClient` pointed at it, and awaits `func()`.
+
+    :return: The result of `func()`, and the list of paths the stub served.
+    """
+    requests = []
+    runner = web.AppRunner(_stub_application(graph, requests))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    client = event_insight_lib.AsyncWatsonClient(token_provider=_token_provider(),
+                                                 base_url='http://{0}:{1}'.format(host, port))
+    event_insight_lib.set_async_client(client)
+    try:
+        return await func(), requests
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def test_aget_related_concepts(backend):
+    graph = SyntheticConceptGraph(size=500)
+    response, requests = asyncio.run(_run_against_stub(
+        graph, lambda: event_insight_lib.aget_related_concepts('Concept 1', limit=20)))
+    assert response == graph.get_related_concepts('Concept 1', 0, 20)
+    assert requests == ['/related_concepts']
+
+
+def test_aexplode_equals_explode(backend):
+    expected = ConceptModel(['Concept 1', 'Concept 2'])
+    expected.explode(limit=10)
+    model = ConceptModel(['Concept 1', 'Concept 2'])
+    result, requests = asyncio.run(_run_against_stub(SyntheticConceptGraph(size=500),
+                                                     lambda: model.aexplode(limit=10)))
+    assert model.concepts() == expected.concepts()
+    assert edge_set(model) == edge_set(expected)
+    assert len(requests) == 2
+
+
+def test_aadd_edges_equals_add_edges(backend):
+    targets = ['Concept {0}'.format(i) for i in range(2, 12)]
+    expected = ConceptModel()
+    expected.add_edges('Concept 1', targets)
+    model = ConceptModel()
+    asyncio.run(_run_against_stub(SyntheticConceptGraph(size=500), lambda: model.aadd_edges('Concept 1', targets)))
+    assert edge_set(model) == edge_set(expected)
@@ -0,0 +1,81 @@
+"""test_binary.py
+    The binary model format round-trips every model type, and can be queried in place."""
+
+import pytest
+from watsongraph.binary import MappedConceptModel
+from watsongraph.conceptmodel import ConceptModel
+from tests.conftest import edge_set
+
+
+@pytest.fixture
+def model(backend):
+    model = ConceptModel(['Concept 1', 'Ünïcode'])
+    model.explode(limit=20, depth=2)
+    model.map_property('relevance', lambda concept: len(concept) / 10)
+    model.set_property('Concept 1', 'view_count', 42)
+    model.set_property('Concept 1', 'tags', ['a', {'b': 1}])
+    model.set_property('Ünïcode', 'flag', True)
+    model.add_reference('Concept 1', 'item')
+    return model
+
+
+def _properties(model):
+    return {node.concept: node.properties for node in model.nodes()}
+
+
+def test_round_trip(model, tmpdir):
+    filename = str(tmpdir.join('model.wgcm'))
+    model.save_binary(filename)
+    loaded = ConceptModel(['Concept 0'])
+    loaded.load_binary(filename)
+    assert loaded.concepts() == model.concepts()
+    assert edge_set(loaded) == edge_set(model)
+    assert _properties(loaded) == _properties(model)
+    assert loaded._augmented == model._augmented
+    assert loaded._expansions == model._expansions
+    assert loaded._references == model._references
+
+
+def test_empty_model(tmpdir):
+    filename = str(tmpdir.join('empty.wgcm'))
+    ConceptModel().save_binary(filename)
+    loaded = ConceptModel(['Concept 0'])
+    loaded.load_binary(filename)
+    assert loaded.concepts() == []
+    with MappedConceptModel(filename) as mapped:
+        assert len(mapped) == 0
+
+
+def test_mapped_model_answers_queries_in_place(model, tmpdir):
+    filename = str(tmpdir.join('model.wgcm'))
+    model.save_binary(filename)
+    with MappedConceptModel(filename) as mapped:
+        assert len(mapped) == len(model.concepts())
+        assert 'Concept 1' in mapped and 'Concept -1' not in mapped
+        assert mapped.concepts() == model.concepts()
+        assert edge_set(mapped) == edge_set(model)
+        assert mapped.neighborhood('Concept 1') == model.neighborhood('Concept 1')
+        assert mapped.get_node('Concept 1').properties == model.get_node('Concept 1').properties
+        assert mapped.get_view_count('Concept 1') == 42
+        assert mapped.top_k('relevance', 5) == model.top_k('relevance', 5)
+        assert mapped.concepts_by_property('relevance') == model.concepts_by_property('relevance')
+
+
+def test_compact_round_trip(model, tmpdir):
+    pytest.importorskip('numpy')
+    from watsongraph.compact import CompactConceptModel
+    filename = str(tmpdir.join('compact.wgcm'))
+    compact = CompactConceptModel.from_concept_model(model, weight_dtype='float64')
+    compact.save_binary(filename)
+    loaded = CompactConceptModel(weight_dtype='float64')
+    loaded.load_binary(filename)
+    assert edge_set(loaded) == edge_set(model)
+    assert _properties(loaded) == _properties(model)
+    assert loaded._expansions == model._expansions
+    # The two model types read each other's files.
+    concept_model = ConceptModel()
+    concept_model.load_binary(filename)
+    assert edge_set(concept_model) == edge_set(model)
+    model.save_binary(filename)
+    loaded.load_binary(filename)
+    assert _properties(loaded) == _properties(model)
@@ -0,0 +1,172 @@
+"""test_cache.py
+    The cache tiers evict the least recently used entries and expired ones, the SQLite tier persists across reopening,
+    tiered caches promote what slower tiers find, and related concepts for a smaller limit are served out of a larger
+    one."""
+
+import pytest
+import watsongraph.cache as cache
+from watsongraph.cache import MemoryCache, RelatedConceptsCache, SQLiteCache, TieredCache
+from watsongraph.replay import SyntheticConceptGraph
+
+
+class _Clock:
+    """
+    Stands in for the `time` module of `watsongraph.cache`, with time only moving when told to.
+    """
+
+    def __init__(self):
+        self.now = 1000000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def sqlite_cache(tmpdir):
+    store = SQLiteCache(str(tmpdir.join('cache.db')), max_entries=10, touch_interval=0)
+    yield store
+    store.close()
+
+
+def test_memory_lru_eviction():
+    store = MemoryCache(max_entries=3)
+    for key in 'abc':
+        store.set(key, key.upper())
+    assert store.get('a') == 'A'
+    store.set('d', 'D')
+    assert store.get('b') is None
+    assert [store.get(key) for key in 'acd'] == ['A', 'C', 'D']
+    assert len(store) == 3
+
+
+def test_memory_ttl(clock):
+    store = MemoryCache(ttl=10)
+    store.set('a', 'A')
+    clock.now += 9
+    assert store.get('a') == 'A'
+    clock.now += 2
+    assert store.get('a') is None
+    assert len(store) == 0
+
+
+def test_sqlite_lru_eviction(clock, sqlite_cache):
+    for i in range(10):
+        clock.now += 1
+        sqlite_cache.set(str(i), 'value')
+    # Keys 0 to 4 become the most recently used.
+    for i in range(5):
+        clock.now += 1
+        assert sqlite_cache.get(str(i)) == 'value'
+    clock.now += 1
+    sqlite_cache.set('10', 'value')
+    # Over the limit: the least recently used tenth, and the excess, go.
+    assert sqlite_cache.get('5') is None
+    assert sqlite_cache.get('6') is None
+    assert len(sqlite_cache) == 9
+    assert all(sqlite_cache.get(str(i)) == 'value' for i in list(range(5)) + list(range(7, 11)))
+
+
+def test_sqlite_touch_interval(clock, tmpdir):
+    store = SQLiteCache(str(tmpdir.join('cache.db')), touch_interval=60)
+
+    def accessed():
+        return store._connection.execute('SELECT accessed FROM cache WHERE key = ?', ('a',)).fetchone()[0]
+
+    store.set('a', 'A')
+    set_at = clock.now
+    clock.now += 30
+    assert store.get('a') == 'A'
+    assert accessed() == set_at
+    clock.now += 30
+    assert store.get('a') == 'A'
+    assert accessed() == clock.now
+    store.close()
+
+
+def test_sqlite_ttl(clock, sqlite_cache):
+    store = SQLiteCache(sqlite_cache.filename, table='expiring', ttl=10)
+    store.set('a', 'A')
+    clock.now += 11
+    assert store.get('a') is None
+    assert len(store) == 0
+    store.close()
+
+
+def test_sqlite_persists_across_reopening(tmpdir):
+    filename = str(tmpdir.join('cache.db'))
+    store = SQLiteCache(filename)
+    assert store._connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    store.set('a', 'A')
+    other = SQLiteCache(filename)
+    # Visible to another connection as soon as it is written.
+    assert other.get('a') == 'A'
+    other.close()
+    store.close()
+    store = SQLiteCache(filename)
+    assert store.get('a') == 'A'
+    other = SQLiteCache(filename, table='other')
+    assert other.get('a') is None
+    other.close()
+    store.close()
+
+
+def test_tier_promotion(sqlite_cache):
+    memory = MemoryCache()
+    tiered = TieredCache(memory, sqlite_cache)
+    sqlite_cache.set('a', 'A')
+    assert memory.get('a') is None
+    assert tiered.get('a') == 'A'
+    assert memory.get('a') == 'A'
+    tiered.set('b', 'B')
+    assert memory.get('b') == 'B' and sqlite_cache.get('b') == 'B'
+    tiered.delete('a')
+    assert tiered.get('a') is None and sqlite_cache.get('a') is None
+    tiered.clear()
+    assert len(memory) == 0 and len(sqlite_cache) == 0
+
+
+def _response(n):
+    return {'concepts': [{'concept': {'label': 'Concept {0}'.format(i)}, 'score': 1 - i / 100} for i in range(n)]}
+
+
+def test_related_concepts_smaller_limits_are_served_from_larger_ones():
+    related = RelatedConceptsCache()
+    related.set('Concept 1', 0, 50, _response(50))
+    assert related.get('Concept 1', 0, 20) == _response(20)
+    assert related.get('Concept 1', 0, 50) == _response(50)
+    assert related.get('Concept 1', 0, 60) is None
+    assert related.get('Concept 1', 1, 20) is None
+    assert (related.stats.hits, related.stats.misses) == (2, 2)
+
+
+def test_related_concepts_keeps_the_largest_response():
+    related = RelatedConceptsCache()
+    related.set('Concept 1', 0, 50, _response(50))
+    related.set('Concept 1', 0, 10, _response(10))
+    assert related.get('Concept 1', 0, 40) == _response(40)
+    related.set('Concept 1', 0, 80, _response(80))
+    assert related.get('Concept 1', 0, 80) == _response(80)
+
+
+def test_related_concepts_short_response_is_complete():
+    related = RelatedConceptsCache()
+    related.set('Concept 1', 0, 50, _response(30))
+    assert related.get('Concept 1', 0, 100) == _response(30)
+
+
+@pytest.mark.parametrize('order', [(50, 20), (20, 50)])
+def test_related_concepts_cache_matches_uncached_lookups(order):
+    graph = SyntheticConceptGraph()
+    related = RelatedConceptsCache()
+    for limit in order:
+        if related.get('Concept 1', 0, limit) is None:
+            related.set('Concept 1', 0, limit, graph.get_related_concepts('Concept 1', 0, limit))
+    for limit in (5, 20, 50):
+        assert related.get('Concept 1', 0, limit) == graph.get_related_concepts('Concept 1', 0, limit)
@@ -0,0 +1,196 @@
+"""test_catalog.py
+    An item catalog reopens from its saved index, drops removed and superseded items on compaction, and picks up
+    appends made through another catalog."""
+
+import json
+import os
+import pytest
+from watsongraph.catalog import ItemCatalog, import_items_json
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.item import Item
+
+
+def _item(name, concepts=('Concept 1', 'Concept 2'), description=''):
+    item = Item(name)
+    item.model = ConceptModel(list(concepts))
+    item.description = description
+    return item
+
+
+@pytest.fixture
+def filename(tmpdir):
+    return str(tmpdir.join('items.jsonl'))
+
+
+def test_put_get(filename):
+    with ItemCatalog(filename) as catalog:
+        catalog.put(_item('Item 1', description='first'))
+        catalog.put_many([_item('Item {0}'.format(i)) for i in range(2, 6)])
+        assert len(catalog) == 5
+        assert 'Item 3' in catalog
+        assert catalog.get('Item 1').description == 'first'
+        assert catalog.get('nothing') is None
+        with pytest.raises(KeyError):
+            catalog['nothing']
+        assert catalog.names() == ['Item {0}'.format(i) for i in range(1, 6)]
+
+
+def test_put_supersedes(filename):
+    with ItemCatalog(filename) as catalog:
+        catalog.put(_item('Item 1', ['Concept 1']))
+        catalog.put(_item('Item 2'))
+        catalog.put(_item('Item 1', ['Concept 3']))
+        assert len(catalog) == 2
+        assert catalog.names() == ['Item 2', 'Item 1']
+    with ItemCatalog(filename) as catalog:
+        assert catalog.get('Item 1').concepts() == ['Concept 3']
+
+
+def test_reopen_from_index(filename):
+    with ItemCatalog(filename) as catalog:
+        catalog.put_many([_item('Item {0}'.format(i), description=str(i)) for i in range(20)])
+        size = catalog._size
+    with open(filename + '.idx') as f:
+        assert json.load(f)['size'] == size
+    catalog = ItemCatalog(filename)
+    try:
+        assert catalog._size == size
+        assert len(catalog) == 20
+        assert catalog.get('Item 7').description == '7'
+    finally:
+        catalog.close()
+
+
+def test_reopen_after_unindexed_appends(filename):
+    with ItemCatalog(filename) as catalog:
+        catalog.put(_item('Item 1'))
+    # Appended after the index was saved, as another process could.
+    with open(filename, 'ab') as f:
+        f.write((json.dumps({'name': 'Item 2', 'model': ConceptModel(['Concept 4']).to_json(),
+                             'description': 'late'}) + '\n').encode('utf-8'))
+    with ItemCatalog(filename) as catalog:
+        assert catalog.names() == ['Item 1', 'Item 2']
+        assert catalog.get('Item 2').concepts() == ['Concept 4']
+
+
+@pytest.mark.parametrize('index', ['missing', 'corrupt', 'stale'])
+def test_reopen_without_index(filename, index):
+    with ItemCatalog(filename) as catalog:
+        catalog.put_many([_item('Item {0}'.format(i)) for i in range(5)])
+        catalog.remove('Item 2')
+    with open(filename + '.idx', 'w') as f:
+        if index == 'corrupt':
+            f.write('{"size": ')
+        elif index == 'stale':
+            json.dump({'size': 10 ** 9, 'entries': []}, f)
+    if index == 'missing':
+        os.remove(filename + '.idx')
+    with ItemCatalog(filename) as catalog:
+        assert catalog.names() == ['Item 0', 'Item 1', 'Item 3', 'Item 4']
+
+
+def test_remove_and_compact(filename):
+    with ItemCatalog(filename) as catalog:
+        catalog.put_many([_item('Item {0}'.format(i)) for i in range(10)])
+        catalog.put(_item('Item 0', ['Concept 5']))
+        catalog.remove('Item 5')
+        with pytest.raises(KeyError):
+            catalog.remove('Item 5')
+        assert 'Item 5' not in catalog
+        assert catalog.get('Item 5') is None
+        assert catalog.garbage() > 0
+        names = catalog.names()
+        catalog.compact()
+        assert catalog.garbage() == 0
+        assert catalog.names() == names
+        assert catalog.get('Item 0').concepts() == ['Concept 5']
+    with open(filename) as f:
+        assert len(f.readlines()) == 9
+    with ItemCatalog(filename) as catalog:
+        assert catalog.names() == names
+        assert catalog.get('Item 0').concepts() == ['Concept 5']
+
+
+def test_refresh_across_catalogs(filename):
+    writer = ItemCatalog(filename)
+    reader = ItemCatalog(filename)
+    try:
+        writer.put(_item('Item 1'))
+        # An unknown name triggers a refresh by itself.
+        assert reader.get('Item 1') is not None
+        writer.put(_item('Item 2'))
+        writer.remove('Item 1')
+        reader.refresh()
+        assert reader.names() == ['Item 2']
+        writer.compact()
+        reader.refresh()
+        assert reader.names() == ['Item 2']
+        assert reader.get('Item 2').concepts() == ['Concept 1', 'Concept 2']
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_max_resident(filename):
+    with ItemCatalog(filename, max_resident=3) as catalog:
+        catalog.put_many([_item('Item {0}'.format(i)) for i in range(10)])
+        assert len(catalog._resident) == 3
+        catalog.get('Item 0')
+        assert list(catalog._resident)[-1] == 'Item 0'
+        assert len(list(catalog)) == 10
+        assert len(catalog._resident) == 3
+
+
+def test_items_are_copied(filename):
+    with ItemCatalog(filename) as catalog:
+        item = _item('Item 1')
+        catalog.put(item)
+        item.model.add('Concept 3')
+        item.description = 'changed'
+        got = catalog.get('Item 1')
+        assert got is not item
+        assert got.concepts() == ['Concept 1', 'Concept 2']
+        assert got.description == ''
+        got.model.add('Concept 4')
+        assert catalog.get('Item 1').concepts() == ['Concept 1', 'Concept 2']
+        catalog.put(got)
+        assert catalog.get('Item 1').concepts() == ['Concept 1', 'Concept 2', 'Concept 4']
+
+
+def test_index_of_replaced_log(filename):
+    with ItemCatalog(filename) as catalog:
+        catalog.put_many([_item('Item {0}'.format(i), description=str(i)) for i in range(10)])
+        catalog.put_many([_item('Item {0}'.format(i), description=str(i) * 2) for i in range(5)])
+    stale = ItemCatalog(filename)
+    with ItemCatalog(filename) as compacting:
+        compacting.compact()
+        # The new log grows past the size of the old one, so that the size of an index of the old one fits it.
+        compacting.put_many([_item('Item {0}'.format(i), description='new') for i in range(10, 30)])
+        assert compacting._size > stale._size
+    # Closing saves the index, after the log it had open was replaced.
+    stale.close()
+    with ItemCatalog(filename) as catalog:
+        assert len(catalog) == 30
+        descriptions = [catalog.get('Item {0}'.format(i)).description for i in (0, 4, 5, 9, 29)]
+        assert descriptions == ['00', '44', '5', '9', 'new']
+        with open(filename + '.idx') as f:
+            old = f.read()
+        catalog.remove('Item 0')
+        catalog.compact()
+        catalog.put_many([_item('Item {0}'.format(i), description='newer') for i in range(30, 50)])
+    # An index saved against the old log is rejected, rather than read at offsets the new log does not have.
+    with open(filename + '.idx', 'w') as f:
+        f.write(old)
+    with ItemCatalog(filename) as catalog:
+        assert len(catalog) == 49
+        assert 'Item 0' not in catalog
+        assert [catalog.get('Item {0}'.format(i)).description for i in (1, 5, 29, 49)] == ['11', '5', 'new', 'newer']
+
+
+def test_import_items_json(filename, tmpdir):
+    with open(str(tmpdir.join('items.json')), 'w') as f:
+        json.dump({'items': [_item('Item {0}'.format(i), description=str(i)).to_json() for i in range(3)]}, f)
+    with ItemCatalog(filename) as catalog:
+        assert import_items_json(str(tmpdir.join('items.json')), catalog=catalog) == 3
+        assert catalog.names() == ['Item 0', 'Item 1', 'Item 2']
+        assert catalog.get('Item 2').description == '2'
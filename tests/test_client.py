@@ -0,0 +1,131 @@
+"""test_client.py
+    `WatsonClient` makes its calls through one pooled, keep-alive session, retrying server errors with backoff, run
+    against a local stand-in for the service."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.event_insight_lib import TokenProvider, WatsonClient
+from watsongraph.scheduling import Scheduler
+
+
+class _Service(ThreadingHTTPServer):
+    """
+    Answers every request with an empty JSON object, after failing the first `failures` of them with a 503, and
+    records the client address each request came in on.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, failures=0):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), _Handler)
+        self.failures = failures
+        self.addresses = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return 'http://{0}:{1}'.format(*self.server_address[:2])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, so that a pooled connection can carry many requests.
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.addresses.append(self.client_address)
+            failing = len(self.server.addresses) <= self.server.failures
+        body = json.dumps({} if not failing else {'error': 'overloaded'}).encode('utf-8')
+        self.send_response(503 if failing else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def service(request):
+    service = _Service(failures=getattr(request, 'param', 0))
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    yield service
+    service.shutdown()
+    service.server_close()
+
+
+def _token_provider():
+    provider = TokenProvider(token_file=None)
+    provider._token, provider._expires = 'token', float('inf')
+    return provider
+
+
+def _client(service, **kwargs):
+    kwargs.setdefault('backoff_factor', 0)
+    return WatsonClient(token_provider=_token_provider(), base_url=service.url, **kwargs)
+
+
+def test_retry_configuration():
+    client = WatsonClient(token_provider=_token_provider(), pool_size=7, backoff_factor=0.25,
+                          retry_statuses=(502, 503))
+    for scheme in ('https://', 'http://'):
+        adapter = client.session.get_adapter(scheme + 'watson.test')
+        retry = adapter.max_retries
+        assert retry.total == 3
+        assert retry.backoff_factor == 0.25
+        assert set(retry.status_forcelist) == {502, 503}
+        assert retry.raise_on_status is False
+        methods = getattr(retry, 'allowed_methods', None) or retry.method_whitelist
+        assert set(methods) == {'GET', 'POST'}
+        assert adapter._pool_maxsize == 7
+    client.close()
+
+
+def test_scheduler_takes_over_retries():
+    client = WatsonClient(token_provider=_token_provider(), scheduler=Scheduler())
+    assert client.session.get_adapter('https://watson.test').max_retries.total == 0
+    client = WatsonClient(token_provider=_token_provider(), scheduler=Scheduler(), retries=2)
+    assert client.session.get_adapter('https://watson.test').max_retries.total == 2
+
+
+def test_connections_are_reused(service):
+    client = _client(service)
+    for i in range(10):
+        assert client.get_related_concepts('Concept {0}'.format(i)) == {}
+    assert len(service.addresses) == 10
+    assert len(set(service.addresses)) == 1
+    client.close()
+
+
+@pytest.mark.parametrize('service', [2], indirect=True)
+def test_server_errors_are_retried(service):
+    client = _client(service)
+    assert client.get_related_concepts('Concept 1') == {}
+    assert len(service.addresses) == 3
+    client.close()
+
+
+@pytest.mark.parametrize('service', [3], indirect=True)
+def test_server_errors_are_raised_once_retries_run_out(service):
+    client = _client(service, retries=1)
+    with pytest.raises(requests.HTTPError) as error:
+        client.get_related_concepts('Concept 1')
+    assert error.value.response.status_code == 503
+    assert len(service.addresses) == 2
+    client.close()
+
+
+def test_process_wide_client_is_shared(monkeypatch):
+    monkeypatch.setattr(event_insight_lib, '_clients', dict())
+    client = event_insight_lib.get_client('shared-token.json')
+    assert event_insight_lib.get_client('shared-token.json') is client
+    assert event_insight_lib.get_client('other-token.json') is not client
+    replacement = WatsonClient(token_provider=_token_provider())
+    event_insight_lib.set_client(replacement, 'shared-token.json')
+    assert event_insight_lib.get_client('shared-token.json') is replacement
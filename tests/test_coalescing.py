@@ -0,0 +1,69 @@
+"""test_coalescing.py
+    Identical API calls made at the same time share a single request."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.scheduling import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_request():
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def call():
+        calls.append(None)
+        started.set()
+        release.wait()
+        return 'result'
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        leader = executor.submit(single_flight.do, 'key', call)
+        started.wait()
+        followers = [executor.submit(single_flight.do, 'key', call) for _ in range(7)]
+        # Give the followers time to join the call in flight.
+        time.sleep(0.05)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+    assert results == ['result'] * 8
+    assert len(calls) == 1
+    assert single_flight.in_flight() == 0
+
+
+def test_exceptions_are_shared_and_not_cached():
+    single_flight = SingleFlight()
+
+    def fail():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        single_flight.do('key', fail)
+    assert single_flight.do('key', lambda: 'result') == 'result'
+
+
+def test_coroutines_share_one_request():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return 'result'
+
+    async def run():
+        return await asyncio.gather(*[single_flight.ado('key', call) for _ in range(10)])
+
+    assert asyncio.run(run()) == ['result'] * 10
+    assert len(calls) == 1
+
+
+def test_get_related_concepts_coalesces_concurrent_lookups(backend):
+    backend.latency = 0.05
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(lambda i: event_insight_lib.get_related_concepts('Concept 1'), range(8)))
+    assert all(response == responses[0] for response in responses)
+    assert backend.calls == 1
@@ -0,0 +1,138 @@
+"""test_compact.py
+    `CompactConceptModel` behaves as the equivalent `ConceptModel` does."""
+
+import asyncio
+import pytest
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.node import Node
+from tests.conftest import edge_set
+
+np = pytest.importorskip('numpy')
+from watsongraph.compact import CompactConceptModel  # noqa: E402
+
+
+def _pair(concepts):
+    return ConceptModel(concepts), CompactConceptModel(concepts, weight_dtype='float64')
+
+
+def _assert_same(compact, model):
+    assert compact.concepts() == model.concepts()
+    assert edge_set(compact) == edge_set(model)
+
+
+def test_conversion_round_trip(backend):
+    model = ConceptModel(['Concept 1'])
+    model.explode(limit=20, depth=2)
+    model.get_node('Concept 1').set_relevance(0.5)
+    model.get_node('Concept 1').set_property('tags', ['a', 'b'])
+    compact = CompactConceptModel.from_concept_model(model, weight_dtype='float64')
+    _assert_same(compact, model)
+    assert compact.get_node('Concept 1').properties == {'relevance': 0.5, 'tags': ['a', 'b']}
+    back = compact.to_concept_model()
+    _assert_same(back, model)
+    assert back._expansions == model._expansions and back._augmented == model._augmented
+
+
+def test_explode_depth(backend):
+    model, compact = _pair(['Concept 1'])
+    model.explode(limit=20, depth=2)
+    compact.explode(limit=20, depth=2)
+    _assert_same(compact, model)
+    assert compact._augmented == model._augmented
+
+
+def test_augment_again_does_not_refetch(backend):
+    compact = CompactConceptModel(['Concept 1', 'Concept 2'])
+    compact.explode(limit=20)
+    calls = backend.calls
+    compact.augment('Concept 1', limit=10)
+    compact.augment('Concept 2', limit=20)
+    assert backend.calls == calls
+    assert compact.is_augmented('Concept 1', 0, 20)
+    assert not compact.is_augmented('Concept 1', 0, 30)
+
+
+def test_abridge_is_local(backend):
+    model, compact = _pair(['Concept 1'])
+    model.explode(limit=20, depth=2)
+    compact.explode(limit=20, depth=2)
+    calls = backend.calls
+    model.abridge('Concept 1', limit=20)
+    compact.abridge('Concept 1', limit=20)
+    assert backend.calls == calls
+    _assert_same(compact, model)
+
+
+def test_abridge_keep_shared(backend):
+    model, compact = _pair(['Concept 1', 'Concept 2'])
+    for m in (model, compact):
+        m.explode(limit=30)
+        m.add_reference('Concept 2', 'item')
+        m.abridge('Concept 1', keep_shared=True)
+    _assert_same(compact, model)
+    assert compact.references('Concept 2') == frozenset(['item'])
+    compact.remove_reference('Concept 2', 'item')
+    assert compact.references('Concept 2') == frozenset()
+
+
+def test_augment_and_abridge_by_node(backend):
+    node = Node('Concept 9')
+    node.set_relevance(0.3)
+    compact = CompactConceptModel()
+    compact.augment_by_node(node, limit=5)
+    assert compact.get_node('Concept 9').properties == {'relevance': 0.3}
+    assert len(compact.concepts()) == 6
+    compact.abridge_by_node(node)
+    assert compact.concepts() == []
+
+
+def test_expand_iter(backend):
+    model, compact = _pair(['Concept 5'])
+    assert list(compact.expand_iter(limit=10, max_calls=3)) == list(model.expand_iter(limit=10, max_calls=3))
+    _assert_same(compact, model)
+
+
+def test_aexplode(backend):
+    model, compact = _pair(['Concept 7'])
+    model.explode(limit=10, depth=2)
+    asyncio.run(compact.aexplode(limit=10, depth=2))
+    _assert_same(compact, model)
+
+
+def test_intersection_with_by_nodes():
+    compact = CompactConceptModel(['Concept 1', 'Concept 2'])
+    compact.set_property('Concept 1', 'relevance', 0.5)
+    other = ConceptModel(['Concept 1', 'Concept 3'])
+    other.get_node('Concept 1').set_relevance(1.0)
+    nodes = compact.intersection_with_by_nodes(other)
+    assert [node.concept for node in nodes] == ['Concept 1']
+    assert nodes[0].get_relevance() == 0.75
+    assert compact.get_node('Concept 1').get_relevance() == 0.75
+
+
+def test_nodes_are_detached():
+    compact = CompactConceptModel(['Concept 1'])
+    compact.get_node('Concept 1').set_relevance(1.0)
+    assert [node.properties for node in compact.nodes()] == [{}]
+    with pytest.raises(RuntimeError):
+        compact.get_node('Concept 2')
+
+
+def test_mixed_numbers_are_promoted_to_floats():
+    compact = CompactConceptModel(['Concept 1', 'Concept 2'])
+    compact.set_property('Concept 1', 'score', 1)
+    compact.set_property('Concept 2', 'score', 2.5)
+    assert compact._columns['score'].values.dtype == np.float64
+    assert compact.get_properties('score') == {'Concept 1': 1.0, 'Concept 2': 2.5}
+    compact.set_property('Concept 1', 'label', 'a')
+    compact.set_property('Concept 2', 'label', 2)
+    assert compact._columns['label'].values.dtype == object
+
+
+def test_merge_with_concept_model(backend):
+    model = ConceptModel(['Concept 1'])
+    model.augment('Concept 1', limit=10)
+    compact = CompactConceptModel(['Concept 1'], weight_dtype='float64')
+    compact.merge_with(model)
+    _assert_same(compact, model)
+    assert compact.is_augmented('Concept 1', 0, 10)
@@ -0,0 +1,72 @@
+"""test_expand_iter.py
+    Best-first expansion stays within its budget and leaves a well-formed model wherever it stops."""
+
+import asyncio
+import threading
+from watsongraph.conceptmodel import ConceptModel
+
+
+def _well_formed(model):
+    concepts = model.concept_set()
+    return all(source in concepts and target in concepts for weight, source, target in model.iter_edges())
+
+
+def test_max_calls(backend):
+    model = ConceptModel(['Concept 1'])
+    added = list(model.expand_iter(limit=10, max_calls=5))
+    assert backend.calls == 5
+    assert sorted(added + ['Concept 1']) == model.concepts()
+    assert _well_formed(model)
+
+
+def test_max_nodes(backend):
+    model = ConceptModel(['Concept 1'])
+    list(model.expand_iter(limit=10, max_nodes=25))
+    assert len(model.concepts()) == 25
+    assert _well_formed(model)
+
+
+def test_most_promising_concept_goes_first(backend):
+    model = ConceptModel(['Concept 1', 'Concept 2'])
+    model.get_node('Concept 1').set_relevance(0.1)
+    model.get_node('Concept 2').set_relevance(0.9)
+    next(model.expand_iter(limit=10))
+    assert model.is_augmented('Concept 2', 0, 10)
+    assert not model.is_augmented('Concept 1', 0, 10)
+
+
+def test_breaking_out_leaves_a_partial_model(backend):
+    model = ConceptModel(['Concept 1'])
+    for n, concept in enumerate(model.expand_iter(limit=10, workers=4), start=1):
+        assert concept in model
+        if n == 15:
+            break
+    assert _well_formed(model)
+    assert backend.calls <= 8
+
+
+def test_cancel(backend):
+    cancel = threading.Event()
+    cancel.set()
+    model = ConceptModel(['Concept 1'])
+    assert list(model.expand_iter(limit=10, cancel=cancel)) == []
+    assert backend.calls == 0
+
+
+def test_deadline(backend):
+    backend.latency = 0.2
+    model = ConceptModel(['Concept 1'])
+    list(model.expand_iter(limit=10, deadline=0.1))
+    assert model.concepts() == ['Concept 1']
+
+
+def test_aexpand_iter_equals_expand_iter(backend):
+    expected = ConceptModel(['Concept 1'])
+    list(expected.expand_iter(limit=10, max_calls=6))
+    model = ConceptModel(['Concept 1'])
+
+    async def run():
+        return [concept async for concept in model.aexpand_iter(limit=10, max_calls=6, workers=1)]
+
+    asyncio.run(run())
+    assert model.concepts() == expected.concepts()
@@ -0,0 +1,213 @@
+"""test_feedback_log.py
+    Feedback recorded as events replays to the same user as feedback saved in full, before and after the events are
+    compacted into a snapshot."""
+
+import threading
+import pytest
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.item import Item
+from watsongraph.user import User, SnapshotCompactor, compact_user
+from watsongraph.userstore import JSONUserStore, SQLiteUserStore
+
+
+def _model(relevancies):
+    model = ConceptModel(sorted(relevancies))
+    for concept, relevance in relevancies.items():
+        model.set_property(concept, 'relevance', relevance)
+    return model
+
+
+def _item(name, relevancies):
+    item = Item(name)
+    item.model = _model(relevancies)
+    return item
+
+
+ITEMS = [
+    ('interest', _item('Item 1', {'Concept 1': 0.6, 'Concept 2': 0.7})),
+    ('interest', _item('Item 2', {'Concept 2': 0.9, 'Concept 3': 0.5})),
+    ('disinterest', _item('Item 3', {'Concept 1': 0.4})),
+    ('interest', _item('Item 4', {'Concept 4': 0.8, 'Concept 3': 0.6})),
+]
+
+
+def _user():
+    user = User(model=_model({'Concept 1': 0.5, 'Concept 5': 0.9}), user_id='alice')
+    # An empty `exceptions` argument would leave the user sharing the class-level list.
+    user.exceptions = []
+    return user
+
+
+def _state(user):
+    return (sorted((node.concept, round(node.get_relevance(), 9)) for node in user.nodes()),
+            {concept: user.model.references(concept) for concept in user.concepts()}, user.exceptions)
+
+
+def _loaded(store):
+    user = User(model=ConceptModel(), user_id='alice')
+    user.load_user(store=store)
+    return user
+
+
+@pytest.fixture
+def store(tmpdir):
+    store = SQLiteUserStore(str(tmpdir.join('accounts.db')))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def expected():
+    user = _user()
+    for kind, item in ITEMS:
+        if kind == 'interest':
+            user.express_interest(item)
+        else:
+            user.express_disinterest(item)
+    return _state(user)
+
+
+def _record_all(user, store):
+    for kind, item in ITEMS:
+        if kind == 'interest':
+            user.record_interest(item, store=store)
+        else:
+            user.record_disinterest(item, store=store)
+
+
+def test_events_are_appended(store, expected):
+    user = _user()
+    user.save_user(store=store)
+    _record_all(user, store)
+    assert _state(user) == expected
+    assert store.pending_events() == {'alice': len(ITEMS)}
+    assert [event['item'] for seq, event in store.load_events('alice')] == [item.name for kind, item in ITEMS]
+    # The snapshot is left as it was saved.
+    assert store.load('alice')['exceptions'] == []
+
+
+def test_replay_matches_full_saves(store, expected):
+    user = _user()
+    user.save_user(store=store)
+    _record_all(user, store)
+    assert _state(_loaded(store)) == expected
+
+
+def test_first_event_saves_snapshot(store, expected):
+    user = _user()
+    _record_all(user, store)
+    assert store.load('alice') is not None
+    assert len(store.load_events('alice')) == len(ITEMS) - 1
+    assert _state(_loaded(store)) == expected
+
+
+def test_compaction_equivalence(store, expected):
+    user = _user()
+    user.save_user(store=store)
+    _record_all(user, store)
+    assert compact_user('alice', store=store) == len(ITEMS)
+    assert store.load_events('alice') == []
+    assert store.pending_events() == {}
+    assert _state(_loaded(store)) == expected
+    assert compact_user('alice', store=store) == 0
+
+
+def test_events_after_compaction(store):
+    user = _user()
+    user.save_user(store=store)
+    kind, item = ITEMS[0]
+    user.record_interest(item, store=store)
+    compact_user('alice', store=store)
+    for kind, item in ITEMS[1:]:
+        getattr(user, 'record_' + kind)(item, store=store)
+    assert len(store.load_events('alice')) == len(ITEMS) - 1
+    assert _state(_loaded(store)) == _state(user)
+
+
+def test_snapshot_compactor(store, expected):
+    user = _user()
+    user.save_user(store=store)
+    _record_all(user, store)
+    compactor = SnapshotCompactor(store=store, min_events=len(ITEMS) + 1)
+    assert compactor.run_once() == 0
+    compactor.min_events = len(ITEMS)
+    assert compactor.run_once() == len(ITEMS)
+    assert compactor.compacted == len(ITEMS)
+    assert _state(_loaded(store)) == expected
+
+
+def test_snapshot_compactor_thread(store, expected):
+    user = _user()
+    user.save_user(store=store)
+    _record_all(user, store)
+    compactor = SnapshotCompactor(store=store, interval=0.01, min_events=1).start()
+    try:
+        done = threading.Event()
+        for _ in range(500):
+            if not store.pending_events():
+                done.set()
+                break
+            done.wait(0.01)
+        assert done.is_set()
+    finally:
+        compactor.stop()
+    assert _state(_loaded(store)) == expected
+
+
+def test_json_store_keeps_no_events(tmpdir):
+    store = JSONUserStore(str(tmpdir.join('accounts.json')))
+    user = _user()
+    user.save_user(store=store)
+    with pytest.raises(RuntimeError):
+        user.record_interest(ITEMS[0][1], store=store)
+    with pytest.raises(RuntimeError):
+        store.append_events('alice', [])
+    assert store.load('alice')['exceptions'] == []
+
+
+def _interleaved(store, write):
+    """
+    Compacts the log of `alice` with `write(store)` run between the compaction reading the snapshot and events and
+    writing the new snapshot, as a concurrent process could.
+
+    :return: The number of events compacted.
+    """
+    compact_events = store.compact_events
+
+    def interleaved(*args, **kwargs):
+        del store.compact_events
+        write(store)
+        return compact_events(*args, **kwargs)
+
+    store.compact_events = interleaved
+    return compact_user('alice', store=store)
+
+
+def test_compaction_skipped_after_concurrent_save(store):
+    user = _user()
+    user.save_user(store=store)
+    _record_all(user, store)
+    saved = _user()
+    saved.password = 'changed'
+    assert _interleaved(store, lambda store: saved.save_user(store=store)) == 0
+    assert _state(_loaded(store)) == _state(saved)
+    assert _loaded(store).password == 'changed'
+    assert store.load_events('alice') == []
+
+
+def test_compaction_skipped_after_concurrent_compaction(store, expected):
+    user = _user()
+    user.save_user(store=store)
+    _record_all(user, store)
+    assert _interleaved(store, lambda store: compact_user('alice', store=store)) == 0
+    assert _state(_loaded(store)) == expected
+
+
+def test_compaction_keeps_concurrent_events(store, expected):
+    user = _user()
+    user.save_user(store=store)
+    _record_all(user, store)
+    late = _item('Item 5', {'Concept 6': 0.7})
+    assert _interleaved(store, lambda store: user.record_interest(late, store=store)) == len(ITEMS)
+    assert len(store.load_events('alice')) == 1
+    assert _state(_loaded(store)) == _state(user)
@@ -0,0 +1,44 @@
+"""test_index.py
+    The `concept -> Node` index of a `ConceptModel` stays in step with its graph."""
+
+import pytest
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.node import Node
+
+
+def test_get_node_returns_the_node_in_the_graph(backend):
+    model = ConceptModel(['Concept 1'])
+    model.augment('Concept 1', limit=10)
+    for node in model.nodes():
+        assert model.get_node(node.concept) is node
+    assert 'Concept 1' in model
+    with pytest.raises(RuntimeError):
+        model.get_node('Not a concept')
+
+
+def test_index_follows_removals_and_merges(backend):
+    model = ConceptModel(['Concept 1'])
+    model.augment('Concept 1', limit=10)
+    other = ConceptModel(['Concept 2'])
+    other.augment('Concept 2', limit=10)
+    model.merge_with(other)
+    model.remove('Concept 1')
+    assert 'Concept 1' not in model
+    assert set(model.concept_set()) == {node.concept for node in model.nodes()}
+    assert model.get_node('Concept 2') in model.graph
+
+
+def test_index_catches_direct_changes_to_the_graph():
+    model = ConceptModel(['Concept 1'])
+    model.graph.add_node(Node('Concept 2'))
+    assert 'Concept 2' in model
+    assert model.get_node('Concept 2').concept == 'Concept 2'
+
+
+def test_adding_a_present_concept_keeps_its_node():
+    model = ConceptModel(['Concept 1'])
+    node = model.get_node('Concept 1')
+    node.set_relevance(0.5)
+    model.add('Concept 1')
+    assert model.get_node('Concept 1') is node
+    assert len(model.concepts()) == 1
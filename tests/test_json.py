@@ -0,0 +1,90 @@
+"""test_json.py
+    JSON serialization is the networkx node-link format, written and read one node and one link at a time."""
+
+import io
+import json
+import networkx as nx
+import pytest
+from networkx.readwrite import json_graph
+from watsongraph.conceptmodel import ConceptModel, _node_link_schema
+from tests.conftest import edge_set
+
+
+@pytest.fixture
+def model(backend):
+    model = ConceptModel(['Concept 1'])
+    model.explode(limit=20, depth=2)
+    model.map_property('relevance', lambda concept: len(concept) / 10)
+    model.set_property('Concept 1', 'tags', [1, {'quote': 'a "quoted" string'}])
+    return model
+
+
+def _properties(model):
+    return {node.concept: node.properties for node in model.nodes()}
+
+
+LINKS = _node_link_schema()[0]
+
+
+def _normalized(data_repr):
+    normalized = dict(data_repr, nodes=sorted(json.dumps(node, sort_keys=True) for node in data_repr['nodes']))
+    normalized[LINKS] = sorted(json.dumps(link, sort_keys=True) for link in data_repr[LINKS])
+    return normalized
+
+
+def test_same_schema_as_networkx(model):
+    graph = nx.relabel_nodes(model.graph, {node: node.concept for node in model.nodes()})
+    expected = json_graph.node_link_data(graph)
+    for node in expected['nodes']:
+        node.update(model.get_node(node['id']).properties)
+    assert _normalized(model.to_json(records=False)) == _normalized(expected)
+    assert set(model.to_json()) - set(expected) == {'augmented', 'expansions'}
+
+
+def test_round_trip(model):
+    loaded = ConceptModel()
+    loaded.load_from_json(json.loads(json.dumps(model.to_json())))
+    assert edge_set(loaded) == edge_set(model)
+    assert _properties(loaded) == _properties(model)
+    assert loaded._augmented == model._augmented and loaded._expansions == model._expansions
+
+
+def test_dump_json_writes_what_to_json_returns(model):
+    for records in (True, False):
+        f = io.StringIO()
+        model.dump_json(f, records=records)
+        assert f.getvalue() == json.dumps(model.to_json(records=records))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 65536])
+def test_chunked_load_json(model, chunk_size):
+    f = io.StringIO()
+    model.dump_json(f)
+    loaded = ConceptModel(['Concept 0'])
+    loaded.load_json(io.StringIO(f.getvalue()), chunk_size=chunk_size)
+    assert loaded.to_json() == model.to_json()
+    assert loaded._expansions == model._expansions
+
+
+def test_load_json_reads_whitespace_and_unknown_keys():
+    loaded = ConceptModel(['Concept 0'])
+    loaded.load_json(io.StringIO(' { "nodes" : [ {"id": "Concept 1"} ] , "links": [], "x": [1, {"y": 2}] } '))
+    assert loaded.concepts() == ['Concept 1']
+
+
+def test_links_by_index(model):
+    data_repr = model.to_json()
+    ids = {node['id']: i for i, node in enumerate(data_repr['nodes'])}
+    data_repr[LINKS] = [dict(link, source=ids[link['source']], target=ids[link['target']])
+                        for link in data_repr[LINKS]]
+    loaded = ConceptModel()
+    loaded.load_from_json(data_repr)
+    assert edge_set(loaded) == edge_set(model)
+
+
+def test_empty_model():
+    f = io.StringIO()
+    ConceptModel().dump_json(f)
+    loaded = ConceptModel(['Concept 0'])
+    loaded.load_json(io.StringIO(f.getvalue()))
+    assert loaded.concepts() == []
@@ -0,0 +1,58 @@
+"""test_memo.py
+    Concepts already augmented are not fetched again."""
+
+import asyncio
+from watsongraph.conceptmodel import ConceptModel
+from tests.conftest import edge_set
+
+
+def test_augment_skips_what_has_been_augmented(backend):
+    model = ConceptModel(['Concept 1'])
+    model.augment('Concept 1', limit=20)
+    model.augment('Concept 1', limit=20)
+    model.augment('Concept 1', limit=10)
+    assert backend.calls == 1
+    model.augment('Concept 1', limit=30)
+    model.augment('Concept 1', level=1, limit=10)
+    assert backend.calls == 3
+
+
+def test_explode_skips_what_has_been_augmented(backend):
+    model = ConceptModel(['Concept 1', 'Concept 2'])
+    model.augment('Concept 1', limit=10)
+    pending = len(model.concepts()) - 1
+    model.explode(limit=10)
+    assert backend.calls == 1 + pending
+    calls = backend.calls
+    pending = [concept for concept in model.concepts() if not model.is_augmented(concept, 0, 10)]
+    asyncio.run(model.aexpand(limit=10, n=10 ** 6))
+    assert backend.calls == calls + len(pending)
+
+
+def test_memo_survives_serialization(backend):
+    model = ConceptModel(['Concept 1'])
+    model.augment('Concept 1', limit=20)
+    loaded = ConceptModel()
+    loaded.load_from_json(model.to_json())
+    loaded.augment('Concept 1', limit=20)
+    assert backend.calls == 1
+
+
+def test_removing_a_neighbor_forgets_the_augmentation(backend):
+    model = ConceptModel(['Concept 1'])
+    model.augment('Concept 1', limit=10)
+    model.remove(model.neighborhood('Concept 1')[0][1])
+    assert not model.is_augmented('Concept 1', 0, 10)
+    model.augment('Concept 1', limit=10)
+    assert backend.calls == 2
+
+
+def test_explode_depth_fetches_each_concept_once(backend):
+    model = ConceptModel(['Concept 1'])
+    model.explode(limit=10, depth=3)
+    assert backend.calls == len(model._augmented)
+    expected = ConceptModel(['Concept 1'])
+    expected.explode(limit=10)
+    expected.explode(limit=10)
+    expected.explode(limit=10)
+    assert edge_set(model) <= edge_set(expected)
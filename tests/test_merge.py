@@ -0,0 +1,69 @@
+"""test_merge.py
+    `merge_with()` folds a model into another in place, reconciling properties and weights by policy."""
+
+import pytest
+from watsongraph.conceptmodel import ConceptModel
+
+
+def _model(relevance, weight):
+    model = ConceptModel(['Concept 1', 'Concept 2'])
+    model.graph.add_edge(model.get_node('Concept 1'), model.get_node('Concept 2'), weight=weight)
+    model.get_node('Concept 1').set_relevance(relevance)
+    return model
+
+
+@pytest.mark.parametrize('policy, relevance, weight', [
+    ('keep', 0.2, 0.4),
+    ('overwrite', 0.6, 0.8),
+    ('max', 0.6, 0.8),
+    ('mean', 0.4, 0.6),
+    (lambda current, incoming: current + incoming, 0.8, 1.2),
+])
+def test_policies(policy, relevance, weight):
+    model = _model(0.2, 0.4)
+    model.merge_with(_model(0.6, 0.8), node_policy=policy, edge_policy=policy)
+    assert model.get_node('Concept 1').get_relevance() == pytest.approx(relevance)
+    assert model.graph[model.get_node('Concept 1')][model.get_node('Concept 2')]['weight'] == pytest.approx(weight)
+
+
+def test_default_policies_keep_properties_and_overwrite_weights():
+    model = _model(0.2, 0.4)
+    model.merge_with(_model(0.6, 0.8))
+    assert model.get_node('Concept 1').get_relevance() == 0.2
+    assert model.graph[model.get_node('Concept 1')][model.get_node('Concept 2')]['weight'] == 0.8
+
+
+def test_per_property_policies():
+    model = _model(0.2, 0.4)
+    model.get_node('Concept 1').set_property('view_count', 10)
+    mixin = _model(0.6, 0.8)
+    mixin.get_node('Concept 1').set_property('view_count', 20)
+    model.merge_with(mixin, node_policy={'relevance': 'max'})
+    assert model.get_node('Concept 1').get_relevance() == 0.6
+    assert model.get_node('Concept 1').get_property('view_count') == 10
+
+
+def test_merge_copies_new_nodes_and_leaves_the_mixin_alone():
+    model = _model(0.2, 0.4)
+    mixin = ConceptModel(['Concept 1', 'Concept 3'])
+    mixin.get_node('Concept 3').set_relevance(0.9)
+    mixin.graph.add_edge(mixin.get_node('Concept 1'), mixin.get_node('Concept 3'), weight=0.7)
+    model.merge_with(mixin)
+    assert model.concepts() == ['Concept 1', 'Concept 2', 'Concept 3']
+    assert model.get_node('Concept 3') is not mixin.get_node('Concept 3')
+    model.get_node('Concept 3').set_relevance(0.1)
+    assert mixin.get_node('Concept 3').get_relevance() == 0.9
+    assert mixin.concepts() == ['Concept 1', 'Concept 3']
+
+
+def test_properties_only_the_mixin_has_are_copied():
+    model = _model(0.2, 0.4)
+    mixin = _model(0.6, 0.8)
+    mixin.get_node('Concept 2').set_property('view_count', 5)
+    model.merge_with(mixin)
+    assert model.get_node('Concept 2').get_property('view_count') == 5
+
+
+def test_unknown_policy():
+    with pytest.raises(RuntimeError):
+        _model(0.2, 0.4).merge_with(_model(0.6, 0.8), edge_policy='median')
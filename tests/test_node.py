@@ -0,0 +1,52 @@
+"""test_node.py
+    `Node` objects are small, hash by concept, and pickle across processes."""
+
+import pickle
+import sys
+import pytest
+from watsongraph.node import Node
+
+
+def test_nodes_have_no_instance_dictionary():
+    node = Node('Concept 1')
+    assert not hasattr(node, '__dict__')
+    with pytest.raises(AttributeError):
+        node.anything = None
+
+
+def test_nodes_of_a_concept_are_equal_and_hash_alike():
+    a, b = Node('Concept 1'), Node('Concept ' + str(1))
+    assert a == b and hash(a) == hash(b) == hash('Concept 1')
+    assert a.concept is b.concept is sys.intern('Concept 1')
+    assert a != Node('Concept 2')
+    assert a != 'Concept 1'
+
+
+def test_properties_are_allocated_lazily():
+    node = Node('Concept 1')
+    assert node._properties is None
+    assert not node.has_property('relevance')
+    assert node._properties is None
+    with pytest.raises(KeyError):
+        node.get_property('relevance')
+    node.set_relevance(0.5)
+    assert node.get_relevance() == 0.5
+
+
+def test_pickling_keeps_concept_and_properties():
+    node = Node('Concept 1', relevance=0.5)
+    loaded = pickle.loads(pickle.dumps(node))
+    assert loaded == node and hash(loaded) == hash(node)
+    assert loaded.properties == {'relevance': 0.5}
+
+
+def test_copy_does_not_share_properties():
+    node = Node('Concept 1', relevance=0.5)
+    copy = node.copy()
+    copy.set_relevance(1.0)
+    assert node.get_relevance() == 0.5
+
+
+def test_concept_is_read_only():
+    with pytest.raises(AttributeError):
+        Node('Concept 1').concept = 'Concept 2'
@@ -0,0 +1,54 @@
+"""test_pageviews.py
+    Pageview enrichment is batched, and cached until the day is out."""
+
+import datetime
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.pageviews import PageviewsEnricher, average_views
+from watsongraph.replay import SyntheticPageviewsClient
+
+CONCEPTS = ['Concept {0}'.format(i) for i in range(120)]
+
+
+class _Enricher(PageviewsEnricher):
+    today = datetime.date(2016, 6, 1)
+
+    def _today(self):
+        return self.today
+
+
+def test_enrichment_is_batched_and_cached():
+    client = SyntheticPageviewsClient()
+    enricher = _Enricher(client=client, batch_size=50, workers=4)
+    model = ConceptModel(CONCEPTS)
+    enricher.enrich(model)
+    assert client.calls == 3
+    view_counts = model.get_properties('view_count')
+    assert set(view_counts) == set(CONCEPTS)
+    enricher.enrich(ConceptModel(CONCEPTS[:10]))
+    assert client.calls == 3
+    enricher.today += datetime.timedelta(1)
+    enricher.enrich(ConceptModel(CONCEPTS[:10]))
+    assert client.calls == 4
+
+
+def test_enrichment_matches_the_client():
+    client = SyntheticPageviewsClient()
+    enricher = _Enricher(client=client)
+    start = enricher.today - datetime.timedelta(enricher.days)
+    raw = client.article_views('en.wikipedia', ['Concept_1'], start=start, end=enricher.today)
+    expected = average_views({day: views['Concept_1'] for day, views in raw.items()})
+    assert enricher.view_counts(['Concept 1']) == {'Concept 1': expected}
+
+
+def test_several_models_share_one_fetch():
+    client = SyntheticPageviewsClient()
+    enricher = _Enricher(client=client, batch_size=100)
+    models = [ConceptModel(CONCEPTS[:60]), ConceptModel(CONCEPTS[30:90])]
+    enricher.enrich(models)
+    assert client.calls == 1
+    assert models[0].get_view_count('Concept 40') == models[1].get_view_count('Concept 40')
+
+
+def test_average_views_counts_missing_days_as_zero():
+    assert average_views({'20160101': 10, '20160102': None, '20160103': 5}) == 5
+    assert average_views({}) == 0
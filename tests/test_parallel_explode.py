@@ -0,0 +1,30 @@
+"""test_parallel_explode.py
+    Fetching related concepts with a pool of workers must give the same model as fetching them one at a time."""
+
+from watsongraph.conceptmodel import ConceptModel
+from tests.conftest import edge_set
+
+
+def test_parallel_explode_equals_sequential(backend):
+    sequential = ConceptModel(['Concept 1', 'Concept 2', 'Concept 3'])
+    sequential.explode(limit=20)
+    parallel = ConceptModel(['Concept 1', 'Concept 2', 'Concept 3'])
+    parallel.explode(limit=20, workers=8)
+    assert parallel.concepts() == sequential.concepts()
+    assert edge_set(parallel) == edge_set(sequential)
+
+
+def test_parallel_expand_equals_sequential(backend):
+    sequential = ConceptModel(['Concept 1'])
+    sequential.augment('Concept 1', limit=10)
+    parallel = sequential.copy()
+    sequential.expand(limit=10)
+    parallel.expand(limit=10, workers=8)
+    assert parallel.concepts() == sequential.concepts()
+    assert edge_set(parallel) == edge_set(sequential)
+
+
+def test_parallel_explode_makes_one_call_per_concept(backend):
+    model = ConceptModel(['Concept {0}'.format(i) for i in range(20)])
+    model.explode(limit=5, workers=4)
+    assert backend.calls == 20
@@ -0,0 +1,62 @@
+"""test_properties.py
+    Bulk property access and top-k ranking, on both model types."""
+
+import random
+import pytest
+from watsongraph.conceptmodel import ConceptModel
+
+CONCEPTS = ['Concept {0}'.format(i) for i in range(200)]
+
+
+@pytest.fixture(params=['ConceptModel', 'CompactConceptModel'])
+def model(request):
+    if request.param == 'ConceptModel':
+        return ConceptModel(CONCEPTS)
+    pytest.importorskip('numpy')
+    from watsongraph.compact import CompactConceptModel
+    return CompactConceptModel(CONCEPTS)
+
+
+def test_bulk_set_and_get(model):
+    values = {concept: i for i, concept in enumerate(CONCEPTS[:50])}
+    model.set_properties('rank', values)
+    assert model.get_properties('rank') == values
+    assert model.get_properties('rank', ['Concept 1', 'Concept 199']) == {'Concept 1': 1}
+    assert model.get_properties('missing') == {}
+
+
+def test_top_k_equals_the_head_of_concepts_by_property(model):
+    rng = random.Random(0)
+    # Plenty of ties, which must be broken by concept as they are in `concepts_by_property()`.
+    model.map_property('relevance', lambda concept: rng.randrange(20) / 20)
+    for k in (0, 1, 10, 199, 200, 500):
+        assert model.top_k('relevance', k) == model.concepts_by_property('relevance')[:k]
+
+
+def test_top_k_skips_concepts_without_the_property(model):
+    model.set_properties('relevance', {'Concept 1': 0.1, 'Concept 2': 0.2})
+    assert model.top_k('relevance', 5) == [(0.2, 'Concept 2'), (0.1, 'Concept 1')]
+
+
+def test_update_property(model):
+    model.set_properties('relevance', {'Concept 1': 1.0, 'Concept 2': 0.5})
+    model.update_property('relevance', lambda relevance: relevance * 0.5)
+    assert model.get_properties('relevance') == {'Concept 1': 0.5, 'Concept 2': 0.25}
+
+
+def test_update_property_changing_type(model):
+    model.set_properties('view_count', {'Concept 1': 10, 'Concept 2': 3})
+    model.update_property('view_count', lambda views: views / 2)
+    assert model.get_properties('view_count') == {'Concept 1': 5.0, 'Concept 2': 1.5}
+    model.update_property('view_count', lambda views: views > 2)
+    assert model.get_properties('view_count') == {'Concept 1': True, 'Concept 2': False}
+    assert type(model.get_properties('view_count')['Concept 1']) is bool
+
+
+def test_vectorized_update_property():
+    np = pytest.importorskip('numpy')
+    from watsongraph.compact import CompactConceptModel
+    model = CompactConceptModel(CONCEPTS)
+    model.map_property('relevance', lambda concept: float(concept.split()[1]))
+    model.update_property('relevance', lambda values: np.sqrt(values), vectorized=True)
+    assert model.get_properties('relevance', ['Concept 16'])['Concept 16'] == 4.0
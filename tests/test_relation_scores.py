@@ -0,0 +1,95 @@
+"""test_relation_scores.py
+    Relation scores are fetched in URL-length-bounded batches, which may be fetched in parallel."""
+
+import asyncio
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.conceptmodel import ConceptModel
+from tests.conftest import edge_set
+
+TARGETS = ['Concept {0}'.format(i) for i in range(2, 200)]
+# The graph endpoint as reached through, e.g., a proxy which adds a long prefix.
+LONG_URL = 'https://proxy.test/' + 'watson/' * 100 + 'graphs/wikipedia/en-20120601'
+
+
+def test_batches_stay_within_url_length():
+    batches = event_insight_lib.relation_scores_batches('Concept 1', TARGETS)
+    assert len(batches) > 1
+    assert [target for batch in batches for target in batch] == TARGETS
+    for batch in batches:
+        url = event_insight_lib._relation_scores_url(event_insight_lib.GRAPH_URL, 'Concept 1', batch)
+        assert len(url) <= event_insight_lib.MAX_URL_LENGTH
+
+
+def test_batches_account_for_the_base_url():
+    batches = event_insight_lib.relation_scores_batches('Concept 1', TARGETS, base_url=LONG_URL)
+    assert len(batches) > len(event_insight_lib.relation_scores_batches('Concept 1', TARGETS))
+    assert [target for batch in batches for target in batch] == TARGETS
+    for batch in batches:
+        assert len(event_insight_lib._relation_scores_url(LONG_URL, 'Concept 1', batch)) <= \
+            event_insight_lib.MAX_URL_LENGTH
+
+
+def _url_lengths(backend, base_url):
+    """
+    Moves the backend to `base_url`, and records the length of the URL of every relation_scores call made to it.
+    """
+    backend.base_url = base_url
+    lengths = []
+    respond = backend.respond
+
+    def recording(endpoint, *args):
+        if endpoint == 'relation_scores':
+            lengths.append(len(event_insight_lib._relation_scores_url(base_url, *args)))
+        return respond(endpoint, *args)
+
+    backend.respond = recording
+    return lengths
+
+
+def test_batches_follow_the_client_base_url(backend):
+    lengths = _url_lengths(backend, LONG_URL)
+    response = event_insight_lib.get_relation_scores('Concept 1', TARGETS)
+    assert response == backend.graph.get_relation_scores('Concept 1', TARGETS)
+    assert len(lengths) == len(event_insight_lib.relation_scores_batches('Concept 1', TARGETS, base_url=LONG_URL))
+    assert max(lengths) <= event_insight_lib.MAX_URL_LENGTH
+
+
+def test_explode_edges_follows_the_client_base_url(backend):
+    concepts = ['Concept {0}'.format(i) for i in range(60)]
+    expected = ConceptModel(concepts)
+    expected.explode_edges()
+    lengths = _url_lengths(backend, LONG_URL)
+    model = ConceptModel(concepts)
+    model.explode_edges(workers=4)
+    assert edge_set(model) == edge_set(expected)
+    assert max(lengths) <= event_insight_lib.MAX_URL_LENGTH
+    del lengths[:]
+    model = ConceptModel(concepts)
+    asyncio.run(model.aexplode_edges())
+    assert edge_set(model) == edge_set(expected)
+    assert max(lengths) <= event_insight_lib.MAX_URL_LENGTH
+
+
+def test_batched_scores_equal_a_single_call(backend):
+    response = event_insight_lib.get_relation_scores('Concept 1', TARGETS, workers=4)
+    assert response == backend.graph.get_relation_scores('Concept 1', TARGETS)
+    assert backend.calls == len(event_insight_lib.relation_scores_batches('Concept 1', TARGETS))
+
+
+def test_parallel_explode_edges_equals_sequential(backend):
+    concepts = ['Concept {0}'.format(i) for i in range(60)]
+    sequential = ConceptModel(concepts)
+    sequential.explode_edges()
+    parallel = ConceptModel(concepts)
+    progress = []
+    parallel.explode_edges(workers=8, progress=lambda completed, total: progress.append((completed, total)))
+    assert edge_set(parallel) == edge_set(sequential)
+    assert len(edge_set(sequential)) == len(concepts) * (len(concepts) - 1) // 2
+    assert progress[-1][0] == progress[-1][1] == len(progress)
+
+
+def test_prune_drops_weak_edges(backend):
+    model = ConceptModel(['Concept {0}'.format(i) for i in range(20)])
+    model.explode_edges(prune=True)
+    weights = [weight for weight, source, target in model.iter_edges()]
+    assert weights and all(weight > 0.5 for weight in weights)
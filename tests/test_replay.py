@@ -0,0 +1,87 @@
+"""test_replay.py
+    Recording live responses and replaying them offline."""
+
+import threading
+import pytest
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.replay import FixtureStore, RecordingBackend, ReplayBackend, SyntheticConceptGraph
+from tests.conftest import edge_set
+
+
+def _response(n):
+    return {'concepts': [{'concept': {'label': 'Concept {0}'.format(i)}, 'score': 1 - i / 100} for i in range(n)]}
+
+
+def test_larger_limit_answers_smaller_one():
+    fixtures = FixtureStore()
+    fixtures.put('related_concepts', ['Concept 1', 0, 10], _response(10))
+    fixtures.put('related_concepts', ['Concept 1', 0, 50], _response(50))
+    fixtures.put('related_concepts', ['Concept 1', 0, 20], _response(20))
+    assert fixtures.get('related_concepts', 'Concept 1', 0, 30) == _response(30)
+    assert fixtures.get('related_concepts', 'Concept 1', 0, 60) is None
+    assert fixtures.get('related_concepts', 'Concept 1', 1, 5) is None
+
+
+def test_fixtures_round_trip(tmpdir):
+    filename = str(tmpdir.join('fixtures.json'))
+    fixtures = FixtureStore(filename)
+    fixtures.put('related_concepts', ['Concept 1', 0, 50], _response(50))
+    fixtures.put('relation_scores', ['Concept 1', ['Concept 2']], {'scores': []})
+    fixtures.save()
+    loaded = FixtureStore(filename)
+    assert len(loaded) == 2
+    assert loaded.get('related_concepts', 'Concept 1', 0, 50) == _response(50)
+    assert loaded.get('related_concepts', 'Concept 1', 0, 5) == _response(5)
+
+
+def test_replay_of_a_recording_reproduces_the_model(backend, tmpdir):
+    filename = str(tmpdir.join('fixtures.json'))
+    recorder = RecordingBackend(filename, backend=backend)
+    event_insight_lib.set_backend(recorder)
+    recorded = ConceptModel(['Concept 1', 'Concept 2'])
+    recorded.explode(limit=10)
+    recorded.explode_edges()
+    recorder.save()
+
+    # Without a synthetic graph to fall back on, only recorded requests can be answered.
+    replay = ReplayBackend(filename)
+    event_insight_lib.set_backend(replay)
+    replayed = ConceptModel(['Concept 1', 'Concept 2'])
+    replayed.explode(limit=10)
+    replayed.explode_edges()
+    assert edge_set(replayed) == edge_set(recorded)
+    with pytest.raises(KeyError):
+        event_insight_lib.get_related_concepts('Concept 3')
+
+
+def test_call_count_is_thread_safe():
+    replay = ReplayBackend(graph=SyntheticConceptGraph(size=10))
+    threads = [threading.Thread(target=lambda: [replay.get_related_concepts('Concept 1') for _ in range(500)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert replay.calls == 4000
+
+
+@pytest.mark.parametrize('size', [30, 100000])
+def test_synthetic_smaller_limit_is_a_prefix(size):
+    graph = SyntheticConceptGraph(size=size)
+    largest = graph.get_related_concepts('Concept 1', 0, 50)['concepts']
+    assert len(largest) == min(50, size)
+    assert len({concept['concept']['label'] for concept in largest}) == len(largest)
+    scores = [concept['score'] for concept in largest]
+    assert scores == sorted(scores, reverse=True)
+    assert all(0.5 <= score <= 1.0 for score in scores)
+    for limit in (1, 10, 20, 49):
+        assert graph.get_related_concepts('Concept 1', 0, limit)['concepts'] == largest[:limit]
+    assert graph.get_related_concepts('Concept 1', 1, 10)['concepts'] != largest[:10]
+
+
+def test_synthetic_results_do_not_depend_on_fetch_order():
+    first, second = SyntheticConceptGraph(), SyntheticConceptGraph()
+    small_first = [first.get_related_concepts('Concept 1', 0, limit) for limit in (20, 50)]
+    large_first = [second.get_related_concepts('Concept 1', 0, limit) for limit in (50, 20)]
+    assert small_first == large_first[::-1]
@@ -0,0 +1,133 @@
+"""test_scheduling.py
+    Rate limiting, adaptive concurrency and retries of the `Scheduler`."""
+
+import asyncio
+import threading
+import time
+import pytest
+from watsongraph.scheduling import AdaptiveLimit, Scheduler, TokenBucket
+
+
+class _Overloaded(OSError):
+    pass
+
+
+def test_token_bucket_allows_a_burst_then_paces_calls():
+    bucket = TokenBucket(rate=10, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_adaptive_limit_increases_additively_and_decreases_multiplicatively():
+    limit = AdaptiveLimit(initial=4, maximum=64)
+    for _ in range(4):
+        limit.acquire()
+        limit.release(True)
+    assert 4.9 < limit.limit < 5
+    limit.acquire()
+    limit.release(False)
+    assert 2.4 < limit.limit < 2.5
+
+
+def test_concurrency_never_exceeds_the_cap():
+    scheduler = Scheduler(initial_concurrency=2, max_concurrency=2)
+    in_flight, peak, lock = [0], [0], threading.Lock()
+
+    def call():
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+
+    threads = [threading.Thread(target=scheduler.call, args=('related_concepts', call)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+
+def test_retryable_failures_are_retried():
+    scheduler = Scheduler(retries=3, backoff_factor=0)
+    attempts = []
+
+    def call():
+        attempts.append(None)
+        if len(attempts) < 3:
+            raise _Overloaded()
+        return 'ok'
+
+    assert scheduler.call('related_concepts', call) == 'ok'
+    assert len(attempts) == 3
+
+
+def test_other_failures_are_raised_at_once():
+    scheduler = Scheduler(retries=3, backoff_factor=0)
+    attempts = []
+
+    def call():
+        attempts.append(None)
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        scheduler.call('related_concepts', call)
+    assert len(attempts) == 1
+
+
+class _NotFound(Exception):
+    status = 404
+
+
+def test_non_retryable_failures_leave_the_limit_unchanged():
+    scheduler = Scheduler(retries=3, backoff_factor=0)
+
+    def call():
+        raise _NotFound()
+
+    for _ in range(5):
+        with pytest.raises(_NotFound):
+            scheduler.call('related_concepts', call)
+    assert scheduler.stats()['related_concepts'] == {'limit': 4.0, 'in_flight': 0}
+
+    async def acall():
+        raise _NotFound()
+
+    with pytest.raises(_NotFound):
+        asyncio.run(scheduler.acall('relation_scores', acall))
+    assert scheduler.stats()['relation_scores'] == {'limit': 4.0, 'in_flight': 0}
+
+
+def test_retryable_failures_lower_the_limit():
+    scheduler = Scheduler(retries=1, backoff_factor=0)
+
+    def call():
+        raise _Overloaded()
+
+    with pytest.raises(_Overloaded):
+        scheduler.call('related_concepts', call)
+    assert scheduler.stats()['related_concepts'] == {'limit': 1.0, 'in_flight': 0}
+
+
+def test_endpoints_have_separate_budgets():
+    scheduler = Scheduler(retries=0, budgets={'relation_scores': {'initial_concurrency': 1}})
+    scheduler.call('related_concepts', lambda: None)
+    scheduler.call('relation_scores', lambda: None)
+    stats = scheduler.stats()
+    assert stats['related_concepts']['limit'] > 4
+    assert stats['relation_scores']['limit'] == 2
+
+
+def test_acall_retries():
+    scheduler = Scheduler(retries=1, backoff_factor=0)
+    attempts = []
+
+    async def call():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise asyncio.TimeoutError()
+        return 'ok'
+
+    assert asyncio.run(scheduler.acall('related_concepts', call)) == 'ok'
+    assert len(attempts) == 2
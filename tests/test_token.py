@@ -0,0 +1,178 @@
+"""test_token.py
+    Access tokens are held in memory, regenerated once ahead of their expiry whatever the number of callers, warm
+    started from the token file, and replaced at most once when the service rejects them."""
+
+import json
+import threading
+import time
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+import watsongraph.event_insight_lib as event_insight_lib
+from watsongraph.event_insight_lib import TokenProvider, WatsonClient
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """
+    Stands in for the network call which mints tokens, handing out `token 1`, `token 2` and so on.
+
+    :return: The list of tokens generated so far.
+    """
+    tokens = []
+    lock = threading.Lock()
+
+    def generate_token(filename):
+        with lock:
+            tokens.append('token {0}'.format(len(tokens) + 1))
+            token = tokens[-1]
+        # Long enough for concurrent callers to pile up behind the one generating.
+        time.sleep(0.01)
+        return token
+
+    monkeypatch.setattr(event_insight_lib, '_generate_token', generate_token)
+    return tokens
+
+
+def test_token_is_held_in_memory(generated):
+    provider = TokenProvider(token_file=None)
+    assert provider.get_token() == 'token 1'
+    assert provider.get_token() == 'token 1'
+    assert generated == ['token 1']
+
+
+def test_refresh_margin(generated):
+    provider = TokenProvider(token_file=None, lifetime=3600, refresh_margin=300)
+    provider.get_token()
+    # Still valid, but within the margin of its expiry.
+    provider._expires = time.time() + 299
+    assert provider.get_token() == 'token 2'
+    provider._expires = time.time() + 301
+    assert provider.get_token() == 'token 2'
+
+
+def test_expiry_driven_refresh(generated):
+    provider = TokenProvider(token_file=None, lifetime=0.05, refresh_margin=0)
+    assert provider.get_token() == 'token 1'
+    assert provider.get_token() == 'token 1'
+    time.sleep(0.06)
+    assert provider.get_token() == 'token 2'
+
+
+def test_single_refresh_under_concurrent_callers(generated):
+    provider = TokenProvider(token_file=None)
+    barrier = threading.Barrier(16)
+    tokens = []
+
+    def get_token():
+        barrier.wait()
+        tokens.append(provider.get_token())
+
+    threads = [threading.Thread(target=get_token) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert generated == ['token 1']
+    assert tokens == ['token 1'] * 16
+
+
+def test_warm_start_from_token_file(generated, tmpdir):
+    token_file = str(tmpdir.join('token.json'))
+    TokenProvider(token_file=token_file).get_token()
+    with open(token_file) as f:
+        saved = json.load(f)
+    assert saved['token'] == 'token 1'
+    assert saved['expires'] > time.time() + 3000
+    assert TokenProvider(token_file=token_file).get_token() == 'token 1'
+    assert generated == ['token 1']
+
+
+@pytest.mark.parametrize('contents', ['"token 0"', '{"token": "token 0"}', '{"token": "token 0", "expires": 0}', '{'])
+def test_unusable_token_file_is_ignored(generated, tmpdir, contents):
+    token_file = tmpdir.join('token.json')
+    token_file.write(contents)
+    assert TokenProvider(token_file=str(token_file)).get_token() == 'token 1'
+
+
+def test_token_file_is_read_once(generated, tmpdir):
+    token_file = str(tmpdir.join('token.json'))
+    provider = TokenProvider(token_file=token_file)
+    provider.get_token()
+    with open(token_file, 'w') as f:
+        json.dump({'token': 'token 0', 'expires': time.time() + 3600}, f)
+    provider.invalidate()
+    assert provider.get_token() == 'token 2'
+
+
+class _StubAdapter(BaseAdapter):
+    """
+    Answers every request with a 401 if its token is in `rejected`, and with an empty JSON object otherwise.
+    """
+
+    def __init__(self, rejected=None):
+        super(_StubAdapter, self).__init__()
+        self.rejected = rejected
+        self.tokens = []
+
+    def send(self, request, **kwargs):
+        token = request.headers['X-Watson-Authorization-Token']
+        self.tokens.append(token)
+        response = requests.Response()
+        response.status_code = 401 if self.rejected is None or token in self.rejected else 200
+        response._content = b'{}'
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def _client(adapter):
+    client = WatsonClient(token_provider=TokenProvider(token_file=None), base_url='https://watson.test')
+    client.session.mount('https://', adapter)
+    return client
+
+
+def test_rejected_token_is_replaced_once(generated):
+    adapter = _StubAdapter(rejected={'token 1'})
+    client = _client(adapter)
+    assert client.get_related_concepts('Concept 1') == {}
+    assert adapter.tokens == ['token 1', 'token 2']
+    assert client.get_related_concepts('Concept 1') == {}
+    assert adapter.tokens == ['token 1', 'token 2', 'token 2']
+    assert generated == ['token 1', 'token 2']
+
+
+def test_persistently_rejected_token_is_not_regenerated(generated):
+    adapter = _StubAdapter()
+    client = _client(adapter)
+    with pytest.raises(requests.HTTPError):
+        client.get_related_concepts('Concept 1')
+    assert adapter.tokens == ['token 1', 'token 2']
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            client.get_related_concepts('Concept 1')
+    # The replacement was rejected too, so later requests fail without minting more tokens.
+    assert generated == ['token 1', 'token 2']
+    assert adapter.tokens == ['token 1', 'token 2', 'token 2', 'token 2', 'token 2']
+
+
+def test_concurrent_rejections_share_one_replacement(generated):
+    provider = TokenProvider(token_file=None)
+    rejected = provider.get_token()
+    barrier = threading.Barrier(8)
+    replacements = []
+
+    def reauthorize():
+        barrier.wait()
+        replacements.append(provider.reauthorize(rejected))
+
+    threads = [threading.Thread(target=reauthorize) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert generated == ['token 1', 'token 2']
+    assert replacements == ['token 2'] * 8
@@ -0,0 +1,189 @@
+"""test_userstore.py
+    Account stores save, replace, load and delete records one at a time, and `get_store()` carries the accounts of an
+    `accounts.json` over into a new `accounts.db`."""
+
+import json
+import threading
+import pytest
+from watsongraph.conceptmodel import ConceptModel
+from watsongraph.user import User, load_users, save_users
+from watsongraph.userstore import JSONUserStore, SQLiteUserStore, get_store, import_accounts_json
+
+
+def _record(user_id, concepts=('Concept 1',), password=''):
+    return {'id': user_id, 'password': password, 'exceptions': [], 'model': ConceptModel(list(concepts)).to_json()}
+
+
+@pytest.fixture(params=['sqlite', 'json'])
+def store(request, tmpdir):
+    if request.param == 'sqlite':
+        store = SQLiteUserStore(str(tmpdir.join('accounts.db')))
+    else:
+        store = JSONUserStore(str(tmpdir.join('accounts.json')))
+    yield store
+    store.close()
+
+
+def test_upsert(store):
+    store.save(_record('alice', password='a'))
+    store.save(_record('bob'))
+    store.save(_record('alice', ['Concept 2'], password='b'))
+    assert sorted(store.ids()) == ['alice', 'bob']
+    assert len(store) == 2
+    assert store.load('alice')['password'] == 'b'
+    assert store.load('alice')['model'] == _record('alice', ['Concept 2'])['model']
+
+
+def test_delete(store):
+    store.save_many([_record('alice'), _record('bob')])
+    assert store.delete('alice')
+    assert not store.delete('alice')
+    assert 'alice' not in store
+    assert 'bob' in store
+    assert store.load('alice') is None
+
+
+def test_load_many(store):
+    store.save_many([_record('user {0}'.format(i)) for i in range(10)])
+    records = store.load_many(['user 3', 'user 7', 'nobody'])
+    assert sorted(records) == ['user 3', 'user 7']
+    assert records['user 3']['id'] == 'user 3'
+
+
+def test_users_round_trip(store):
+    model = ConceptModel(['Concept 1', 'Concept 2'])
+    model.set_property('Concept 1', 'relevance', 0.5)
+    user = User(model=model, user_id='alice', exceptions=['Item 1'], password='secret')
+    save_users([user], store=store)
+    loaded, = load_users(['alice', 'nobody'], store=store)
+    assert loaded.password == 'secret'
+    assert loaded.exceptions == ['Item 1']
+    assert loaded.model.concepts() == model.concepts()
+    assert loaded.model.get_node('Concept 1').get_relevance() == 0.5
+
+
+def test_missing_user(store):
+    user = User(model=ConceptModel(), user_id='nobody')
+    with pytest.raises(IOError):
+        user.load_user(store=store)
+    if isinstance(store, SQLiteUserStore):
+        # A JSON store has no file to look the user up in yet.
+        with pytest.raises(IOError):
+            user.delete_user(store=store)
+
+
+def test_sqlite_reopen(tmpdir):
+    filename = str(tmpdir.join('accounts.db'))
+    store = SQLiteUserStore(filename)
+    store.save(_record('alice'))
+    store.close()
+    store = SQLiteUserStore(filename)
+    assert store.ids() == ['alice']
+    store.close()
+
+
+def test_import_accounts_json(tmpdir):
+    legacy = JSONUserStore(str(tmpdir.join('accounts.json')))
+    legacy.save_many([_record('alice'), _record('bob')])
+    store = SQLiteUserStore(str(tmpdir.join('imported.db')))
+    assert import_accounts_json(legacy.filename, store=store) == 2
+    assert sorted(store.ids()) == ['alice', 'bob']
+    assert store.load('bob') == legacy.load('bob')
+    store.close()
+
+
+def test_get_store_migrates_accounts_json(tmpdir):
+    with open(str(tmpdir.join('accounts.json')), 'w') as f:
+        json.dump({'accounts': [_record('alice', password='secret')]}, f)
+    filename = str(tmpdir.join('accounts.db'))
+    store = get_store(filename)
+    assert isinstance(store, SQLiteUserStore)
+    assert store.ids() == ['alice']
+    user = User(model=ConceptModel(), user_id='alice')
+    user.load_user(filename)
+    assert user.password == 'secret'
+    # The legacy file is left as it was.
+    assert JSONUserStore(str(tmpdir.join('accounts.json'))).ids() == ['alice']
+
+
+def _legacy(tmpdir, records):
+    filename = str(tmpdir.join('accounts.json'))
+    with open(filename, 'w') as f:
+        json.dump({'accounts': records}, f)
+    return filename
+
+
+def test_migration_runs_once(tmpdir):
+    legacy = _legacy(tmpdir, [_record('alice'), _record('bob')])
+    filename = str(tmpdir.join('accounts.db'))
+    store = SQLiteUserStore(filename)
+    assert store.import_legacy(legacy) == 2
+    store.delete('bob')
+    # As another process opening the same database later would.
+    other = SQLiteUserStore(filename)
+    assert other.import_legacy(legacy) == 0
+    assert other.ids() == ['alice']
+    other.close()
+    store.close()
+
+
+def test_migration_does_not_overwrite_newer_saves(tmpdir):
+    legacy = _legacy(tmpdir, [_record('alice', password='old')])
+    filename = str(tmpdir.join('accounts.db'))
+    first, second = SQLiteUserStore(filename), SQLiteUserStore(filename)
+    assert first.import_legacy(legacy) == 1
+    first.save(_record('alice', password='new'))
+    assert second.import_legacy(legacy) == 0
+    assert second.load('alice')['password'] == 'new'
+    first.close()
+    second.close()
+
+
+def test_concurrent_migrations_import_once(tmpdir):
+    legacy = _legacy(tmpdir, [_record('user {0}'.format(i)) for i in range(50)])
+    filename = str(tmpdir.join('accounts.db'))
+    stores = [SQLiteUserStore(filename) for _ in range(8)]
+    barrier = threading.Barrier(len(stores))
+    imported = []
+
+    def migrate(store):
+        barrier.wait()
+        imported.append(store.import_legacy(legacy))
+
+    threads = [threading.Thread(target=migrate, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(imported) == [0] * 7 + [50]
+    assert len(stores[0]) == 50
+    for store in stores:
+        store.close()
+
+
+def test_store_with_accounts_is_not_migrated(tmpdir):
+    legacy = _legacy(tmpdir, [_record('alice')])
+    store = SQLiteUserStore(str(tmpdir.join('accounts.db')))
+    store.save(_record('bob'))
+    assert store.import_legacy(legacy) == 0
+    assert store.ids() == ['bob']
+    # Nor is it later, once it happens to be empty.
+    store.delete('bob')
+    assert store.import_legacy(legacy) == 0
+    assert store.ids() == []
+    store.close()
+
+
+def test_migration_without_legacy_file(tmpdir):
+    store = SQLiteUserStore(str(tmpdir.join('accounts.db')))
+    assert store.import_legacy(str(tmpdir.join('accounts.json'))) == 0
+    # The store counts as migrated: a legacy file turning up later is not imported.
+    legacy = _legacy(tmpdir, [_record('alice')])
+    assert store.import_legacy(legacy) == 0
+    store.close()
+
+
+def test_get_store_by_extension(tmpdir):
+    assert isinstance(get_store(str(tmpdir.join('other.json'))), JSONUserStore)
+    filename = str(tmpdir.join('other.db'))
+    assert get_store(filename) is get_store(filename)
@@ -0,0 +1,25 @@
+"""test_views.py
+    `concept_set()` and `iter_edges()` are cheap views of the model, consistent with `concepts()` and `edges()`."""
+
+from watsongraph.conceptmodel import ConceptModel
+
+
+def test_concept_set_is_a_live_view(backend):
+    model = ConceptModel(['Concept 1'])
+    view = model.concept_set()
+    model.augment('Concept 1', limit=10)
+    assert len(view) == 11
+    assert sorted(view) == model.concepts()
+    model.remove('Concept 1')
+    assert 'Concept 1' not in view
+    assert view & {'Concept 1', 'Concept 2'} == set(model.concepts()) & {'Concept 2'}
+
+
+def test_iter_edges_matches_edges(backend):
+    model = ConceptModel(['Concept 1', 'Concept 2'])
+    model.explode(limit=10)
+    edges = model.edges()
+    assert sorted(("{0:.3f}".format(weight), concept, other_concept)
+                  for weight, concept, other_concept in model.iter_edges()) == sorted(edges)
+    assert len(edges) == model.graph.number_of_edges()
+    assert all(isinstance(weight, float) for weight, concept, other_concept in model.iter_edges())
@@ -0,0 +1,457 @@
+"""binary.py
+    A compact, versioned binary file format for concept models, with memory-mapped, lazily decoded reads.
+    JSON costs a parse of every node, edge and property before a model can be used, which dominates the startup of
+    workers loading many models. In this format a model is a handful of flat arrays which are read straight out of
+    the file: `ConceptModel.save_binary()` and `CompactConceptModel.save_binary()` write it, their `load_binary()`
+    methods read it back, and `MappedConceptModel` answers queries from a memory-mapped file without building a graph
+    or any `Node` it is not asked for.
+
+    Layout, with every integer little-endian and every section padded to a multiple of 8 bytes:
+      header     `WGCM`, format version, size of an edge weight, number of concepts n, number of CSR entries m,
+                 number of property columns
+      strings    uint64 offsets[n + 1] into a blob of the UTF-8 encoded concept labels, which are sorted
+      adjacency  uint64 indptr[n + 1], uint32 indices[m] and float32 or float64 weights[m], in CSR (compressed sparse
+                 row) form: the neighbors of concept i are `indices[indptr[i]:indptr[i + 1]]`, sorted, and every edge
+                 is stored once in each direction
+      columns    per property: its name and type, uint8 present[n], then int64 values[n], float64 values[n], or
+                 uint64 offsets[n + 1] into a blob of JSON-encoded values
+      metadata   uint64 length, then a JSON object of model-level records, e.g. which concepts have been augmented"""
+
+import array
+import collections.abc
+import heapq
+import json
+import mmap
+import struct
+import sys
+from watsongraph.node import Node
+
+"""
+The first bytes of every file in the format.
+"""
+MAGIC = b'WGCM'
+
+"""
+The version of the format written by this module. Files of later versions are refused.
+"""
+VERSION = 1
+
+_HEADER = struct.Struct('<4sHHQQI4x')
+_COLUMN_HEADER = struct.Struct('<IB3x')
+_LENGTH = struct.Struct('<Q')
+
+"""
+The types of property column: whole numbers, floating-point numbers, and anything else that JSON can hold.
+"""
+INT_COLUMN = ord('q')
+FLOAT_COLUMN = ord('d')
+JSON_COLUMN = ord('j')
+
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+_NUMPY_TYPES = {'B': '<u1', 'I': '<u4', 'Q': '<u8', 'q': '<i8', 'f': '<f4', 'd': '<f8'}
+
+
+def _padding(size):
+    return -size % 8
+
+
+def _pack(typecode, values):
+    """
+    :return: The bytes of the given values as a little-endian array of the given `array` typecode. NumPy arrays are
+     converted without going through Python objects.
+    """
+    if hasattr(values, 'dtype'):
+        return values.astype(_NUMPY_TYPES[typecode]).tobytes()
+    packed = array.array(typecode, values)
+    if not _LITTLE_ENDIAN:
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _take(view, offset, typecode, count):
+    """
+    :return: A `(values, offset)` tuple: an indexable view of the `count` values of the given `array` typecode
+     starting at `offset`, and the offset of the section after them. The values are not copied, except on big-endian
+     machines.
+    """
+    size = array.array(typecode).itemsize * count
+    chunk = view[offset:offset + size]
+    if _LITTLE_ENDIAN:
+        values = chunk.cast(typecode)
+    else:
+        values = array.array(typecode)
+        values.frombytes(chunk)
+        values.byteswap()
+    return values, offset + size + _padding(size)
+
+
+def _column_type(values, present):
+    """
+    :return: The type of column best suited to holding the present values, so that they come back out with the type
+     they went in with.
+    """
+    if hasattr(values, 'dtype') and values.dtype.kind in 'iuf':
+        return FLOAT_COLUMN if values.dtype.kind == 'f' else INT_COLUMN
+    types = {type(value) for value, has in zip(values, present) if has}
+    if types == {int} and all(-2 ** 63 <= value < 2 ** 63 for value, has in zip(values, present) if has):
+        return INT_COLUMN
+    elif types == {float} or not types:
+        return FLOAT_COLUMN
+    return JSON_COLUMN
+
+
+def dump(fp, labels, indptr, indices, weights, columns, metadata=None, weight_size=8):
+    """
+    Writes a model to a file in the binary format. This is the low-level writer underlying the `save_binary()`
+    methods of the models.
+
+    :param fp: A file object open for writing in binary mode.
+
+    :param labels: The sorted list of the concept labels of the model. Concepts are identified by their position in
+     it.
+
+    :param indptr: The CSR row pointers: a sequence of `len(labels) + 1` integers.
+
+    :param indices: The CSR neighbor ids.
+
+    :param weights: The CSR edge weights.
+
+    :param columns: A `property -> (present, values)` dictionary of the node properties, each given as two sequences
+     with one entry per concept: whether the concept has the property set, and its value (anything, where it is not).
+
+    :param metadata: A JSON-serializable dictionary of model-level records.
+
+    :param weight_size: 4 to store weights as float32, 8 to store them as float64.
+    """
+
+    def write(data):
+        fp.write(data)
+        fp.write(b'\0' * _padding(len(data)))
+
+    encoded = [label.encode('utf-8') for label in labels]
+    string_offsets = [0]
+    for label in encoded:
+        string_offsets.append(string_offsets[-1] + len(label))
+    n = len(labels)
+    fp.write(_HEADER.pack(MAGIC, VERSION, weight_size, n, len(indices), len(columns)))
+    write(_pack('Q', string_offsets))
+    write(b''.join(encoded))
+    write(_pack('Q', indptr))
+    write(_pack('I', indices))
+    write(_pack('f' if weight_size == 4 else 'd', weights))
+    for prop, (present, values) in columns.items():
+        column_type = _column_type(values, present)
+        name = prop.encode('utf-8')
+        fp.write(_COLUMN_HEADER.pack(len(name), column_type))
+        write(name)
+        write(_pack('B', present))
+        if column_type == JSON_COLUMN:
+            encoded_values = [json.dumps(value).encode('utf-8') if has else b''
+                              for value, has in zip(values, present)]
+            value_offsets = [0]
+            for value in encoded_values:
+                value_offsets.append(value_offsets[-1] + len(value))
+            write(_pack('Q', value_offsets))
+            write(b''.join(encoded_values))
+        elif hasattr(values, 'dtype'):
+            write(_pack(chr(column_type), values))
+        else:
+            cast = int if column_type == INT_COLUMN else float
+            write(_pack(chr(column_type), [cast(value) if has else 0 for value, has in zip(values, present)]))
+    encoded_metadata = json.dumps(metadata).encode('utf-8') if metadata else b''
+    fp.write(_LENGTH.pack(len(encoded_metadata)))
+    write(encoded_metadata)
+
+
+class BinaryModel:
+    """
+    The sections of a model file in the binary format, read in place out of a buffer (`bytes`, or a `mmap`). Nothing
+    is decoded until it is asked for, so that opening a file takes time proportional to its number of property
+    columns, not to its size.
+    """
+
+    def __init__(self, buffer):
+        """
+        :param buffer: An object supporting the buffer protocol holding the file's contents.
+        """
+        view = memoryview(buffer)
+        if len(view) < _HEADER.size or bytes(view[:len(MAGIC)]) != MAGIC:
+            raise IOError('Not a watsongraph binary model file.')
+        magic, version, weight_size, n, m, column_count = _HEADER.unpack_from(view, 0)
+        if version > VERSION:
+            raise IOError('The binary model file is of format version ' + str(version) + ', which is newer than '
+                          'the supported version ' + str(VERSION) + '.')
+        self.n = n
+        self.weight_size = weight_size
+        self.string_offsets, offset = _take(view, _HEADER.size, 'Q', n + 1)
+        blob_size = self.string_offsets[n]
+        self.strings = view[offset:offset + blob_size]
+        offset += blob_size + _padding(blob_size)
+        self.indptr, offset = _take(view, offset, 'Q', n + 1)
+        self.indices, offset = _take(view, offset, 'I', m)
+        self.weights, offset = _take(view, offset, 'f' if weight_size == 4 else 'd', m)
+        self.columns = dict()
+        for _ in range(column_count):
+            name_size, column_type = _COLUMN_HEADER.unpack_from(view, offset)
+            offset += _COLUMN_HEADER.size
+            name = bytes(view[offset:offset + name_size]).decode('utf-8')
+            offset += name_size + _padding(name_size)
+            present, offset = _take(view, offset, 'B', n)
+            if column_type == JSON_COLUMN:
+                value_offsets, offset = _take(view, offset, 'Q', n + 1)
+                blob_size = value_offsets[n]
+                values = (value_offsets, view[offset:offset + blob_size])
+                offset += blob_size + _padding(blob_size)
+            else:
+                values, offset = _take(view, offset, chr(column_type), n)
+            self.columns[name] = (column_type, present, values)
+        metadata_size = _LENGTH.unpack_from(view, offset)[0]
+        offset += _LENGTH.size
+        self.metadata = json.loads(bytes(view[offset:offset + metadata_size]).decode('utf-8')) \
+            if metadata_size else dict()
+
+    def label(self, i):
+        """
+        :return: The concept label of the given concept id.
+        """
+        return str(self.strings[self.string_offsets[i]:self.string_offsets[i + 1]], 'utf-8')
+
+    def labels(self):
+        return [self.label(i) for i in range(self.n)]
+
+    def find(self, concept):
+        """
+        :return: The id of the given concept, found by binary search of the sorted string table, or `None`.
+        """
+        lo, hi = 0, self.n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.label(mid) < concept:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.n and self.label(lo) == concept else None
+
+    def row(self, i):
+        """
+        :return: A generator of the `(neighbor id, weight)` pairs of the given concept id.
+        """
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return zip(self.indices[start:end], self.weights[start:end])
+
+    def has(self, prop, i):
+        column = self.columns.get(prop)
+        return column is not None and bool(column[1][i])
+
+    def get(self, prop, i):
+        """
+        :return: The value of the given property of the given concept id. Raises a `KeyError` if it is not set.
+        """
+        if not self.has(prop, i):
+            raise KeyError(prop)
+        column_type, present, values = self.columns[prop]
+        if column_type == JSON_COLUMN:
+            value_offsets, blob = values
+            return json.loads(str(blob[value_offsets[i]:value_offsets[i + 1]], 'utf-8'))
+        return values[i]
+
+    def present_ids(self, prop):
+        column = self.columns.get(prop)
+        if column is None:
+            return []
+        present = column[1]
+        return [i for i in range(self.n) if present[i]]
+
+    def properties(self, i):
+        """
+        :return: A `property -> value` dictionary of the properties set on the given concept id.
+        """
+        return {prop: self.get(prop, i) for prop in self.columns if self.has(prop, i)}
+
+
+class _ConceptSet(collections.abc.Set):
+    """
+    A set-like view of the concepts of a `MappedConceptModel`, whose membership tests are binary searches of the
+    file's string table.
+    """
+
+    def __init__(self, model):
+        self._model = model
+
+    def __contains__(self, concept):
+        return concept in self._model
+
+    def __iter__(self):
+        return iter(self._model.concepts())
+
+    def __len__(self):
+        return len(self._model)
+
+
+class MappedConceptModel:
+    """
+    A read-only `ConceptModel` answering queries straight out of a memory-mapped file in the binary format. Opening
+    one reads nothing but the file's header, so a worker can open many large models cheaply and only ever pages in
+    the parts of them it queries. Concepts are found by binary search, and `Node` objects are only built when asked
+    for by `get_node()`.
+
+    Load the file with `ConceptModel.load_binary()` instead to get a model that can be modified.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: The file to open, as written by `save_binary()`.
+        """
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._model = BinaryModel(self._mmap)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def close(self):
+        """
+        Unmaps the file. The model cannot be used afterwards.
+        """
+        if self._model is not None:
+            self._model = None
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __contains__(self, concept):
+        """
+        :return: Whether or not the given concept is in the `MappedConceptModel`.
+        """
+        return self._model.find(concept) is not None
+
+    def __len__(self):
+        return self._model.n
+
+    def _id(self, concept):
+        i = self._model.find(concept)
+        if i is None:
+            raise RuntimeError('Concept ' + concept + ' not found in ' + str(self))
+        return i
+
+    @property
+    def metadata(self):
+        """
+        The model-level records stored alongside the model, e.g. which of its concepts have been augmented.
+        """
+        return self._model.metadata
+
+    ###################################
+    # Setters, getters, and printers. #
+    ###################################
+
+    def concepts(self):
+        """
+        :return: Returns a sorted list of all concepts in the `MappedConceptModel`.
+        """
+        return self._model.labels()
+
+    def concept_set(self):
+        """
+        :return: A set-like view of the concepts in the `MappedConceptModel`. See `ConceptModel.concept_set()`.
+        """
+        return _ConceptSet(self)
+
+    def edges(self):
+        """
+        :return: Returns a list of all `(concept, other concept, strength)` tuples in the `MappedConceptModel`.
+        """
+        return sorted([("{0:.3f}".format(weight), concept, other_concept)
+                       for weight, concept, other_concept in self.iter_edges()], reverse=True)
+
+    def iter_edges(self):
+        """
+        :return: A generator of `(strength, concept, other concept)` tuples, one per edge, in no particular order,
+         with the strength left as a number.
+        """
+        model = self._model
+        for i in range(model.n):
+            for j, weight in model.row(i):
+                if i <= j:
+                    yield weight, model.label(i), model.label(j)
+
+    def get_node(self, concept):
+        """
+        :return: A new `Node` of the given concept, holding a copy of its properties. Throws an error if it is not in
+         the model.
+        """
+        i = self._id(concept)
+        properties = self._model.properties(i)
+        node = Node(self._model.label(i))
+        if properties:
+            node.properties = properties
+        return node
+
+    def neighborhood(self, concept):
+        """
+        :param concept: The concept that is the focus of this operation.
+        :return: Returns the "neighborhood" of a concept: a list of `(correlation, concept)` tuples pointing to/from
+         it. See `ConceptModel.neighborhood()`.
+        """
+        return sorted([(weight, self._model.label(j)) for j, weight in self._model.row(self._id(concept))],
+                      reverse=True)
+
+    ######################
+    # Parameter methods. #
+    ######################
+
+    def concepts_by_property(self, prop):
+        """
+        :param prop: The `property` to sort the returned output by.
+        :return: Returns a list of `(prop, concept)` tuples sorted by prop. Note that this method will fail if this
+         property is not initialized for all concepts.
+        """
+        return sorted([(self._model.get(prop, i), self._model.label(i)) for i in range(self._model.n)], reverse=True)
+
+    def concepts_by_view_count(self):
+        """
+        Wrapper for `concepts_by_property()` for the `view_count` case.
+
+        :return: Returns a list of `(view_count, concept)` tuples sorted by `view_count`.
+        """
+        return self.concepts_by_property('view_count')
+
+    def get_view_count(self, concept):
+        """
+        Returns the `view_count` of a concept in the `MappedConceptModel`.
+
+        :param concept: The concept supposedly in the `MappedConceptModel`.
+        :return: The `view_count` int parameter of the concept, if it is found. Throws an error if it is not.
+        """
+        return self._model.get('view_count', self._id(concept))
+
+    def get_properties(self, prop, concepts=None):
+        """
+        Bulk getter for a single property.
+
+        :param prop: The property being retrieved.
+        :param concepts: The concepts to retrieve it for. Defaults to every concept in the model.
+        :return: A `concept -> value` dictionary, covering those of the concepts which have the property set.
+        """
+        model = self._model
+        ids = model.present_ids(prop) if concepts is None else [self._id(concept) for concept in concepts]
+        return {model.label(i): model.get(prop, i) for i in ids if model.has(prop, i)}
+
+    def top_k(self, prop, k):
+        """
+        Finds the `k` concepts with the highest values of a property. See `ConceptModel.top_k()`.
+
+        :param prop: The property to rank concepts by.
+        :param k: The number of concepts returned.
+        :return: A list of up to `k` `(value, concept)` tuples, highest first.
+        """
+        model = self._model
+        # Concept ids are in label order, so ties are broken the same way as by the labels themselves.
+        top = heapq.nlargest(k, ((model.get(prop, i), i) for i in model.present_ids(prop)))
+        return [(value, model.label(i)) for value, i in top]
@@ -0,0 +1,324 @@
+"""cache.py
+    Caches for the results of IBM Watson Concept Insights API calls.
+    The `wikipedia/en-20120601` concept graph queried by this library is a frozen snapshot, so the answer to a given
+    question never changes and can be kept for as long as is convenient. The caches in this module are built out of
+    interchangeable storage tiers (an in-memory LRU tier and an on-disk SQLite tier) which map string keys to string
+    values; the API-specific caches on top of them decide what the keys are and serialize responses to JSON."""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+class CacheStats:
+    """
+    Thread-safe hit and miss counters.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def hit_rate(self):
+        """
+        :return: The fraction of lookups which were served from the cache, or 0 if there have been none.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def __repr__(self):
+        return 'CacheStats(hits={0}, misses={1})'.format(self.hits, self.misses)
+
+
+class MemoryCache:
+    """
+    In-memory cache tier which evicts the least recently used entry once it holds `max_entries` entries.
+    """
+
+    def __init__(self, max_entries=4096, ttl=None):
+        """
+        :param max_entries: The maximum number of entries held.
+
+        :param ttl: The number of seconds an entry stays valid for. `None`, the default, means forever.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :return: The value stored under `key`, or `None` if there is no valid one.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Stores `value` under `key`, evicting the least recently used entry if the cache is full.
+        """
+        expires = time.time() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    On-disk cache tier backed by a SQLite database, which can be shared between processes and survives restarts.
+    Once the table holds more than `max_entries` rows the least recently used tenth of them is evicted.
+
+    Recency is tracked to within `touch_interval` seconds: a hit only records its access time, which takes the
+    database's write lock, if the one recorded is older than that, so that reads of hot entries stay reads.
+    """
+
+    def __init__(self, filename='watsongraph_cache.db', table='cache', max_entries=1000000, ttl=None,
+                 touch_interval=60):
+        """
+        :param filename: The database file. Created if it does not exist.
+
+        :param table: The table the entries are kept in, so that several caches can share one database file.
+
+        :param max_entries: The maximum number of entries held.
+
+        :param ttl: The number of seconds an entry stays valid for. `None`, the default, means forever.
+
+        :param touch_interval: The granularity, in seconds, of the access times eviction goes by. Pass `0` to record
+         every hit.
+        """
+        self.filename = filename
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filename, timeout=30, check_same_thread=False, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS "{0}" (key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                                 'expires REAL, accessed REAL NOT NULL)'.format(table))
+        self._connection.execute('CREATE INDEX IF NOT EXISTS "{0}_accessed" ON "{0}" (accessed)'.format(table))
+
+    def get(self, key):
+        """
+        :return: The value stored under `key`, or `None` if there is no valid one.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute('SELECT value, expires, accessed FROM "{0}" WHERE key = ?'.format(
+                self.table), (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires, accessed = row
+            if expires is not None and expires < now:
+                self._connection.execute('DELETE FROM "{0}" WHERE key = ?'.format(self.table), (key,))
+                return None
+            if now - accessed >= self.touch_interval:
+                self._connection.execute('UPDATE "{0}" SET accessed = ? WHERE key = ?'.format(self.table),
+                                         (now, key))
+            return value
+
+    def set(self, key, value):
+        """
+        Stores `value` under `key`, evicting the least recently used entries if the cache is full.
+        """
+        now = time.time()
+        expires = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._connection.execute('INSERT OR REPLACE INTO "{0}" (key, value, expires, accessed) '
+                                     'VALUES (?, ?, ?, ?)'.format(self.table), (key, value, expires, now))
+            size = self._connection.execute('SELECT COUNT(*) FROM "{0}"'.format(self.table)).fetchone()[0]
+            if size > self.max_entries:
+                # Evict in bulk so that a full cache does not pay for an eviction on every single insert.
+                excess = size - self.max_entries + max(1, self.max_entries // 10)
+                self._connection.execute('DELETE FROM "{0}" WHERE key IN (SELECT key FROM "{0}" ORDER BY accessed '
+                                         'LIMIT ?)'.format(self.table), (excess,))
+
+    def delete(self, key):
+        with self._lock:
+            self._connection.execute('DELETE FROM "{0}" WHERE key = ?'.format(self.table), (key,))
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM "{0}"'.format(self.table))
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM "{0}"'.format(self.table)).fetchone()[0]
+
+
+class TieredCache:
+    """
+    Chains several cache tiers, fastest first. Lookups try each tier in turn and copy a value found in a slower tier
+    into the faster ones; stores write through to every tier.
+    """
+
+    def __init__(self, *tiers):
+        """
+        :param tiers: The cache tiers, e.g. `TieredCache(MemoryCache(), SQLiteCache())`.
+        """
+        self.tiers = list(tiers)
+
+    def get(self, key):
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for faster_tier in self.tiers[:i]:
+                    faster_tier.set(key, value)
+                return value
+        return None
+
+    def set(self, key, value):
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def delete(self, key):
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+
+class RelatedConceptsCache:
+    """
+    Cache for the results of `event_insight_lib.get_related_concepts()`, keyed on `(label, level)`.
+
+    Related concepts come back ordered by score, so the answer to a query with a given `limit` is a prefix of the
+    answer to the same query with a larger one. Each `(label, level)` pair therefore keeps only its largest response,
+    which also serves every smaller `limit`: a `limit=50` lookup answers a later `limit=20` request for free.
+    """
+
+    def __init__(self, store=None):
+        """
+        :param store: The cache tier (or `TieredCache`) responses are kept in. Defaults to a `MemoryCache`. Pass e.g.
+         `TieredCache(MemoryCache(), SQLiteCache())` to persist responses across processes.
+        """
+        self.store = store if store is not None else MemoryCache()
+        self.stats = CacheStats()
+
+    @staticmethod
+    def _key(label, level):
+        return json.dumps(['related_concepts', label, level])
+
+    def get(self, label, level, limit):
+        """
+        :return: The cached `get_related_concepts(label, level, limit)` response, or `None` on a miss.
+        """
+        raw = self.store.get(self._key(label, level))
+        if raw is not None:
+            entry = json.loads(raw)
+            concepts = entry['response']['concepts']
+            # A response shorter than the limit it was fetched with is the complete list, good for any limit.
+            if entry['limit'] >= limit or len(concepts) < entry['limit']:
+                self.stats.hit()
+                response = entry['response']
+                response['concepts'] = concepts[:limit]
+                return response
+        self.stats.miss()
+        return None
+
+    def set(self, label, level, limit, response):
+        """
+        Stores a `get_related_concepts(label, level, limit)` response, unless a response for a larger `limit` is
+        already held.
+        """
+        key = self._key(label, level)
+        raw = self.store.get(key)
+        if raw is not None and json.loads(raw)['limit'] >= limit:
+            return
+        self.store.set(key, json.dumps({'limit': limit, 'response': response}))
+
+    def clear(self):
+        self.store.clear()
+        self.stats.reset()
+
+
+class AnnotationCache:
+    """
+    Cache for the results of `event_insight_lib.annotate_text()`, keyed on a hash of the normalized text and its
+    content type, so that memory use does not grow with the length of the texts being annotated.
+
+    Texts are normalized to Unicode NFC form with runs of whitespace collapsed and the ends stripped before hashing,
+    so re-ingesting a description that differs only in its formatting is still a hit. Note that the character offsets
+    within a cached response refer to the text it was first fetched for.
+    """
+
+    def __init__(self, store=None):
+        """
+        :param store: The cache tier (or `TieredCache`) responses are kept in. Defaults to a `MemoryCache`. Pass e.g.
+         `TieredCache(MemoryCache(), SQLiteCache(table='annotations'))` to persist responses across processes.
+        """
+        self.store = store if store is not None else MemoryCache(max_entries=1024)
+        self.stats = CacheStats()
+
+    @staticmethod
+    def _key(text, content_type):
+        normalized = re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text)).strip()
+        digest = hashlib.sha256((content_type + '\n' + normalized).encode('utf-8', errors='ignore')).hexdigest()
+        return 'annotate_text:' + digest
+
+    def get(self, text, content_type='text/plain'):
+        """
+        :return: The cached `annotate_text(text, content_type)` response, or `None` on a miss.
+        """
+        raw = self.store.get(self._key(text, content_type))
+        if raw is None:
+            self.stats.miss()
+            return None
+        self.stats.hit()
+        return json.loads(raw)
+
+    def set(self, text, content_type, response):
+        """
+        Stores an `annotate_text(text, content_type)` response.
+        """
+        self.store.set(self._key(text, content_type), json.dumps(response))
+
+    def clear(self):
+        self.store.clear()
+        self.stats.reset()
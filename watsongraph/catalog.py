@@ -0,0 +1,353 @@
+"""catalog.py
+    An on-disk catalog of `Item` objects which is opened once and read lazily.
+    `Item.save()` and `Item.load()` parse and rewrite the whole of `items.json` for every single item. An `ItemCatalog`
+    instead keeps items in an append-only JSON Lines log, one item per line, alongside a `name -> (offset, length)`
+    index of the latest line of each item. Saving an item appends a line, loading one reads its line back, and an
+    item's `ConceptModel` is only decoded when the item is first asked for, with a bound on how many decoded items
+    are kept in memory at once. `compact()` drops the lines that later ones have superseded. The index is saved next
+    to the log, so that reopening a catalog only scans whatever was appended since, together with the log's inode and
+    a digest of the bytes it ends on, so that an index which describes another log than the one on disk is rebuilt
+    rather than trusted."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from watsongraph.item import Item
+
+_NAME_PREFIX = '{"name": '
+_TOMBSTONE_SUFFIX = ', "deleted": true}'
+# The number of bytes before the indexed size which the saved index records a digest of.
+_TAIL_LENGTH = 4096
+
+
+def _encode(item):
+    """
+    :return: The log line of an item, its name first so that the index can be built without decoding its model.
+    """
+    data = item.to_json()
+    record = OrderedDict([('name', data.pop('name'))])
+    record.update(data)
+    return (json.dumps(record) + '\n').encode('utf-8')
+
+
+def _tombstone(name):
+    return (json.dumps(OrderedDict([('name', name), ('deleted', True)])) + '\n').encode('utf-8')
+
+
+def _copy(item):
+    """
+    :return: A copy of an item with a model of its own, so that changes made to an item handed to or by the catalog
+     do not show up in the items it keeps in memory.
+    """
+    ret = Item(item.name)
+    ret.description = item.description
+    ret.model = item.model.copy()
+    return ret
+
+
+class ItemCatalog:
+    """
+    A catalog of `Item` objects stored in an append-only JSON Lines file, with an index from item names to their
+    latest line and a least-recently-used cache of decoded items.
+
+    Appends from several processes are safe, since every batch is written in a single append, and each catalog picks
+    up the others' appends on `refresh()`, which a lookup of an unknown name also triggers. `compact()` should only be
+    run while no other process is writing.
+    """
+
+    def __init__(self, filename='items.jsonl', max_resident=1024):
+        """
+        :param filename: The log file. Created if it does not exist. Its index is kept in `filename + '.idx'`.
+
+        :param max_resident: The maximum number of decoded items kept in memory.
+        """
+        self.filename = filename
+        self.index_filename = filename + '.idx'
+        self.max_resident = max_resident
+        self._lock = threading.RLock()
+        self._decoder = json.JSONDecoder()
+        self._resident = OrderedDict()
+        self._index = dict()
+        self._size = 0
+        self._file = None
+        self._open()
+
+    def _open(self):
+        """
+        Opens the log, and builds the index out of the saved one and whatever has been appended since.
+        """
+        self._file = open(self.filename, 'a+b')
+        self._index = dict()
+        self._size = 0
+        self._resident.clear()
+        try:
+            with open(self.index_filename) as f:
+                saved = json.load(f)
+            if self._describes(saved):
+                self._index = {name: (offset, length) for name, offset, length in saved['entries']}
+                self._size = saved['size']
+        except (IOError, ValueError, KeyError, TypeError):
+            # Missing or unreadable: rebuild it from scratch.
+            pass
+        self._scan()
+
+    def _tail(self, size):
+        """
+        :return: A digest of the bytes of the log just before `size`.
+        """
+        start = max(0, size - _TAIL_LENGTH)
+        self._file.seek(start)
+        return hashlib.sha1(self._file.read(size - start)).hexdigest()
+
+    def _describes(self, saved):
+        """
+        :return: Whether a saved index describes the open log: the same file, which still holds the same bytes up to
+         the indexed size, and in which every entry lies. An index saved by a catalog which had the log open while
+         another one compacted it describes the old log, and does not.
+        """
+        stat = os.fstat(self._file.fileno())
+        size = saved['size']
+        if saved['inode'] != stat.st_ino or size > stat.st_size or saved['tail'] != self._tail(size):
+            return False
+        return all(0 <= offset and offset + length <= size for name, offset, length in saved['entries'])
+
+    def _name(self, line):
+        """
+        :return: A `(name, deleted)` tuple read off the start of a log line.
+        """
+        text = line.decode('utf-8')
+        if text.startswith(_NAME_PREFIX):
+            name, end = self._decoder.raw_decode(text, len(_NAME_PREFIX))
+            return name, text[end:].rstrip('\n') == _TOMBSTONE_SUFFIX
+        record = json.loads(text)
+        return record['name'], record.get('deleted', False)
+
+    def _scan(self):
+        """
+        Indexes the lines appended to the log since it was last scanned. A last line which is still being written is
+        left for the next scan.
+        """
+        self._file.seek(self._size)
+        offset = self._size
+        for line in self._file:
+            if not line.endswith(b'\n'):
+                break
+            name, deleted = self._name(line)
+            if deleted:
+                self._index.pop(name, None)
+            else:
+                self._index[name] = (offset, len(line))
+            self._resident.pop(name, None)
+            offset += len(line)
+        self._size = offset
+
+    def refresh(self):
+        """
+        Picks up the items other processes have appended since the catalog was opened or last refreshed, reopening
+        the catalog if its log has been replaced by a `compact()`.
+        """
+        with self._lock:
+            try:
+                replaced = os.stat(self.filename).st_ino != os.fstat(self._file.fileno()).st_ino
+            except OSError:
+                replaced = True
+            if replaced:
+                self._file.close()
+                self._open()
+            else:
+                self._scan()
+
+    def _read(self, name):
+        offset, length = self._index[name]
+        self._file.seek(offset)
+        return json.loads(self._file.read(length).decode('utf-8'))
+
+    def _cache(self, item):
+        self._resident[item.name] = item
+        self._resident.move_to_end(item.name)
+        while len(self._resident) > self.max_resident:
+            self._resident.popitem(last=False)
+
+    def get(self, name, default=None):
+        """
+        :return: The item of the given name, its model decoded from the log if it is not resident already, or
+         `default` if there is no such item. The item is a copy of its own, which may be changed freely; save it
+         back with `put()`.
+        """
+        with self._lock:
+            item = self._resident.get(name)
+            if item is not None:
+                self._resident.move_to_end(name)
+                return _copy(item)
+            if name not in self._index:
+                self.refresh()
+                if name not in self._index:
+                    return default
+            item = Item(name)
+            item.load_from_json(self._read(name))
+            self._cache(_copy(item))
+            return item
+
+    def __getitem__(self, name):
+        item = self.get(name)
+        if item is None:
+            raise KeyError(name)
+        return item
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        """
+        :return: A generator of every item in the catalog, each decoded as it is reached.
+        """
+        for name in self.names():
+            item = self.get(name)
+            if item is not None:
+                yield item
+
+    def names(self):
+        """
+        :return: A list of the names of the items in the catalog, in the order their latest versions were saved in.
+        """
+        with self._lock:
+            return sorted(self._index, key=lambda name: self._index[name][0])
+
+    def _append(self, lines):
+        """
+        Appends lines to the log in a single write, and indexes them.
+        """
+        with self._lock:
+            # Index whatever other processes have appended first, so that offsets stay right.
+            self._scan()
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(b''.join(lines))
+            self._file.flush()
+            self._scan()
+
+    def put(self, item):
+        """
+        Saves an item to the catalog, superseding any item of the same name.
+
+        :param item: The `Item` being saved.
+        """
+        self.put_many([item])
+
+    def put_many(self, items):
+        """
+        Saves many items to the catalog at once, in a single append. Items already in the catalog and not among
+        `items` are left untouched. The catalog keeps copies of the items, so that later changes to them are not saved
+        until they are put again.
+
+        :param items: The `Item` objects being saved.
+        """
+        items = list(items)
+        self._append([_encode(item) for item in items])
+        with self._lock:
+            for item in items:
+                self._cache(_copy(item))
+
+    def remove(self, name):
+        """
+        Removes an item from the catalog.
+
+        :param name: The name of the item being removed.
+        """
+        with self._lock:
+            if name not in self._index:
+                raise KeyError(name)
+            self._append([_tombstone(name)])
+
+    def garbage(self):
+        """
+        :return: The fraction of the log taken up by superseded lines and tombstones, which `compact()` would drop.
+        """
+        with self._lock:
+            live = sum(length for offset, length in self._index.values())
+            return 1 - live / self._size if self._size else 0.0
+
+    def compact(self):
+        """
+        Rewrites the log with only the latest line of each item, copying lines as they are rather than decoding them,
+        and replaces the old log atomically.
+        """
+        with self._lock:
+            self._scan()
+            directory = os.path.dirname(os.path.abspath(self.filename))
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for name in self.names():
+                        offset, length = self._index[name]
+                        self._file.seek(offset)
+                        f.write(self._file.read(length))
+                os.replace(temporary, self.filename)
+            except BaseException:
+                os.remove(temporary)
+                raise
+            self._file.close()
+            resident = self._resident.copy()
+            # The saved index describes the old log.
+            if os.path.exists(self.index_filename):
+                os.remove(self.index_filename)
+            self._open()
+            self._resident.update(resident)
+            self.flush()
+
+    def flush(self):
+        """
+        Saves the index next to the log, so that the catalog reopens without scanning the whole log. A catalog whose
+        log has been replaced by another one's `compact()` reopens it first, rather than save an index of the old log.
+        """
+        with self._lock:
+            self.refresh()
+            entries = [[name, offset, length] for name, (offset, length) in self._index.items()]
+            saved = {'size': self._size, 'inode': os.fstat(self._file.fileno()).st_ino,
+                     'tail': self._tail(self._size), 'entries': entries}
+            directory = os.path.dirname(os.path.abspath(self.index_filename))
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(saved, f)
+            os.replace(temporary, self.index_filename)
+
+    def close(self):
+        """
+        Saves the index and closes the log.
+        """
+        with self._lock:
+            if self._file is not None:
+                self.flush()
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def import_items_json(filename='items.json', catalog=None):
+    """
+    Copies every item of an `items.json` file, as written by `Item.save()`, into a catalog, in a single append.
+
+    :param filename: The items file being imported.
+    :param catalog: The `ItemCatalog` the items are copied into. Defaults to that of `items.jsonl`.
+    :return: The number of items imported.
+    """
+    with open(filename) as f:
+        records = json.load(f)['items']
+    catalog = catalog if catalog is not None else ItemCatalog()
+    lines = []
+    for record in records:
+        ordered = OrderedDict([('name', record['name'])])
+        ordered.update((key, value) for key, value in record.items() if key != 'name')
+        lines.append((json.dumps(ordered) + '\n').encode('utf-8'))
+    catalog._append(lines)
+    return len(records)
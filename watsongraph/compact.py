@@ -0,0 +1,1063 @@
+"""compact.py
+    An array-backed alternative to the networkx storage used by `ConceptModel`.
+    A networkx `Graph` of `Node` objects costs several hundred bytes per concept and per edge, which caps how many
+    user and item models can be kept in memory at once. `CompactConceptModel` stores the same model as a table of
+    concept labels, CSR (compressed sparse row) adjacency arrays with int32 neighbor indices and float32 weights, and
+    one typed array per node property, which can be read, written and ranked in bulk. It supports the public API of
+    `ConceptModel` and converts to and from it, for the algorithms which need a networkx graph.
+    Requires the optional `numpy` dependency."""
+
+import heapq
+import sys
+import networkx as nx
+from watsongraph.conceptmodel import ConceptModel, _merge_policy, _property_merger
+from watsongraph.node import Node
+import watsongraph.binary
+import watsongraph.pageviews
+
+try:
+    import numpy as np
+except ImportError:
+    # Only needed by `CompactConceptModel`.
+    np = None
+
+
+def _column_dtype(value):
+    """
+    :return: The dtype of the property column best suited to holding `value`: int64 for integers, float64 for floats
+     and object for anything else, booleans included, so that values come back out with the type they went in with.
+    """
+    if isinstance(value, bool):
+        return np.dtype(object)
+    elif isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        return np.dtype(np.int64)
+    elif isinstance(value, float):
+        return np.dtype(np.float64)
+    return np.dtype(object)
+
+
+def _vectorizable(values):
+    """
+    :return: Whether a list of property values can be stored in a single vectorized update without changing the type
+     of any of them: that is, whether they are all floats or all integers.
+    """
+    types = set(map(type, values))
+    return types == {float} or types == {int}
+
+
+class _Column:
+    """
+    The values of one node property, indexed by concept id, alongside a mask of which concepts have it set. A column
+    of integers given a float, or of floats given an integer, is promoted to float64, as a NumPy array would be; a
+    column given a value of any other type than the ones it holds already is converted to the object dtype.
+    """
+
+    __slots__ = ('values', 'present')
+
+    def __init__(self, values, present):
+        self.values = values
+        self.present = present
+
+    @classmethod
+    def empty(cls, dtype):
+        return cls(np.zeros(0, dtype=dtype), np.zeros(0, dtype=bool))
+
+    def has(self, i):
+        return i < len(self.present) and self.present[i]
+
+    def get(self, i):
+        if not self.has(i):
+            raise KeyError(i)
+        value = self.values[i]
+        return value if self.values.dtype == object else value.item()
+
+    def _convert(self, dtype):
+        if dtype != self.values.dtype:
+            if not self.present.any():
+                # A new column takes on the type of its first values.
+                self.values = self.values.astype(dtype)
+            elif {dtype.kind, self.values.dtype.kind} == {'i', 'f'}:
+                self.values = self.values.astype(np.float64)
+            else:
+                self.values = self.values.astype(object)
+
+    def _reserve(self, size):
+        if size > len(self.values):
+            # Grow geometrically, so that filling a column in one concept at a time takes amortized constant time.
+            capacity = max(size, 2 * len(self.values), 16)
+            values = np.zeros(capacity, dtype=self.values.dtype)
+            values[:len(self.values)] = self.values
+            present = np.zeros(capacity, dtype=bool)
+            present[:len(self.present)] = self.present
+            self.values, self.present = values, present
+
+    def set(self, i, value):
+        self._convert(_column_dtype(value))
+        self._reserve(i + 1)
+        self.values[i] = value
+        self.present[i] = True
+
+    def set_many(self, ids, values):
+        """
+        Sets the values of the given concept ids, in a single vectorized update.
+
+        :param ids: An array of concept ids.
+        :param values: A sequence or array of values, one per id.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind == 'f':
+            dtype = np.dtype(np.float64)
+        elif values.dtype.kind in 'iu':
+            dtype = np.dtype(np.int64)
+        else:
+            values = values.astype(object)
+            dtype = np.dtype(object)
+        self._convert(dtype)
+        if len(ids):
+            self._reserve(int(ids.max()) + 1)
+        self.values[ids] = values
+        self.present[ids] = True
+
+    def present_ids(self):
+        return np.flatnonzero(self.present)
+
+    def take(self, ids):
+        """
+        :return: A new column holding the values of the given concept ids, in order.
+        """
+        # Ids are sorted, so those past the end of the column, which have no value, are all at the end.
+        ids = ids[ids < len(self.present)]
+        return _Column(self.values[ids], self.present[ids])
+
+    def copy(self):
+        return _Column(self.values.copy(), self.present.copy())
+
+
+def _merge_arrays(policy, current, incoming):
+    """
+    Applies a merge policy (see `conceptmodel.MERGE_POLICIES`) element-wise to two arrays of values.
+    """
+    if isinstance(policy, str):
+        if policy == 'keep':
+            return current
+        elif policy == 'overwrite':
+            return incoming
+        elif policy == 'max':
+            return np.maximum(current, incoming)
+        elif policy == 'mean':
+            return (current + incoming) / 2
+    merge = _merge_policy(policy)
+    return np.array([merge(c, i) for c, i in zip(current.tolist(), incoming.tolist())], dtype=current.dtype)
+
+
+class CompactConceptModel:
+    """
+    A `ConceptModel` stored in flat arrays rather than in a networkx graph of `Node` objects, for keeping large
+    numbers of large models in memory.
+
+    Concepts are numbered in the order in which they were added. Edges are held in CSR form: the neighbors of concept
+    `i` are `indices[indptr[i]:indptr[i + 1]]`, sorted, with the matching relevance weights in `weights`, and every
+    edge is stored once in each direction. Node properties are held column by column, one array per property.
+    Edges carry nothing but their weight.
+
+    Adding a single concept is cheap, but every change to the edges rebuilds the adjacency arrays, so edges are best
+    added in bulk: `merge_with()`, `explode()`, `explode_edges()` and friends all make a single update. The methods
+    which query the IBM Watson API do so through a scratch `ConceptModel` which is then merged in. The model keeps
+    the same augmentation and provenance records as a `ConceptModel`, so augmenting a concept twice costs nothing the
+    second time and `abridge()` undoes an expansion locally.
+
+    There are no `Node` objects behind the model: `nodes()` and `get_node()` return detached copies, and changing
+    them leaves the model as it is.
+
+    Requires the optional `numpy` dependency.
+    """
+
+    """
+    The augmentation and provenance records of the model, kept exactly as in a `ConceptModel`: see
+    `ConceptModel._augmented`, `ConceptModel._expansions` and `ConceptModel._references`.
+    """
+    _augmented = None
+    _expansions = None
+    _expanded_from = None
+    _references = None
+
+    # Nothing in these touches the graph, so they are shared with `ConceptModel` as they are.
+    _record_expansion = ConceptModel._record_expansion
+    _forget_expansion = ConceptModel._forget_expansion
+    _record_augmented = ConceptModel._record_augmented
+    _is_shared = ConceptModel._is_shared
+    _records = ConceptModel._records
+    remove_reference = ConceptModel.remove_reference
+    references = ConceptModel.references
+
+    def __init__(self, list_of_concepts=None, weight_dtype='float32'):
+        """
+        Initializes a `CompactConceptModel` around a list of concepts.
+
+        :param list_of_concepts: A list of concept labels (eg. ['Microsoft', 'IBM'] or ['Apple Inc.']) to initialize the
+         model around.
+
+        :param weight_dtype: The NumPy dtype edge weights are stored in. float32, the default, keeps about seven
+         significant digits; pass `'float64'` to keep weights exactly as they are in a `ConceptModel`.
+        """
+        if np is None:
+            raise ImportError('CompactConceptModel requires the numpy package. Install it with `pip install numpy`.')
+        self.weight_dtype = np.dtype(weight_dtype)
+        self._labels = []
+        self._ids = dict()
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=self.weight_dtype)
+        self._columns = dict()
+        self._reset_records()
+        if list_of_concepts:
+            for concept_label in list_of_concepts:
+                self._add_label(concept_label)
+
+    def _reset_records(self):
+        self._augmented = dict()
+        self._expansions = dict()
+        self._expanded_from = dict()
+        self._references = dict()
+
+    def _merge_records(self, concept_model):
+        """
+        Folds the augmentation and provenance records of a `ConceptModel` or `CompactConceptModel` into the model's.
+        """
+        for concept, limits in concept_model._augmented.items():
+            for level, limit in limits.items():
+                self._record_augmented(concept, level, limit)
+        for concept, expansion in concept_model._expansions.items():
+            self._record_expansion(concept, expansion)
+        for concept, references in concept_model._references.items():
+            self._references.setdefault(concept, set()).update(references)
+
+    def _load_records(self, records):
+        """
+        Restores the records serialized by `_records()`, for those of their concepts which are in the model. See
+        `ConceptModel._load_records()`.
+        """
+        for concept, level, limit in records.get('augmented', []):
+            if concept in self._ids:
+                self._record_augmented(concept, level, limit)
+        for concept, related_concepts in records.get('expansions', []):
+            self._record_expansion(concept, [related for related in related_concepts if related in self._ids])
+        for concept, references in records.get('references', []):
+            if concept in self._ids:
+                self._references[concept] = set(references)
+
+    def _assign(self, other):
+        """
+        Replaces the contents of the model with those of another `CompactConceptModel`.
+        """
+        self._labels, self._ids, self._columns = other._labels, other._ids, other._columns
+        self._indptr, self._indices, self._weights = other._indptr, other._indices, other._weights
+        self._augmented, self._expansions = other._augmented, other._expansions
+        self._expanded_from, self._references = other._expanded_from, other._references
+
+    def _add_label(self, concept):
+        """
+        :return: The id of the given concept, which is added to the model if it is not already in it.
+        """
+        i = self._ids.get(concept)
+        if i is None:
+            i = len(self._labels)
+            self._labels.append(sys.intern(concept))
+            self._ids[self._labels[i]] = i
+        return i
+
+    def _id(self, concept):
+        try:
+            return self._ids[concept]
+        except KeyError:
+            raise RuntimeError('Concept ' + concept + ' not found in ' + str(self))
+
+    def _row(self, i):
+        """
+        :return: The `(neighbor ids, weights)` arrays of the given concept id.
+        """
+        # Concepts added since the adjacency arrays were last built have no edges, and no row.
+        if i + 1 >= len(self._indptr):
+            return self._indices[:0], self._weights[:0]
+        start, end = self._indptr[i], self._indptr[i + 1]
+        return self._indices[start:end], self._weights[start:end]
+
+    def _degrees(self):
+        degrees = np.zeros(len(self._labels), dtype=np.int64)
+        row_degrees = np.diff(self._indptr)
+        degrees[:len(row_degrees)] = row_degrees
+        return degrees
+
+    def _coo(self):
+        """
+        :return: The `(rows, columns, weights)` arrays of every edge, each given once with `row <= column`, sorted by
+         row and then by column.
+        """
+        rows = np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int64), np.diff(self._indptr))
+        upper = rows <= self._indices
+        return rows[upper], self._indices[upper].astype(np.int64), self._weights[upper]
+
+    def _set_edges(self, rows, columns, weights):
+        """
+        Rebuilds the adjacency arrays out of the given edges, each of which must be given once.
+        """
+        mirrored = rows != columns
+        all_rows = np.concatenate([rows, columns[mirrored]])
+        all_columns = np.concatenate([columns, rows[mirrored]])
+        all_weights = np.concatenate([weights, weights[mirrored]])
+        order = np.lexsort((all_columns, all_rows))
+        self._indices = all_columns[order].astype(np.int32)
+        self._weights = all_weights[order].astype(self.weight_dtype)
+        counts = np.bincount(all_rows, minlength=len(self._labels))
+        self._indptr = np.concatenate([np.zeros(1, dtype=np.int64), np.cumsum(counts, dtype=np.int64)])
+
+    def _merge_edges(self, rows, columns, weights, policy='overwrite'):
+        """
+        Adds the given edges to the model in a single update. Where an edge is given more than once the last
+        occurrence counts, and the weights of edges already in the model are reconciled by `policy`.
+        """
+        n = len(self._labels)
+        rows, columns = np.minimum(rows, columns).astype(np.int64), np.maximum(rows, columns).astype(np.int64)
+        incoming_keys, last = np.unique((rows * n + columns)[::-1], return_index=True)
+        incoming_weights = np.asarray(weights, dtype=np.float64)[::-1][last]
+        current_rows, current_columns, current_weights = self._coo()
+        current_keys = current_rows * n + current_columns
+        current_weights = current_weights.astype(np.float64)
+        # The current keys are sorted, since the adjacency arrays are.
+        positions = np.searchsorted(current_keys, incoming_keys)
+        shared = positions < len(current_keys)
+        shared[shared] = current_keys[positions[shared]] == incoming_keys[shared]
+        current_weights[positions[shared]] = _merge_arrays(policy, current_weights[positions[shared]],
+                                                           incoming_weights[shared])
+        keys = np.concatenate([current_keys, incoming_keys[~shared]])
+        self._set_edges(keys // max(n, 1), keys % max(n, 1),
+                        np.concatenate([current_weights, incoming_weights[~shared]]))
+
+    def _column(self, prop):
+        column = self._columns.get(prop)
+        if column is None:
+            column = self._columns[prop] = _Column.empty(np.float64)
+        return column
+
+    def _get_property(self, i, prop):
+        column = self._columns.get(prop)
+        if column is None or not column.has(i):
+            raise KeyError(prop)
+        return column.get(i)
+
+    def __contains__(self, concept):
+        """
+        :return: Whether or not the given concept is in the `CompactConceptModel`.
+        """
+        return concept in self._ids
+
+    def add_reference(self, concept, reference):
+        """
+        Marks a concept as referenced by something other than augmentation, so that `abridge(..., keep_shared=True)`
+        keeps it. See `ConceptModel.add_reference()`.
+
+        :param concept: The concept being referenced, which must be in the model.
+        :param reference: A hashable identifying what references it.
+        """
+        self._id(concept)
+        self._references.setdefault(concept, set()).add(reference)
+
+    def is_augmented(self, concept, level=0, limit=50):
+        """
+        :return: Whether `concept` has already been augmented with the given `level` and the same or a larger
+         `limit`. See `ConceptModel.is_augmented()`.
+        """
+        return concept in self._ids and self._augmented.get(concept, dict()).get(level, -1) >= limit
+
+    ###################################
+    # Setters, getters, and printers. #
+    ###################################
+
+    def nodes(self):
+        """
+        :return: A list of `Node` objects, one per concept, in the order the concepts were added, carrying copies of
+         their properties. Unlike those of a `ConceptModel` they are detached: changing them leaves the model as it
+         is.
+        """
+        nodes = [Node(label) for label in self._labels]
+        for prop, column in self._columns.items():
+            for i in column.present_ids().tolist():
+                nodes[i].set_property(prop, column.get(i))
+        return nodes
+
+    def concepts(self):
+        """
+        :return: Returns a sorted list of all concepts in the `CompactConceptModel`.
+        """
+        return sorted(self._labels)
+
+    def concept_set(self):
+        """
+        :return: A live, set-like view of the concepts in the `CompactConceptModel`. See
+         `ConceptModel.concept_set()`.
+        """
+        return self._ids.keys()
+
+    def edges(self):
+        """
+        :return: Returns a list of all `(concept, other concept, strength)` tuples in the `CompactConceptModel`.
+        """
+        return sorted([("{0:.3f}".format(weight), concept, other_concept)
+                       for weight, concept, other_concept in self.iter_edges()], reverse=True)
+
+    def iter_edges(self):
+        """
+        :return: A generator of `(strength, concept, other concept)` tuples, one per edge, in no particular order,
+         with the strength left as a number.
+        """
+        rows, columns, weights = self._coo()
+        labels = self._labels
+        return ((weight, labels[row], labels[column])
+                for row, column, weight in zip(rows.tolist(), columns.tolist(), weights.tolist()))
+
+    def get_node(self, concept):
+        """
+        Returns a detached `Node` standing for a concept in the `CompactConceptModel`, carrying a copy of its
+        properties. See `nodes()`.
+
+        :param concept: The concept of a Concept supposedly in the CompactConceptModel.
+        :return: The `Node`, if the concept is found. Throws an error if it is not.
+        """
+        i = self._id(concept)
+        node = Node(concept)
+        for prop, column in self._columns.items():
+            if column.has(i):
+                node.set_property(prop, column.get(i))
+        return node
+
+    def remove(self, concept):
+        """
+        Removes the given concept from the `CompactConceptModel`.
+
+        :param concept: The concept being removed from the model.
+        """
+        self._remove_ids([self._id(concept)])
+
+    def _remove_ids(self, ids):
+        """
+        Removes the given concept ids, renumbering the concepts which remain, in a single update.
+        """
+        # Keep the records the way `ConceptModel._remove_node()` does.
+        for i in ids:
+            for j in self._row(i)[0].tolist():
+                self._augmented.pop(self._labels[j], None)
+        for i in ids:
+            concept = self._labels[i]
+            self._augmented.pop(concept, None)
+            self._forget_expansion(concept)
+            for source in self._expanded_from.pop(concept, ()):
+                self._expansions[source].pop(concept, None)
+            self._references.pop(concept, None)
+        keep = np.ones(len(self._labels), dtype=bool)
+        keep[np.asarray(ids, dtype=np.int64)] = False
+        kept_ids = np.flatnonzero(keep)
+        new_ids = np.cumsum(keep) - 1
+        rows, columns, weights = self._coo()
+        kept_edges = keep[rows] & keep[columns]
+        self._labels = [self._labels[i] for i in kept_ids.tolist()]
+        self._ids = {label: i for i, label in enumerate(self._labels)}
+        self._columns = {prop: column.take(kept_ids) for prop, column in self._columns.items()}
+        self._set_edges(new_ids[rows[kept_edges]], new_ids[columns[kept_edges]], weights[kept_edges])
+
+    def neighborhood(self, concept):
+        """
+        :param concept: The concept that is the focus of this operation.
+        :return: Returns the "neighborhood" of a concept: a list of `(correlation, concept)` tuples pointing to/from
+         it. See `ConceptModel.neighborhood()`.
+        """
+        i = self._id(concept)
+        neighbors, weights = self._row(i)
+        return sorted([(weight, self._labels[j]) for j, weight in zip(neighbors.tolist(), weights.tolist())],
+                      reverse=True)
+
+    ######################
+    # Parameter methods. #
+    ######################
+
+    def concepts_by_property(self, prop):
+        """
+        :param prop: The `property` to sort the returned output by.
+        :return: Returns a list of `(prop, concept)` tuples sorted by prop. Note that this method will fail if this
+         property is not initialized for all concepts.
+        """
+        n = len(self._labels)
+        column = self._columns.get(prop)
+        if n and (column is None or len(column.present) < n or not column.present[:n].all()):
+            raise KeyError(prop)
+        return sorted(zip(column.values[:n].tolist(), self._labels), reverse=True) if n else []
+
+    def concepts_by_view_count(self):
+        """
+        Wrapper for `concepts_by_property()` for the `view_count` case.
+
+        :return: Returns a list of `(view_count, concept)` tuples sorted by `view_count`.
+        """
+        return self.concepts_by_property('view_count')
+
+    def set_view_counts(self, enricher=None):
+        """
+        Initializes the `view_count` property for all of the concepts in the `CompactConceptModel`. See
+        `ConceptModel.set_view_counts()`.
+
+        :param enricher: The `pageviews.PageviewsEnricher` to use. Defaults to the process-wide one.
+        """
+        (enricher if enricher is not None else watsongraph.pageviews.get_enricher()).enrich(self)
+
+    def get_view_count(self, concept):
+        """
+        Returns the `view_count` of a concept in the `CompactConceptModel`.
+
+        :param concept: The concept supposedly in the `CompactConceptModel`.
+        :return: The `view_count` int parameter of the concept, if it is found. Throws an error if it is not.
+        """
+        return self._get_property(self._id(concept), 'view_count')
+
+    def set_property(self, concept, param, value):
+        """
+        Sets the `param` property of `concept` to `value`.
+
+        :param concept: Concept being given a parameter.
+        :param param: The parameter being given.
+        :param value: The value the parameter being given takes on.
+        """
+        self._column(param).set(self._id(concept), value)
+
+    def map_property(self, prop, func):
+        """
+        Maps the `param` property of all of the concepts in the model by way of the user-provided `func`.
+
+        :param prop: The parameter being given.
+        :param func: The function that is called on the concept in order to determine the value of `prop`.
+        """
+        values = [func(label) for label in self._labels]
+        column = self._column(prop)
+        if _vectorizable(values):
+            column.set_many(np.arange(len(values)), values)
+        else:
+            for i, value in enumerate(values):
+                column.set(i, value)
+
+    def get_properties(self, prop, concepts=None):
+        """
+        Bulk getter for a single property.
+
+        :param prop: The property being retrieved.
+        :param concepts: The concepts to retrieve it for. Defaults to every concept in the model.
+        :return: A `concept -> value` dictionary, covering those of the concepts which have the property set.
+        """
+        column = self._columns.get(prop)
+        if column is None:
+            return dict()
+        if concepts is None:
+            ids = column.present_ids()
+        else:
+            ids = np.array([self._id(concept) for concept in concepts], dtype=np.int64)
+            ids = ids[ids < len(column.present)]
+            ids = ids[column.present[ids]]
+        return dict(zip([self._labels[i] for i in ids.tolist()], column.values[ids].tolist()))
+
+    def set_properties(self, prop, values):
+        """
+        Bulk setter for a single property, which stores numeric values in a single vectorized update.
+
+        :param prop: The property being set.
+        :param values: A `concept -> value` dictionary.
+        """
+        ids = np.array([self._id(concept) for concept in values.keys()], dtype=np.int64)
+        values = list(values.values())
+        column = self._column(prop)
+        if _vectorizable(values):
+            column.set_many(ids, values)
+        else:
+            for i, value in zip(ids.tolist(), values):
+                column.set(i, value)
+
+    def update_property(self, prop, func, vectorized=False):
+        """
+        Replaces the value of the `prop` property of every concept which has it set with `func(value)`.
+
+        :param prop: The property being updated.
+        :param func: The function mapping old values to new ones.
+        :param vectorized: If `True`, `func` is called once, on the array of every value, and must return an array
+         of new values, e.g. `model.update_property('relevance', lambda relevance: relevance * 0.9, vectorized=True)`.
+        """
+        column = self._columns.get(prop)
+        if column is None:
+            return
+        ids = column.present_ids()
+        if vectorized:
+            column.set_many(ids, func(column.values[ids]))
+            return
+        values = column.values[ids]
+        values = [func(value) for value in (values if values.dtype == object else values.tolist())]
+        if _vectorizable(values):
+            column.set_many(ids, values)
+        else:
+            for i, value in zip(ids.tolist(), values):
+                column.set(i, value)
+
+    def top_k(self, prop, k):
+        """
+        Finds the `k` concepts with the highest values of a property by partial sort (`numpy.argpartition`) in O(n)
+        time, rather than sorting the whole model the way `concepts_by_property()` does. Concepts which do not have
+        the property set are skipped.
+
+        :param prop: The property to rank concepts by.
+        :param k: The number of concepts returned.
+        :return: A list of up to `k` `(value, concept)` tuples, highest first, the values left as they are (not
+         formatted). This is the same as the first `k` entries of `concepts_by_property(prop)`.
+        """
+        column = self._columns.get(prop)
+        if column is None or k <= 0:
+            return []
+        ids = column.present_ids()
+        values = column.values[ids]
+        if values.dtype == object:
+            return heapq.nlargest(k, zip(values.tolist(), [self._labels[i] for i in ids.tolist()]))
+        if k < len(ids):
+            # Take everything tied with the k-th highest value, so that ties are broken by concept, as in
+            # `concepts_by_property()`.
+            threshold = values[np.argpartition(values, len(values) - k)[len(values) - k]]
+            candidates = values >= threshold
+            ids, values = ids[candidates], values[candidates]
+        return sorted(zip(values.tolist(), [self._labels[i] for i in ids.tolist()]), reverse=True)[:k]
+
+    ##################
+    # Graph methods. #
+    ##################
+
+    def add(self, concept):
+        """
+        Simple adder method.
+
+        :param concept: Concept to be added to the model.
+        """
+        self._add_label(concept)
+
+    def merge_with(self, mixin_concept_model, node_policy='keep', edge_policy='overwrite'):
+        """
+        Merges the given model into the current one, in a single update. See `ConceptModel.merge_with()` for the
+        meaning of the merge policies.
+
+        :param mixin_concept_model: The `CompactConceptModel` or `ConceptModel` being folded into the current object.
+         It is left unchanged.
+
+        :param node_policy: The policy applied to node properties, or a dictionary mapping property names to
+         policies.
+
+        :param edge_policy: The policy applied to edge weights.
+        """
+        if not isinstance(mixin_concept_model, CompactConceptModel):
+            mixin_concept_model = CompactConceptModel.from_concept_model(mixin_concept_model, weight_dtype='float64')
+        mixin = mixin_concept_model
+        remap = np.array([self._add_label(label) for label in mixin._labels], dtype=np.int64)
+        merge_properties = _property_merger(node_policy)
+        for prop, mixin_column in mixin._columns.items():
+            column = self._column(prop)
+            for i in mixin_column.present_ids().tolist():
+                value = mixin_column.get(i)
+                target = int(remap[i])
+                if column.has(target):
+                    value = merge_properties(prop, column.get(target), value)
+                column.set(target, value)
+        rows, columns, weights = mixin._coo()
+        if len(rows):
+            self._merge_edges(remap[rows], remap[columns], weights, policy=edge_policy)
+        # Whatever was augmented in the mixin has its expansion in the current model now too.
+        self._merge_records(mixin)
+
+    def copy(self):
+        """
+        :return: A deep copy of the current `CompactConceptModel`.
+        """
+        ret = CompactConceptModel(weight_dtype=self.weight_dtype)
+        ret._labels = list(self._labels)
+        ret._ids = dict(self._ids)
+        ret._indptr = self._indptr.copy()
+        ret._indices = self._indices.copy()
+        ret._weights = self._weights.copy()
+        ret._columns = {prop: column.copy() for prop, column in self._columns.items()}
+        ret._merge_records(self)
+        return ret
+
+    def _scratch(self, concepts):
+        """
+        :return: A `ConceptModel` of the given concepts, without edges, which knows which of them the current model
+         has augmented already, for the methods which query the IBM Watson API to work in before it is merged in.
+        """
+        scratch = ConceptModel(concepts)
+        for concept in concepts:
+            if concept in self._augmented:
+                scratch._augmented[concept] = dict(self._augmented[concept])
+        return scratch
+
+    def augment_by_node(self, node, level=0, limit=50):
+        """
+        Augments the model by mining the given node and adding newly discovered nodes to it. See
+        `ConceptModel.augment_by_node()`.
+        """
+        if self.is_augmented(node.concept, level, limit):
+            return
+        scratch = ConceptModel()
+        scratch.augment_by_node(node.copy(), level=level, limit=limit)
+        self.merge_with(scratch)
+
+    async def aaugment_by_node(self, node, level=0, limit=50):
+        """
+        The awaitable counterpart of `augment_by_node()`.
+        """
+        if self.is_augmented(node.concept, level, limit):
+            return
+        scratch = ConceptModel()
+        await scratch.aaugment_by_node(node.copy(), level=level, limit=limit)
+        self.merge_with(scratch)
+
+    def augment(self, concept, level=0, limit=50):
+        """
+        Augments the model by adding the concepts related to the given one. See `ConceptModel.augment()`.
+        """
+        self.augment_by_node(Node(concept), level=level, limit=limit)
+
+    async def aaugment(self, concept, level=0, limit=50):
+        """
+        The awaitable counterpart of `augment()`.
+        """
+        await self.aaugment_by_node(Node(concept), level=level, limit=limit)
+
+    def abridge_by_node(self, node, level=0, limit=50, keep_shared=False):
+        """
+        Performs the inverse operation of augment by removing the expansion of the given node from the model, in a
+        single update. As with `ConceptModel.abridge_by_node()`, the expansion is read off the model's provenance
+        records, and only fetched from the IBM Watson API again if there are none.
+        """
+        if node.concept in self._expansions:
+            expansion = [node.concept] + list(self._expansions[node.concept])
+        else:
+            inverse = ConceptModel()
+            inverse.augment_by_node(Node(node.concept), level=level, limit=limit)
+            expansion = list(inverse.concept_set())
+        if keep_shared:
+            expansion = [concept for concept in expansion if not self._is_shared(concept, node.concept)]
+            self._forget_expansion(node.concept)
+            self._augmented.pop(node.concept, None)
+        self._remove_ids([self._ids[concept] for concept in expansion if concept in self._ids])
+
+    def abridge(self, concept, level=0, limit=50, keep_shared=False):
+        """
+        Performs the inverse operation of augment by removing the expansion of the given concept from the graph. See
+        `abridge_by_node()`.
+        """
+        self.abridge_by_node(Node(concept), level=level, limit=limit, keep_shared=keep_shared)
+
+    def _next_frontier(self, frontier, visited):
+        """
+        The equivalent of `ConceptModel._next_frontier()`, over concepts rather than nodes.
+        """
+        visited.update(frontier)
+        next_frontier = dict()
+        for concept in frontier:
+            for j in self._row(self._ids[concept])[0].tolist():
+                if self._labels[j] not in visited:
+                    next_frontier[self._labels[j]] = None
+        return list(next_frontier)
+
+    def explode(self, level=0, limit=50, workers=1, depth=1):
+        """
+        Explodes the model by augmenting every concept already in it, `depth` hops deep, in one update per hop. See
+        `ConceptModel.explode()`.
+        """
+        frontier = list(self._labels)
+        visited = set()
+        for hop in range(depth):
+            scratch = self._scratch(frontier)
+            scratch.explode(level=level, limit=limit, workers=workers)
+            self.merge_with(scratch)
+            if hop + 1 < depth:
+                frontier = self._next_frontier(frontier, visited)
+
+    async def aexplode(self, level=0, limit=50, depth=1):
+        """
+        The awaitable counterpart of `explode()`.
+        """
+        frontier = list(self._labels)
+        visited = set()
+        for hop in range(depth):
+            scratch = self._scratch(frontier)
+            await scratch.aexplode(level=level, limit=limit)
+            self.merge_with(scratch)
+            if hop + 1 < depth:
+                frontier = self._next_frontier(frontier, visited)
+
+    def _lonely_concepts(self, n):
+        return [self._labels[i] for i in np.flatnonzero(self._degrees() <= n).tolist()]
+
+    def expand(self, level=0, limit=50, n=1, workers=1):
+        """
+        Expands the model by augmenting concepts with `n` or fewer edges. See `ConceptModel.expand()`.
+        """
+        scratch = self._scratch(self._lonely_concepts(n))
+        scratch.explode(level=level, limit=limit, workers=workers)
+        self.merge_with(scratch)
+
+    async def aexpand(self, level=0, limit=50, n=1):
+        """
+        The awaitable counterpart of `expand()`.
+        """
+        scratch = self._scratch(self._lonely_concepts(n))
+        await scratch.aexplode(level=level, limit=limit)
+        self.merge_with(scratch)
+
+    def expand_iter(self, level=0, limit=50, max_calls=None, deadline=None, max_nodes=None, concepts=None,
+                    workers=1, cancel=None):
+        """
+        Expands the model best-first, under a budget, yielding each concept as it is discovered. See
+        `ConceptModel.expand_iter()`, which this runs on a `ConceptModel` copy of the model, since the priorities
+        depend on its edges. The concepts are merged in, in a single update, once the generator is exhausted or
+        closed (e.g. by `break`-ing out of the loop), so the model itself does not change while it is iterated over.
+        """
+        scratch = self.to_concept_model()
+        try:
+            for concept in scratch.expand_iter(level=level, limit=limit, max_calls=max_calls, deadline=deadline,
+                                               max_nodes=max_nodes, concepts=concepts, workers=workers, cancel=cancel):
+                yield concept
+        finally:
+            self._assign(CompactConceptModel.from_concept_model(scratch, weight_dtype=self.weight_dtype))
+
+    async def aexpand_iter(self, level=0, limit=50, max_calls=None, deadline=None, max_nodes=None, concepts=None,
+                           workers=10, cancel=None):
+        """
+        The asynchronous generator counterpart of `expand_iter()`.
+        """
+        scratch = self.to_concept_model()
+        try:
+            async for concept in scratch.aexpand_iter(level=level, limit=limit, max_calls=max_calls,
+                                                      deadline=deadline, max_nodes=max_nodes, concepts=concepts,
+                                                      workers=workers, cancel=cancel):
+                yield concept
+        finally:
+            self._assign(CompactConceptModel.from_concept_model(scratch, weight_dtype=self.weight_dtype))
+
+    def intersection_with_by_nodes(self, mixin_concept_model):
+        """
+        :param mixin_concept_model: Another `ConceptModel` or `CompactConceptModel` to be compared to.
+
+        :return: A list of detached nodes (see `get_node()`) of the overlapping concepts, whose relevance, where it is
+         set, is set to the average of their relevance in the two models, in the current model as well.
+        """
+        overlapping = [concept for concept in self._labels if concept in mixin_concept_model]
+        column = self._columns.get('relevance')
+        if column is not None:
+            for concept in overlapping:
+                i = self._ids[concept]
+                if column.has(i):
+                    mixin_relevance = mixin_concept_model.get_node(concept).properties['relevance']
+                    column.set(i, (column.get(i) + mixin_relevance) / 2)
+        return [self.get_node(concept) for concept in overlapping]
+
+    def add_edges(self, source_concept, list_of_target_concepts, prune=False, workers=1):
+        """
+        Given a source concept and a list of target concepts, creates relevance edges between the source and the
+        targets and adds them to the graph. See `ConceptModel.add_edges()`.
+        """
+        scratch = ConceptModel()
+        scratch.add_edges(source_concept, list_of_target_concepts, prune=prune, workers=workers)
+        self.merge_with(scratch)
+
+    async def aadd_edges(self, source_concept, list_of_target_concepts, prune=False):
+        """
+        The awaitable counterpart of `add_edges()`.
+        """
+        scratch = ConceptModel()
+        await scratch.aadd_edges(source_concept, list_of_target_concepts, prune=prune)
+        self.merge_with(scratch)
+
+    def add_edge(self, source_concept, target_concept, prune=False):
+        """
+        Wrapper for `add_edges()` for the single-concept case.
+        """
+        self.add_edges(source_concept, [target_concept], prune=prune)
+
+    async def aadd_edge(self, source_concept, target_concept, prune=False):
+        """
+        The awaitable counterpart of `add_edge()`.
+        """
+        await self.aadd_edges(source_concept, [target_concept], prune=prune)
+
+    def explode_edges(self, prune=False, workers=1, progress=None):
+        """
+        Scores every concept in the model against every other and adds the resulting edges. See
+        `ConceptModel.explode_edges()`.
+        """
+        scratch = ConceptModel(self._labels)
+        scratch.explode_edges(prune=prune, workers=workers, progress=progress)
+        self.merge_with(scratch)
+
+    async def aexplode_edges(self, prune=False):
+        """
+        The awaitable counterpart of `explode_edges()`.
+        """
+        scratch = ConceptModel(self._labels)
+        await scratch.aexplode_edges(prune=prune)
+        self.merge_with(scratch)
+
+    #######################
+    # Conversion methods. #
+    #######################
+
+    @classmethod
+    def from_concept_model(cls, concept_model, weight_dtype='float32'):
+        """
+        Builds the `CompactConceptModel` equivalent of a `ConceptModel`.
+
+        :param concept_model: The `ConceptModel` being converted. It is left unchanged.
+        :param weight_dtype: The dtype edge weights are stored in. See `__init__()`.
+        """
+        compact = cls(weight_dtype=weight_dtype)
+        nodes = list(concept_model.nodes())
+        for i, node in enumerate(nodes):
+            compact._add_label(node.concept)
+            # Read the properties without allocating a dictionary for nodes which have none.
+            if node._properties:
+                for prop, value in node._properties.items():
+                    compact._column(prop).set(i, value)
+        ids = {node: i for i, node in enumerate(nodes)}
+        rows, columns, weights = [], [], []
+        # Walk the raw adjacency dictionaries, which is several times faster than `Graph.edges(data=True)` or than
+        # the read-only views networkx 2 wraps them in.
+        graph = concept_model.graph
+        adjacency = graph._adj if hasattr(graph, '_adj') else graph.adj
+        for source, neighbors in adjacency.items():
+            row = ids[source]
+            for target, data in neighbors.items():
+                column = ids[target]
+                if row <= column:
+                    rows.append(row)
+                    columns.append(column)
+                    weights.append(data['weight'])
+        if rows:
+            compact._set_edges(np.array(rows, dtype=np.int64), np.array(columns, dtype=np.int64),
+                               np.array(weights, dtype=np.float64))
+        compact._merge_records(concept_model)
+        return compact
+
+    def to_concept_model(self):
+        """
+        :return: The `ConceptModel` equivalent of the current model, backed by a networkx graph.
+        """
+        nodes = [Node(label) for label in self._labels]
+        for prop, column in self._columns.items():
+            for i in column.present_ids().tolist():
+                nodes[i].set_property(prop, column.get(i))
+        graph = nx.Graph()
+        graph.add_nodes_from(nodes)
+        rows, columns, weights = self._coo()
+        graph.add_edges_from((nodes[row], nodes[column], {'weight': weight})
+                             for row, column, weight in zip(rows.tolist(), columns.tolist(), weights.tolist()))
+        ret = ConceptModel()
+        ret.graph = graph
+        ret._load_records(self._records())
+        return ret
+
+    ###############
+    # IO methods. #
+    ###############
+
+    def to_json(self, records=True):
+        """
+        Returns the JSON representation of the model, the same as that of the equivalent `ConceptModel`.
+        Counter-operation to `load_from_json()`.
+
+        :param records: If `False`, the model-level records are left out. See `ConceptModel.to_json()`.
+        """
+        return self.to_concept_model().to_json(records=records)
+
+    def load_from_json(self, data_repr):
+        """
+        Replaces the contents of the model with those of a JSON representation. Counter-operation to `to_json()`.
+
+        :param data_repr: The dictionary being passed to the method.
+        """
+        concept_model = ConceptModel()
+        concept_model.load_from_json(data_repr)
+        self._assign(CompactConceptModel.from_concept_model(concept_model, weight_dtype=self.weight_dtype))
+
+    def dump_json(self, fp, records=True):
+        """
+        Writes the JSON representation of the model to a file, one node and one link at a time. See
+        `ConceptModel.dump_json()`. Counter-operation to `load_json()`.
+
+        :param fp: A file object open for writing in text mode.
+        :param records: If `False`, the model-level records are left out.
+        """
+        self.to_concept_model().dump_json(fp, records=records)
+
+    def load_json(self, fp):
+        """
+        Replaces the contents of the model with a JSON representation read incrementally from a file. See
+        `ConceptModel.load_json()`. Counter-operation to `dump_json()`.
+
+        :param fp: A file object open for reading in text mode.
+        """
+        concept_model = ConceptModel()
+        concept_model.load_json(fp)
+        self._assign(CompactConceptModel.from_concept_model(concept_model, weight_dtype=self.weight_dtype))
+
+    def save_binary(self, filename):
+        """
+        Writes the model to a file in the compact binary format of `watsongraph.binary`, the same as that written by
+        `ConceptModel.save_binary()`. Counter-operation to `load_binary()`.
+
+        :param filename: The file being written.
+        """
+        n = len(self._labels)
+        # The format keeps concepts in label order.
+        order = np.array(sorted(range(n), key=self._labels.__getitem__), dtype=np.int64)
+        new_ids = np.empty(n, dtype=np.int64)
+        new_ids[order] = np.arange(n, dtype=np.int64)
+        rows, columns, weights = self._coo()
+        ordered = CompactConceptModel(weight_dtype=self.weight_dtype)
+        ordered._labels = [self._labels[i] for i in order.tolist()]
+        ordered._set_edges(new_ids[rows], new_ids[columns], weights)
+        property_columns = dict()
+        for prop, column in self._columns.items():
+            column = column.copy()
+            column._reserve(n)
+            values, present = column.values[:n][order], column.present[:n][order]
+            property_columns[prop] = (present, values.tolist() if values.dtype == object else values)
+        with open(filename, 'wb') as f:
+            watsongraph.binary.dump(f, ordered._labels, ordered._indptr, ordered._indices, ordered._weights,
+                                    property_columns, metadata=self._records(),
+                                    weight_size=4 if self.weight_dtype.itemsize <= 4 else 8)
+
+    def load_binary(self, filename):
+        """
+        Replaces the contents of the model with those of a file written by `save_binary()`, reading its arrays
+        directly rather than through a `ConceptModel`. Counter-operation to `save_binary()`.
+
+        :param filename: The file being read.
+        """
+        with open(filename, 'rb') as f:
+            model = watsongraph.binary.BinaryModel(f.read())
+        self._labels = [sys.intern(label) for label in model.labels()]
+        self._ids = {label: i for i, label in enumerate(self._labels)}
+        self._indptr = np.array(model.indptr, dtype=np.int64)
+        self._indices = np.array(model.indices, dtype=np.int32)
+        self._weights = np.array(model.weights, dtype=self.weight_dtype)
+        self._columns = dict()
+        for prop, (column_type, present, values) in model.columns.items():
+            present = np.array(present, dtype=bool)
+            if column_type == watsongraph.binary.JSON_COLUMN:
+                values = np.zeros(model.n, dtype=object)
+                for i in model.present_ids(prop):
+                    values[i] = model.get(prop, i)
+            else:
+                values = np.array(values, dtype=np.int64 if column_type == watsongraph.binary.INT_COLUMN
+                                  else np.float64)
+            self._columns[prop] = _Column(values, present)
+        self._reset_records()
+        self._load_records(model.metadata)
@@ -1,8 +1,15 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+import heapq
+import json
+import time
+import warnings
 from watsongraph.node import Node
 import networkx as nx
+import watsongraph.binary
 import watsongraph.event_insight_lib
+import watsongraph.pageviews
 from networkx.readwrite import json_graph
-from mwviews.api import PageviewsClient
 
 
 # import graphistry
@@ -11,6 +18,45 @@ from mwviews.api import PageviewsClient
 # TODO: Graphistry-based visualize() method.
 # Come back to this task in a while, they're working through Unicode errors at the moment, nothing to be done just yet.
 
+"""
+The built-in policies for reconciling a value present on both sides of a merge (see `ConceptModel.merge_with()`), as
+`policy(current value, incoming value) -> merged value` functions.
+"""
+MERGE_POLICIES = {
+    'keep': lambda current, incoming: current,
+    'overwrite': lambda current, incoming: incoming,
+    'max': max,
+    'mean': lambda current, incoming: (current + incoming) / 2
+}
+
+
+def _merge_policy(policy):
+    """
+    :param policy: The name of one of the `MERGE_POLICIES`, or a `policy(current, incoming)` function.
+    :return: The merge function.
+    """
+    if callable(policy):
+        return policy
+    try:
+        return MERGE_POLICIES[policy]
+    except (KeyError, TypeError):
+        raise RuntimeError('Unknown merge policy ' + repr(policy) + '; expected a function or one of ' +
+                           ', '.join(sorted(MERGE_POLICIES.keys())) + '.')
+
+
+def _property_merger(policy):
+    """
+    :param policy: A merge policy, or a dictionary mapping property names to merge policies. Properties missing from
+     the dictionary are merged with the `keep` policy.
+    :return: A `merge(prop, current, incoming)` function, as taken by `Node.merge_properties()`.
+    """
+    if isinstance(policy, dict):
+        policies = {prop: _merge_policy(prop_policy) for prop, prop_policy in policy.items()}
+        keep = MERGE_POLICIES['keep']
+        return lambda prop, current, incoming: policies.get(prop, keep)(current, incoming)
+    merge = _merge_policy(policy)
+    return lambda prop, current, incoming: merge(current, incoming)
+
 
 class ConceptModel:
     """
@@ -20,12 +66,45 @@ class ConceptModel:
     connected to one another in turn by **relevance edges** of a 0-to-1 scaled strength. This `ConceptModel` can then
     be associated with any number of applications. Basic bindings are provided, in particular, for a recommendation
     service using library-provided `Item` and `User` classes.
+
+    Concept properties such as `relevance` and `view_count` are kept on the `Node` objects, in the public
+    `Node.properties` dictionary, which `Item`, `User` and applications write to directly. The bulk property methods
+    (`get_properties()`, `set_properties()`, `update_property()` and `top_k()`) therefore still visit the nodes one
+    at a time. `watsongraph.compact.CompactConceptModel` keeps every property in a typed column instead, and runs the
+    same methods vectorized over it. Use it for models large enough for per-node property access to matter.
     """
 
     """
     The model itself is stored in the form of a `networkx.Graph` directed graph.
     """
-    graph = None
+    _graph = None
+
+    """
+    A `concept -> Node` dictionary over the nodes of the graph, kept in sync with every change to the graph so that
+    finding the `Node` of a concept takes constant time.
+    """
+    _index = None
+
+    """
+    A `concept -> {level: limit}` dictionary recording which concepts have been augmented, and with which parameters,
+    so that augmenting them again with the same `level` and the same or a smaller `limit` can be skipped. Only
+    concepts whose expansion is still whole are recorded: removing a concept forgets both it and its neighbors.
+    """
+    _augmented = None
+
+    """
+    Provenance records of augmentation: a `concept -> {related concept: None}` dictionary of the concepts each
+    augmented concept's expansion brought into the model, so that `abridge()` can undo an expansion locally, and
+    its inverse, a `concept -> {augmented concept, ...}` dictionary of the expansions each concept belongs to.
+    """
+    _expansions = None
+    _expanded_from = None
+
+    """
+    A `concept -> {reference, ...}` dictionary of references held on concepts by something other than augmentation,
+    e.g. by user feedback; see `add_reference()`.
+    """
+    _references = None
 
     def __init__(self, list_of_concepts=None):
         """
@@ -41,7 +120,128 @@ class ConceptModel:
         if list_of_concepts:
             for concept_label in list_of_concepts:
                 mixin_concept = Node(concept_label)
-                self.graph.add_node(mixin_concept)
+                self._add_node(mixin_concept)
+
+    @property
+    def graph(self):
+        """
+        The `networkx.Graph` of `Node` objects backing the model. Assigning a new graph re-indexes it.
+        """
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+        self._reindex()
+        # Nothing is known about what the new graph's concepts have been augmented with.
+        self._augmented = dict()
+        self._expansions = dict()
+        self._expanded_from = dict()
+        self._references = dict()
+
+    def _reindex(self):
+        self._index = {node.concept: node for node in self._graph.nodes()}
+
+    def _sync_index(self):
+        """
+        Guards against the graph having been changed directly (e.g. `model.graph.add_node(...)`) rather than through
+        the model, which the index cannot see.
+        """
+        if len(self._index) != self._graph.number_of_nodes():
+            self._reindex()
+
+    def _add_node(self, node):
+        """
+        Adds a `Node` to the graph, unless a node for its concept is already present.
+
+        :return: The `Node` of the concept in the graph.
+        """
+        existing = self._index.get(node.concept)
+        if existing is not None:
+            return existing
+        self._graph.add_node(node)
+        self._index[node.concept] = node
+        return node
+
+    def _remove_node(self, node):
+        # Any neighbor that was augmented no longer has its whole expansion in the model.
+        for neighbor in self._graph[node]:
+            self._augmented.pop(neighbor.concept, None)
+        self._augmented.pop(node.concept, None)
+        self._forget_expansion(node.concept)
+        for source in self._expanded_from.pop(node.concept, ()):
+            self._expansions[source].pop(node.concept, None)
+        self._references.pop(node.concept, None)
+        self._graph.remove_node(node)
+        self._index.pop(node.concept, None)
+
+    def _record_expansion(self, concept, related_concepts):
+        """
+        Records that augmenting `concept` brought the given related concepts into the model.
+        """
+        expansion = self._expansions.setdefault(concept, dict())
+        for related_concept in related_concepts:
+            expansion[related_concept] = None
+            self._expanded_from.setdefault(related_concept, set()).add(concept)
+
+    def _forget_expansion(self, concept):
+        """
+        Drops the provenance record of the expansion of `concept`, if there is one.
+        """
+        for related_concept in self._expansions.pop(concept, ()):
+            sources = self._expanded_from.get(related_concept)
+            if sources is not None:
+                sources.discard(concept)
+                if not sources:
+                    del self._expanded_from[related_concept]
+
+    def add_reference(self, concept, reference):
+        """
+        Marks a concept as referenced by something other than augmentation, e.g. the name of an `Item` a user has
+        expressed interest in, so that `abridge(..., keep_shared=True)` keeps it.
+
+        :param concept: The concept being referenced, which must be in the model.
+        :param reference: A hashable identifying what references it.
+        """
+        self.get_node(concept)
+        self._references.setdefault(concept, set()).add(reference)
+
+    def remove_reference(self, concept, reference):
+        """
+        Drops a reference added by `add_reference()`, if it is held.
+
+        :param concept: The concept being referenced.
+        :param reference: What references it.
+        """
+        references = self._references.get(concept)
+        if references is not None:
+            references.discard(reference)
+            if not references:
+                del self._references[concept]
+
+    def references(self, concept):
+        """
+        :return: The set of references held on the concept through `add_reference()`.
+        """
+        return frozenset(self._references.get(concept, ()))
+
+    def is_augmented(self, concept, level=0, limit=50):
+        """
+        :return: Whether `concept` has already been augmented with the given `level` and the same or a larger
+         `limit`, in which case augmenting it again would add nothing.
+        """
+        return concept in self._index and self._augmented.get(concept, dict()).get(level, -1) >= limit
+
+    def _record_augmented(self, concept, level, limit):
+        limits = self._augmented.setdefault(concept, dict())
+        limits[level] = max(limit, limits.get(level, limit))
+
+    def __contains__(self, concept):
+        """
+        :return: Whether or not the given concept is in the `ConceptModel`.
+        """
+        self._sync_index()
+        return concept in self._index
 
     ###################################
     # Setters, getters, and printers. #
@@ -56,16 +256,35 @@ class ConceptModel:
     def concepts(self):
         """
 
-        :return: Returns a sorted list of all concepts in the `ConceptModel`.
+        :return: Returns a sorted list of all concepts in the `ConceptModel`. Use `concept_set()` instead for
+         membership tests and unordered iteration.
         """
-        return sorted([concept.concept for concept in self.nodes()])
+        return sorted(self.concept_set())
+
+    def concept_set(self):
+        """
+        :return: A live, set-like view of the concepts in the `ConceptModel`, which supports constant-time membership
+         tests and set operations (`&`, `|`, `-`) without copying or sorting anything. Copy it (e.g. with `list()`)
+         before changing the model while iterating over it.
+        """
+        self._sync_index()
+        return self._index.keys()
 
     def edges(self):
         """
-        :return: Returns a list of all `(concept, other concept, strength)` tuples in the `ConceptModel`.
+        :return: Returns a list of all `(concept, other concept, strength)` tuples in the `ConceptModel`. Use
+         `iter_edges()` instead to avoid formatting and sorting every edge.
+        """
+        return sorted([("{0:.3f}".format(weight), concept, other_concept)
+                       for weight, concept, other_concept in self.iter_edges()], reverse=True)
+
+    def iter_edges(self):
+        """
+        :return: A generator of `(strength, concept, other concept)` tuples, one per edge, in no particular order,
+         with the strength left as a number.
         """
-        return sorted([("{0:.3f}".format(self.graph[edge[0]][edge[1]]['weight']), edge[0].concept, edge[1].concept)
-                       for edge in self.graph.edges()], reverse=True)
+        return ((data['weight'], source.concept, target.concept)
+                for source, target, data in self.graph.edges(data=True))
 
     def get_node(self, concept):
         """
@@ -74,10 +293,11 @@ class ConceptModel:
         :param concept: The concept of a Concept supposedly in the ConceptModel.
         :return: The `Node` object in the `ConceptModel`, if it is found. Throws an error if it is not.
         """
-        for node in self.nodes():
-            if node.concept == concept:
-                return node
-        raise RuntimeError('Concept ' + concept + ' not found in ' + str(self))
+        self._sync_index()
+        try:
+            return self._index[concept]
+        except KeyError:
+            raise RuntimeError('Concept ' + concept + ' not found in ' + str(self))
 
     def remove(self, concept):
         """
@@ -85,7 +305,7 @@ class ConceptModel:
 
         :param concept: The concept being removed from the model.
         """
-        self.graph.remove_node(self.get_node(concept))
+        self._remove_node(self.get_node(concept))
 
     def neighborhood(self, concept):
         """
@@ -98,8 +318,9 @@ class ConceptModel:
          Note that graph theoretic convention does not consider a node to be a neighbor to itself. Thus the
          relevance tuple `(1, same_concept, same_concept)` is not included in output.
         """
-        return sorted([(self.graph[self.get_node(concept)][node]['weight'], node.concept) for node in
-                       self.graph.neighbors(self.get_node(concept))], reverse=True)
+        concept_node = self.get_node(concept)
+        return sorted([(data['weight'], node.concept) for node, data in self.graph[concept_node].items()],
+                      reverse=True)
 
     ######################
     # Parameter methods. #
@@ -121,15 +342,14 @@ class ConceptModel:
         """
         return self.concepts_by_property('view_count')
 
-    def set_view_counts(self):
+    def set_view_counts(self, enricher=None):
         """
-        Initializes the `view_count` property for all of the concepts in the `ConceptModel`.
+        Initializes the `view_count` property for all of the concepts in the `ConceptModel`. Pageviews are fetched in
+        bulk and cached for the day; see `watsongraph.pageviews`.
+
+        :param enricher: The `pageviews.PageviewsEnricher` to use. Defaults to the process-wide one.
         """
-        for node in self.nodes():
-            p = PageviewsClient().article_views("en.wikipedia", [node.concept.replace(' ', '_')])
-            p = [p[key][node.concept.replace(' ', '_')] for key in p.keys()]
-            p = int(sum([daily_view_count for daily_view_count in p if daily_view_count]) / len(p))
-            node.set_property('view_count', p)
+        (enricher if enricher is not None else watsongraph.pageviews.get_enricher()).enrich(self)
 
     def get_view_count(self, concept):
         """
@@ -160,6 +380,53 @@ class ConceptModel:
         for node in self.nodes():
             node.set_property(prop, func(node.concept))
 
+    def get_properties(self, prop, concepts=None):
+        """
+        Bulk getter for a single property.
+
+        :param prop: The property being retrieved.
+        :param concepts: The concepts to retrieve it for. Defaults to every concept in the model.
+        :return: A `concept -> value` dictionary, covering those of the concepts which have the property set.
+        """
+        nodes = self.nodes() if concepts is None else [self.get_node(concept) for concept in concepts]
+        return {node.concept: node.get_property(prop) for node in nodes if node.has_property(prop)}
+
+    def set_properties(self, prop, values):
+        """
+        Bulk setter for a single property.
+
+        :param prop: The property being set.
+        :param values: A `concept -> value` dictionary.
+        """
+        for concept, value in values.items():
+            self.get_node(concept).set_property(prop, value)
+
+    def update_property(self, prop, func):
+        """
+        Replaces the value of the `prop` property of every concept which has it set with `func(value)`. e.g.
+        `model.update_property('relevance', lambda relevance: relevance * 0.9)`.
+
+        :param prop: The property being updated.
+        :param func: The function mapping old values to new ones. `CompactConceptModel.update_property()` can also
+         apply it to a whole column at once.
+        """
+        for node in self.nodes():
+            if node.has_property(prop):
+                node.set_property(prop, func(node.get_property(prop)))
+
+    def top_k(self, prop, k):
+        """
+        Finds the `k` concepts with the highest values of a property, in O(n log k) time, without sorting the whole
+        model the way `concepts_by_property()` does. Concepts which do not have the property set are skipped.
+
+        :param prop: The property to rank concepts by.
+        :param k: The number of concepts returned.
+        :return: A list of up to `k` `(value, concept)` tuples, highest first, the values left as they are (not
+         formatted). This is the same as the first `k` entries of `concepts_by_property(prop)`.
+        """
+        return heapq.nlargest(k, ((node.get_property(prop), node.concept) for node in self.nodes()
+                                  if node.has_property(prop)))
+
     ##################
     # Graph methods. #
     ##################
@@ -170,18 +437,68 @@ class ConceptModel:
 
         :param concept: Concept to be added to the model.
         """
-        self.graph = nx.compose(self.graph, ConceptModel([concept]).graph)
+        self._add_node(Node(concept))
 
-    def merge_with(self, mixin_concept_model):
+    def merge_with(self, mixin_concept_model, node_policy='keep', edge_policy='overwrite'):
         """
-        Merges the given graph into the current one. The nx.compose method used here compares the hashes of the
-        Concept objects being merged, and hashes are overwritten to map to labels. e.g. `A = Concept('IBM')` and `B =
-        Concept('IBM')` have the same `__hash__()`, even though the objects are different, so they will merge into
-        one when composed.
+        Merges the given graph into the current one, in place. Nodes are matched up by concept (`A = Node('IBM')`
+        and `B = Node('IBM')` are equal and hash alike, even though the objects are different), so the work done is
+        proportional to the size of the mixin rather than to that of the current model.
 
-        :param mixin_concept_model: The `ConceptModel` object that is being folded into the current object.
+        Concepts new to the model are added as copies of the mixin's nodes, so the two models never share `Node`
+        objects. Concepts already in the model keep their `Node`: properties only the mixin's node has are copied
+        over, and properties both have are reconciled by `node_policy`. Likewise edges new to the model are added,
+        and the weights of edges both have are reconciled by `edge_policy`.
+
+        A policy is one of `'keep'` (keep the current value), `'overwrite'` (take the mixin's value), `'max'`,
+        `'mean'`, or a `policy(current value, mixin value)` function returning the merged value.
+
+        :param mixin_concept_model: The `ConceptModel` object that is being folded into the current object. It is
+         left unchanged.
+
+        :param node_policy: The policy applied to node properties, or a dictionary mapping property names to
+         policies (e.g. `{'relevance': 'max'}`), in which case unlisted properties are kept.
+
+        :param edge_policy: The policy applied to edge weights.
         """
-        self.graph = nx.compose(self.graph, mixin_concept_model.graph)
+        self._merge_graph(mixin_concept_model.graph, node_policy=node_policy, edge_policy=edge_policy)
+        # Whatever was augmented in the mixin has its expansion in the current model now too.
+        for concept, limits in mixin_concept_model._augmented.items():
+            for level, limit in limits.items():
+                self._record_augmented(concept, level, limit)
+        for concept, expansion in mixin_concept_model._expansions.items():
+            self._record_expansion(concept, expansion)
+        for concept, references in mixin_concept_model._references.items():
+            self._references.setdefault(concept, set()).update(references)
+
+    def _merge_graph(self, mixin_graph, node_policy='keep', edge_policy='overwrite'):
+        """
+        Merges a `networkx.Graph` of `Node` objects into the model in place. See `merge_with()`.
+        """
+        merge_properties = _property_merger(node_policy)
+        merge_edge = _merge_policy(edge_policy)
+        self._sync_index()
+        # Maps each mixin node to the node standing for its concept in the model.
+        local = dict()
+        for mixin_node, data in mixin_graph.nodes(data=True):
+            node = self._index.get(mixin_node.concept)
+            if node is None:
+                node = self._add_node(mixin_node.copy())
+            elif node is not mixin_node:
+                node.merge_properties(mixin_node, merge_properties)
+            if data:
+                self._graph.add_node(node, **data)
+            local[mixin_node] = node
+        adjacency = self._graph.adj
+        for mixin_source, mixin_target, data in mixin_graph.edges(data=True):
+            source, target = local[mixin_source], local[mixin_target]
+            current = adjacency[source].get(target)
+            if current is None:
+                self._graph.add_edge(source, target, **data)
+            else:
+                # The same dictionary is shared by both directions of an undirected edge.
+                for key, value in data.items():
+                    current[key] = merge_edge(current[key], value) if key in current else value
 
     def copy(self):
         """
@@ -192,8 +509,78 @@ class ConceptModel:
         """
         ret = ConceptModel()
         ret.graph = self.graph.copy()
+        ret._augmented = {concept: dict(limits) for concept, limits in self._augmented.items()}
+        for concept, expansion in self._expansions.items():
+            ret._record_expansion(concept, expansion)
+        ret._references = {concept: set(references) for concept, references in self._references.items()}
         return ret
 
+    def _augment_nodes(self, nodes, level=0, limit=50, workers=1):
+        """
+        Augments the ConceptModel by mining each of the given nodes in turn. The related concepts of every node are
+        fetched first, in parallel if `workers` is greater than one, and the discovered nodes and edges are then
+        merged into the graph in a single pass, in the order the nodes were given. The result is therefore the same
+        as that of augmenting the nodes one at a time.
+
+        :param nodes: The nodes to be expanded. Note that these nodes need not already be present in the graph.
+        :param level: The limit placed on the depth of the graph. Passed directly to the IBM Watson API call.
+        :param limit: a cutoff placed on the number of related concepts to be returned. Passed directly to the IBM
+         Watson API call.
+        :param workers: The number of related concept lookups made concurrently.
+        """
+        nodes = [node for node in nodes if not self.is_augmented(node.concept, level, limit)]
+
+        def fetch(concept_node):
+            return watsongraph.event_insight_lib.get_related_concepts(concept_node.concept, level=level, limit=limit)
+
+        if workers > 1 and len(nodes) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(nodes))) as executor:
+                responses = list(executor.map(fetch, nodes))
+        else:
+            responses = [fetch(node) for node in nodes]
+        self._apply_related_concepts(nodes, responses, level, limit)
+
+    async def _aaugment_nodes(self, nodes, level=0, limit=50):
+        """
+        The awaitable counterpart of `_augment_nodes()`. Every related concept lookup is issued at once; how many
+        are actually in flight is bounded by the `event_insight_lib.AsyncWatsonClient` in use.
+        """
+        nodes = [node for node in nodes if not self.is_augmented(node.concept, level, limit)]
+        responses = await asyncio.gather(*[
+            watsongraph.event_insight_lib.aget_related_concepts(node.concept, level=level, limit=limit)
+            for node in nodes])
+        self._apply_related_concepts(nodes, responses, level, limit)
+
+    def _apply_related_concepts(self, nodes, responses, level=None, limit=None):
+        """
+        Merges the related concepts fetched for each of the given nodes into the graph, in order, and records the
+        nodes as augmented.
+
+        :param nodes: The nodes which were expanded.
+        :param responses: The raw `get_related_concepts` responses for each of the nodes.
+        :param level: The `level` the responses were fetched with. `None` if the responses are incomplete, in which
+         case the nodes are not recorded as augmented.
+        :param limit: The `limit` the responses were fetched with.
+        """
+        mixin_graph = nx.Graph()
+        expansions = []
+        for node, related_concepts_raw in zip(nodes, responses):
+            source_node = self._add_node(node)
+            related_concepts = []
+            for raw_concept in related_concepts_raw['concepts']:
+                # Avoid adding the `A-A` multi-edge returned by the raw `get_related_concepts`.
+                if raw_concept['concept']['label'] != node.concept:
+                    new_node = Node(raw_concept['concept']['label'])
+                    mixin_graph.add_edge(source_node, new_node, weight=raw_concept['score'])
+                    related_concepts.append(new_node.concept)
+            expansions.append((node.concept, related_concepts))
+        self._merge_graph(mixin_graph)
+        for concept, related_concepts in expansions:
+            self._record_expansion(concept, related_concepts)
+        if level is not None:
+            for node in nodes:
+                self._record_augmented(node.concept, level, limit)
+
     def augment_by_node(self, node, level=0, limit=50):
         """
         Augments the ConceptModel by mining the given node and adding newly discovered nodes to the resultant graph.
@@ -205,17 +592,13 @@ class ConceptModel:
         :param limit: a cutoff placed on the number of related concepts to be returned. This parameter is passed
          directly to the IBM Watson API call.
         """
-        mixin = ConceptModel()
-        related_concepts_raw = watsongraph.event_insight_lib.get_related_concepts(node.concept, level=level,
-                                                                                  limit=limit)
-        if node not in self.nodes():
-            self.graph.add_node(node)
-        for raw_concept in related_concepts_raw['concepts']:
-            # Avoid adding the `A-A` multi-edge returned by the raw `get_related_concepts`.
-            if raw_concept['concept']['label'] != node.concept:
-                new_node = Node(raw_concept['concept']['label'])
-                mixin.graph.add_edge(self.get_node(node.concept), new_node, weight=raw_concept['score'])
-        self.merge_with(mixin)
+        self._augment_nodes([node], level=level, limit=limit)
+
+    async def aaugment_by_node(self, node, level=0, limit=50):
+        """
+        The awaitable counterpart of `augment_by_node()`.
+        """
+        await self._aaugment_nodes([node], level=level, limit=limit)
 
     def augment(self, concept, level=0, limit=50):
         """
@@ -233,9 +616,20 @@ class ConceptModel:
         """
         self.augment_by_node(Node(concept), level=level, limit=limit)
 
-    def abridge_by_node(self, node, level=0, limit=50):
+    async def aaugment(self, concept, level=0, limit=50):
         """
-        Performs the inverse operation of augment by removing the expansion of the given node from the graph.
+        The awaitable counterpart of `augment()`.
+        """
+        await self.aaugment_by_node(Node(concept), level=level, limit=limit)
+
+    def abridge_by_node(self, node, level=0, limit=50, keep_shared=False):
+        """
+        Performs the inverse operation of augment by removing the expansion of the given node from the graph: the
+        node itself and the related concepts its augmentation brought in.
+
+        The model records which concepts each augmentation brought in, so this is normally done locally, in time
+        proportional to the size of the expansion. Only when there is no such record (e.g. the node was never
+        augmented by this model) is the expansion fetched from the IBM Watson API again.
 
         :param node: The node to be abridged. Note that this node need not already be present in the graph.
         :param level: The limit placed on the depth of the graph. A limit of 0 is highest, corresponding with the
@@ -244,13 +638,36 @@ class ConceptModel:
 
         :param limit: a cutoff placed on the number of related concepts to be returned. This parameter is passed
          directly to the IBM Watson API call.
+
+        :param keep_shared: If `True`, concepts which also belong to another recorded expansion, which have an
+         expansion of their own, or which hold references (see `add_reference()`) are kept.
+        """
+        self._sync_index()
+        if node.concept in self._expansions:
+            expansion = [node.concept] + list(self._expansions[node.concept])
+        else:
+            inverse = ConceptModel()
+            inverse.augment_by_node(node, level=level, limit=limit)
+            expansion = list(inverse.concept_set())
+        if keep_shared:
+            expansion = [concept for concept in expansion if not self._is_shared(concept, node.concept)]
+            # Whatever is kept, the expansion itself is undone.
+            self._forget_expansion(node.concept)
+            self._augmented.pop(node.concept, None)
+        for concept in expansion:
+            concept_node = self._index.get(concept)
+            if concept_node is not None:
+                self._remove_node(concept_node)
+
+    def _is_shared(self, concept, source):
+        """
+        :return: Whether `concept` is referenced by anything other than the expansion of `source`.
         """
-        inverse = ConceptModel()
-        inverse.augment_by_node(node, level=level, limit=limit)
-        for concept_node in [node for node in self.nodes() if node in inverse.graph.nodes()]:
-            self.graph.remove_node(concept_node)
+        return (bool(self._expanded_from.get(concept, set()) - {source}) or
+                (concept != source and concept in self._expansions) or
+                concept in self._references)
 
-    def abridge(self, concept, level=0, limit=50):
+    def abridge(self, concept, level=0, limit=50, keep_shared=False):
         """
         Performs the inverse operation of augment by removing the expansion of the given concept from the graph.
         This method is an externally-facing wrapper for the internal `abridge_by_node()` method: the difference is
@@ -264,13 +681,20 @@ class ConceptModel:
 
         :param limit: a cutoff placed on the number of related concepts to be returned. This parameter is passed
          directly to the IBM Watson API call.
+
+        :param keep_shared: If `True`, concepts which other expansions or references also account for are kept. See
+         `abridge_by_node()`.
         """
-        self.abridge_by_node(Node(concept), level=level, limit=limit)
+        self.abridge_by_node(Node(concept), level=level, limit=limit, keep_shared=keep_shared)
 
-    def explode(self, level=0, limit=50):
+    def explode(self, level=0, limit=50, workers=1, depth=1):
         """
         Explodes a graph by augmenting every concept already in it. Warning: for sufficiently large graphs this is a
-        very slow operation! See also the expand() method for a more focused version of this operation.
+        very slow operation! Pass `workers` to fetch related concepts in parallel. See also the expand() method for a
+        more focused version of this operation.
+
+        Concepts which have already been augmented with the same `level` and the same or a larger `limit` are not
+        fetched again, so exploding a model twice costs nothing the second time.
 
         :param level: The limit placed on the depth of the graph. A limit of 0 is highest, corresponding with the
          most popular articles; a limit of 5 is the broadest and graphs to the widest cachet of articles. This
@@ -278,14 +702,50 @@ class ConceptModel:
 
         :param limit: a cutoff placed on the number of related concepts to be returned. This parameter is passed
          directly to the IBM Watson API call.
-        """
-        for concept_node in self.nodes():
-            self.augment_by_node(concept_node, level=level, limit=limit)
 
-    def expand(self, level=0, limit=50, n=1):
+        :param workers: The number of API calls made concurrently. The result is the same regardless. For best
+         results the connection pool of the `event_insight_lib.WatsonClient` in use should be at least this large.
+
+        :param depth: The number of hops to explode the graph by. Each hop after the first augments the neighbors of
+         the concepts augmented by the hop before it, skipping those already augmented, so that `depth=k` reaches
+         every concept within `k` hops of the model while fetching each concept's related concepts only once.
+        """
+        frontier = list(self.nodes())
+        visited = set()
+        for hop in range(depth):
+            self._augment_nodes(frontier, level=level, limit=limit, workers=workers)
+            if hop + 1 < depth:
+                frontier = self._next_frontier(frontier, visited)
+
+    async def aexplode(self, level=0, limit=50, depth=1):
+        """
+        The awaitable counterpart of `explode()`. Related concepts for every node of a hop are fetched concurrently.
+        """
+        frontier = list(self.nodes())
+        visited = set()
+        for hop in range(depth):
+            await self._aaugment_nodes(frontier, level=level, limit=limit)
+            if hop + 1 < depth:
+                frontier = self._next_frontier(frontier, visited)
+
+    def _next_frontier(self, frontier, visited):
+        """
+        :param frontier: The nodes augmented by one hop of `explode()`.
+        :param visited: The concepts of every earlier frontier, which the concepts of `frontier` are added to.
+        :return: The nodes of the next hop: the neighbors of `frontier` which have not been part of a frontier yet.
+        """
+        visited.update(node.concept for node in frontier)
+        next_frontier = dict()
+        for node in frontier:
+            for neighbor in self.graph[node]:
+                if neighbor.concept not in visited:
+                    next_frontier[neighbor] = None
+        return list(next_frontier)
+
+    def expand(self, level=0, limit=50, n=1, workers=1):
         """
         Expands a graph by augmenting concepts with only one (or no) edge. Warning: for sufficiently large graphs this
-        is a slow operation! See also the expand() method for a less focused version of this operation.
+        is a slow operation! See also the explode() method for a less focused version of this operation.
 
         :param level: The limit placed on the depth of the graph. A limit of 0 is highest, corresponding with the
          most popular articles; a limit of 5 is the broadest and graphs to the widest cachet of articles. This
@@ -295,9 +755,102 @@ class ConceptModel:
          directly to the IBM Watson API call.
 
         :param n: The cutoff for the number of neighbors a node can have.
+
+        :param workers: The number of API calls made concurrently. The result is the same regardless.
+        """
+        self._augment_nodes([node for node in self.nodes() if self.graph.degree(node) <= n], level=level,
+                            limit=limit, workers=workers)
+
+    async def aexpand(self, level=0, limit=50, n=1):
+        """
+        The awaitable counterpart of `expand()`. Related concepts for every node are fetched concurrently.
+        """
+        await self._aaugment_nodes([node for node in self.nodes() if self.graph.degree(node) <= n], level=level,
+                                   limit=limit)
+
+    def expand_iter(self, level=0, limit=50, max_calls=None, deadline=None, max_nodes=None, concepts=None,
+                    workers=1, cancel=None):
         """
-        for concept_node in [node for node in self.nodes() if len(self.graph.neighbors(node)) <= n]:
-            self.augment_by_node(concept_node, level=level, limit=limit)
+        Expands the graph best-first, under a budget, yielding each concept as it is added. Unlike `explode()` and
+        `expand()`, which augment concepts wholesale, this augments the most promising concept first, then the next,
+        and can be stopped at any point, leaving a partial but well-formed model: e.g. a request handler can run
+        `for concept in model.expand_iter(max_calls=200, deadline=2.0, max_nodes=5000): ...` and answer with whatever
+        it has once the budget runs out, or simply `break` out of the loop.
+
+        Concepts are augmented in order of priority. The priority of a starting concept is its `relevance`, or 1 if it
+        has none; a concept discovered through an edge has the priority of the concept it was discovered from times
+        the strength of the edge, keeping the highest such value if it is discovered more than once. Each concept is
+        augmented at most once per call.
+
+        :param level: The limit placed on the depth of the graph. Passed directly to the IBM Watson API call.
+
+        :param limit: a cutoff placed on the number of related concepts to be returned. Passed directly to the IBM
+         Watson API call.
+
+        :param max_calls: The maximum number of related concept lookups made. `None` means no limit.
+
+        :param deadline: The number of seconds after which expansion stops. Lookups still in flight at that point are
+         abandoned (their results still reach the cache). `None` means no limit.
+
+        :param max_nodes: The size, in concepts, past which the model is not grown. `None` means no limit.
+
+        :param concepts: The concepts to start expanding from, which must be in the model. Defaults to every concept
+         in the model.
+
+        :param workers: The number of lookups made at once, from the top of the frontier.
+
+        :param cancel: An optional `threading.Event` which, once set from another thread, stops the expansion.
+
+        :return: A generator of the concepts added to the model, in the order in which they are added.
+        """
+        frontier = _ExpansionFrontier(self, level, limit, concepts, max_calls, deadline, max_nodes, cancel)
+
+        def fetch(concept):
+            return watsongraph.event_insight_lib.get_related_concepts(concept, level=level, limit=limit)
+
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 or deadline is not None else None
+        try:
+            while not frontier.done():
+                batch = frontier.next_batch(workers)
+                if not batch:
+                    break
+                if executor is None:
+                    responses = [fetch(concept) for concept, priority in batch]
+                else:
+                    futures = [executor.submit(fetch, concept) for concept, priority in batch]
+                    finished, pending = wait(futures, timeout=frontier.remaining_time())
+                    if pending:
+                        break
+                    responses = [future.result() for future in futures]
+                for concept in frontier.apply(batch, responses):
+                    yield concept
+        finally:
+            if executor is not None:
+                # Do not wait on lookups which overran the deadline, or which a closed generator no longer needs.
+                executor.shutdown(wait=False)
+
+    async def aexpand_iter(self, level=0, limit=50, max_calls=None, deadline=None, max_nodes=None, concepts=None,
+                           workers=10, cancel=None):
+        """
+        The asynchronous generator counterpart of `expand_iter()`, used as `async for concept in
+        model.aexpand_iter(...)`. Cancelling the task iterating over it also stops the expansion.
+
+        :param workers: The number of lookups made at once, from the top of the frontier.
+        """
+        frontier = _ExpansionFrontier(self, level, limit, concepts, max_calls, deadline, max_nodes, cancel)
+        while not frontier.done():
+            batch = frontier.next_batch(workers)
+            if not batch:
+                break
+            lookups = asyncio.gather(*[
+                watsongraph.event_insight_lib.aget_related_concepts(concept, level=level, limit=limit)
+                for concept, priority in batch])
+            try:
+                responses = await asyncio.wait_for(lookups, timeout=frontier.remaining_time())
+            except asyncio.TimeoutError:
+                break
+            for concept in frontier.apply(batch, responses):
+                yield concept
 
     def intersection_with_by_nodes(self, mixin_concept_model):
         """
@@ -305,14 +858,14 @@ class ConceptModel:
 
         :return: A list of overlapping concept nodes with their relevance parameters set to average relevance.
         """
-        overlapping_concept_nodes = [node for node in self.nodes() if node in mixin_concept_model.nodes()]
+        overlapping_concept_nodes = [node for node in self.nodes() if node.concept in mixin_concept_model]
         for concept_node in overlapping_concept_nodes:
-            if 'relevance' in concept_node.properties.keys():
+            if concept_node.has_property('relevance'):
                 concept_node.set_relevance((concept_node.properties['relevance'] + mixin_concept_model.get_node(
                         concept_node.concept).properties['relevance']) / 2)
         return overlapping_concept_nodes
 
-    def add_edges(self, source_concept, list_of_target_concepts, prune=False):
+    def add_edges(self, source_concept, list_of_target_concepts, prune=False, workers=1):
         """
         Given a source concept and a list of target concepts, creates relevance edges between the source and the
         targets and adds them to the graph.
@@ -326,32 +879,51 @@ class ConceptModel:
          Apple Inc.)` and `(0.5, IBM, Apple)`. We as humans know that these are totally not equal comparisons,
          but the system does not! When this parameter is set to True (it is set to False by default) only edges
          with a correlation higher than 0.5 are added.
+
+        :param workers: Long target lists are fetched in several URL-length-bounded batches; this is the number of
+         batches fetched concurrently.
+        """
+        if not list_of_target_concepts:
+            return
+        raw_scores = watsongraph.event_insight_lib.get_relation_scores(source_concept, list_of_target_concepts,
+                                                                       workers=workers)
+        self._apply_relation_scores([(source_concept, raw_scores)], prune=prune)
+
+    async def aadd_edges(self, source_concept, list_of_target_concepts, prune=False):
+        """
+        The awaitable counterpart of `add_edges()`.
+        """
+        if not list_of_target_concepts:
+            return
+        raw_scores = await watsongraph.event_insight_lib.aget_relation_scores(source_concept, list_of_target_concepts)
+        self._apply_relation_scores([(source_concept, raw_scores)], prune=prune)
+
+    def _apply_relation_scores(self, scored_sources, prune=False):
+        """
+        Adds the edges described by raw `get_relation_scores` responses to the graph, in a single update. See
+        `add_edges()`.
+
+        :param scored_sources: A list of `(source concept, raw get_relation_scores response)` tuples.
+        :param prune: Whether or not to skip edges with a correlation of 0.5 or less.
         """
-        raw_scores = watsongraph.event_insight_lib.get_relation_scores(source_concept, list_of_target_concepts)
         mixin_graph = nx.Graph()
-        mixin_source_node = Node(source_concept)
-        own_concepts = self.concepts()
-        for raw_concept in raw_scores['scores']:
-            # Check that we pass relevance.
-            if not prune or (prune and raw_concept['score'] > 0.5):
-                # Parse the returned nodal concept text into the concept: ".../Watson_(computer)"->"Watson (computer)".
-                raw_concept['concept'] = raw_concept['concept'].replace('_', ' ')
-                mixin_concept = raw_concept['concept'][raw_concept['concept'].rfind('/') + 1:]
-                # We want to keep our graphs simple, so explicitly avoid concept-to-concept loops. Why is the user
-                # asking for something like that anyway?
-                if mixin_concept != source_concept:
-                    mixin_target_node = Node(mixin_concept)
-                    # We might want to be examining the relationship between two nodes that are already in the model.
-                    # For example, we might call `ibm = ConceptModel(['IBM', 'Watson (computer)]); ibm.explode_edges()`.
-                    # In this case `nx.compose` will override the existing Node with our new Node. But what if our
-                    # old Node had properties assigned to it? Then these properties are deleted!
-                    # To account for this subtlety we check to see if mixin_concept is already in the model, and,
-                    # if it is, we explicitly attach its properties to the new Node it will be overwritten by.
-                    if mixin_concept in own_concepts:
-                        mixin_target_node.properties = self.get_node(mixin_concept).properties
-                    # Note that this is the `nx.add_edge()` method, not the `conceptmodel.add_edge()` one.
-                    mixin_graph.add_edge(mixin_source_node, mixin_target_node, weight=raw_concept['score'])
-        self.graph = nx.compose(self.graph, mixin_graph)
+        for source_concept, raw_scores in scored_sources:
+            mixin_source_node = Node(source_concept)
+            for raw_concept in raw_scores['scores']:
+                # Check that we pass relevance.
+                if not prune or (prune and raw_concept['score'] > 0.5):
+                    # Parse the returned nodal concept text into the concept: ".../Watson_(computer)"->"Watson
+                    # (computer)".
+                    mixin_concept = raw_concept['concept'].replace('_', ' ')
+                    mixin_concept = mixin_concept[mixin_concept.rfind('/') + 1:]
+                    # We want to keep our graphs simple, so explicitly avoid concept-to-concept loops. Why is the user
+                    # asking for something like that anyway?
+                    if mixin_concept != source_concept:
+                        mixin_target_node = Node(mixin_concept)
+                        # Note that this is the `nx.add_edge()` method, not the `conceptmodel.add_edge()` one.
+                        mixin_graph.add_edge(mixin_source_node, mixin_target_node, weight=raw_concept['score'])
+        # Nodes already in the model, and their properties, are kept as they are; see `merge_with()`.
+        self._merge_graph(mixin_graph)
 
     def add_edge(self, source_concept, target_concept, prune=False):
         """
@@ -369,41 +941,171 @@ class ConceptModel:
         """
         self.add_edges(source_concept, [target_concept], prune=prune)
 
-    def explode_edges(self, prune=False):
+    async def aadd_edge(self, source_concept, target_concept, prune=False):
+        """
+        The awaitable counterpart of `add_edge()`.
+        """
+        await self.aadd_edges(source_concept, [target_concept], prune=prune)
+
+    def explode_edges(self, prune=False, workers=1, progress=None):
         """
         Calls `add_edges()` on everything in the model, all at once. Like `explode()` but for concept edges!
 
+        Every concept is scored against every concept after it. The target lists are split into URL-length-bounded
+        batches, the batches are fetched (concurrently, if `workers` is greater than one), and all of the resulting
+        edges are then added to the graph in a single update.
+
         :param prune: Watson returns correlations for edges which it does not know enough about as 0.5,
          a lack of extensibility which can cause sizable issues: for example you might have both `(0.5, IBM,
          Apple Inc.)` and `(0.5, IBM, Apple)`. We as humans know that these are totally not equal comparisons,
          but the system does not! When this parameter is set to True (it is set to False by default) only edges with
          a correlation higher than 0.5 are added.
+
+        :param workers: The number of API calls made concurrently.
+
+        :param progress: An optional `progress(completed, total)` callable, called with the number of batches
+         fetched so far and the total number of batches every time a batch completes.
         """
-        c_list = self.concepts()
-        for concept in self.concepts():
-            c_list.remove(concept)
-            if c_list:
-                self.add_edges(concept, c_list, prune=prune)
+        jobs = self._relation_score_jobs(watsongraph.event_insight_lib.get_client().base_url)
+
+        def fetch(job):
+            return watsongraph.event_insight_lib.get_relation_scores(job[0], job[1])
+
+        responses = [None] * len(jobs)
+        if workers > 1 and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                futures = {executor.submit(fetch, job): i for i, job in enumerate(jobs)}
+                for completed, future in enumerate(as_completed(futures), start=1):
+                    responses[futures[future]] = future.result()
+                    if progress:
+                        progress(completed, len(jobs))
+        else:
+            for i, job in enumerate(jobs):
+                responses[i] = fetch(job)
+                if progress:
+                    progress(i + 1, len(jobs))
+        self._apply_relation_scores([(job[0], response) for job, response in zip(jobs, responses)], prune=prune)
+
+    async def aexplode_edges(self, prune=False):
+        """
+        The awaitable counterpart of `explode_edges()`. Every batch of relation scores is fetched concurrently.
+        """
+        jobs = self._relation_score_jobs(watsongraph.event_insight_lib.get_async_client().base_url)
+        responses = await asyncio.gather(*[watsongraph.event_insight_lib.aget_relation_scores(source, targets)
+                                           for source, targets in jobs])
+        self._apply_relation_scores([(job[0], response) for job, response in zip(jobs, responses)], prune=prune)
+
+    def _relation_score_jobs(self, base_url):
+        """
+        :param base_url: The graph endpoint of the client the batches are fetched through.
+        :return: The `(source concept, batch of target concepts)` pairs fetched by `explode_edges()`, which score
+         each concept against every concept sorted after it.
+        """
+        concepts = self.concepts()
+        jobs = []
+        for i, concept in enumerate(concepts):
+            for batch in watsongraph.event_insight_lib.relation_scores_batches(concept, concepts[i + 1:],
+                                                                                base_url=base_url):
+                jobs.append((concept, batch))
+        return jobs
 
     ###############
     # IO methods. #
     ###############
 
-    def to_json(self):
+    def to_json(self, records=True):
         """
         Returns the JSON representation of a ConceptModel. Counter-operation to `load_from_dict()`.
 
+        The representation is the node-link format of the installed version of networkx, extended with the
+        model-level records of what has been augmented, the provenance of each expansion and the references held on
+        concepts, under the `augmented`, `expansions` and `references` keys, each of which is left out when it is
+        empty. `networkx.node_link_graph()` ignores these keys, and `load_from_json()` restores them.
+
         :param self: A ConceptModel.
 
+        :param records: If `False`, the records are left out, so that the output is exactly that of
+         `networkx.node_link_data()`.
+
         :return: The nx dictionary representation of the ConceptModel.
         """
-        flattened_model = nx.relabel_nodes(self.graph, {node: node.concept for node in self.nodes()})
-        data_repr = json_graph.node_link_data(flattened_model)
-        for node in data_repr['nodes']:
-            for prop in self.get_node(node['id']).properties.keys():
-                node[prop] = self.get_node(node['id']).properties[prop]
+        data_repr = dict()
+        for key, value in self._json_sections(records=records):
+            data_repr[key] = list(value) if key in ('nodes', _node_link_schema()[0]) else value
         return data_repr
 
+    def _json_sections(self, records=True):
+        """
+        Builds the JSON representation of the model in a single pass over its nodes and edges, in the node-link
+        format written by the installed version of networkx (see `_node_link_schema()`), followed by the model-level
+        records unless `records` is `False` (see `to_json()`).
+
+        :return: A generator of the `(key, value)` pairs of the representation, in order, in which the values of the
+         `nodes` and links entries are themselves generators, so that they can be written out one at a time.
+        """
+        links_key, links_by_index, template = _node_link_schema()
+        nodes = list(self.nodes())
+        # Older networkx releases refer to the ends of a link by their position in the node list.
+        ends = {node: i for i, node in enumerate(nodes)} if links_by_index else {node: node.concept for node in nodes}
+        adjacency = self.graph._adj if hasattr(self.graph, '_adj') else self.graph.adj
+        for key in template:
+            if key == 'nodes':
+                yield key, (dict([('id', node.concept)] + list(node._properties.items())) if node._properties
+                            else {'id': node.concept} for node in nodes)
+            elif key == links_key:
+                yield key, self._json_links(nodes, adjacency, ends)
+            elif key == 'graph':
+                yield key, dict(self.graph.graph) if isinstance(template[key], dict) else list(self.graph.graph.items())
+            else:
+                yield key, template[key]
+        if records:
+            for key, value in self._records().items():
+                yield key, value
+
+    @staticmethod
+    def _json_links(nodes, adjacency, ends):
+        seen = set()
+        for node in nodes:
+            for neighbor, data in adjacency[node].items():
+                if neighbor not in seen:
+                    link = dict(data)
+                    link['source'], link['target'] = ends[node], ends[neighbor]
+                    yield link
+            seen.add(node)
+
+    def _records(self):
+        """
+        :return: A dictionary of the model-level records kept alongside the graph, in their serialized form, leaving
+         out those which are empty.
+        """
+        records = dict()
+        if self._augmented:
+            # `[concept, level, limit]` records of what has been augmented; see `is_augmented()`.
+            records['augmented'] = [[concept, level, limit] for concept, limits in sorted(self._augmented.items())
+                                    for level, limit in sorted(limits.items())]
+        if self._expansions:
+            # `[concept, [related concept, ...]]` provenance records; see `abridge_by_node()`.
+            records['expansions'] = [[concept, list(expansion)] for concept, expansion in
+                                     sorted(self._expansions.items())]
+        if self._references:
+            records['references'] = [[concept, sorted(references)] for concept, references in
+                                     sorted(self._references.items())]
+        return records
+
+    def _load_records(self, records):
+        """
+        Restores the model-level records serialized by `_records()`, for those of their concepts which are in the
+        model.
+        """
+        for concept, level, limit in records.get('augmented', []):
+            if concept in self._index:
+                self._record_augmented(concept, level, limit)
+        for concept, related_concepts in records.get('expansions', []):
+            self._record_expansion(concept, [related for related in related_concepts if related in self._index])
+        for concept, references in records.get('references', []):
+            if concept in self._index:
+                self._references[concept] = set(references)
+
     def load_from_json(self, data_repr):
         """
         Generates a ConceptModel out of a JSON representation. Counter-operation to `to_dict()`.
@@ -412,12 +1114,112 @@ class ConceptModel:
 
         :return: The generated ConceptModel.
         """
-        flattened_graph = json_graph.node_link_graph(data_repr)
-        m = {concept: Node(concept) for concept in flattened_graph.nodes()}
-        self.graph = nx.relabel_nodes(flattened_graph, m)
+        builder = _GraphBuilder()
         for node in data_repr['nodes']:
-            for key in [key for key in node.keys() if key != 'id']:
-                self.set_property(node['id'], key, node[key])
+            builder.add_node(node)
+        for link in data_repr.get(_node_link_schema()[0], data_repr.get('links', [])):
+            builder.add_link(link)
+        builder.graph.graph.update(data_repr.get('graph', dict()))
+        self.graph = builder.graph
+        self._load_records(data_repr)
+
+    def dump_json(self, fp, records=True):
+        """
+        Writes the JSON representation of the model (see `to_json()`) to a file, one node and one link at a time, so
+        that the whole of it never has to be held in memory at once. The output is the same as that of
+        `json.dump(model.to_json(records), fp)`. Counter-operation to `load_json()`.
+
+        :param fp: A file object open for writing in text mode.
+        :param records: If `False`, the model-level records are left out. See `to_json()`.
+        """
+        fp.write('{')
+        for n, (key, value) in enumerate(self._json_sections(records=records)):
+            fp.write((', ' if n else '') + json.dumps(key) + ': ')
+            if key == 'nodes' or key == _node_link_schema()[0]:
+                fp.write('[')
+                for i, entry in enumerate(value):
+                    fp.write((', ' if i else '') + json.dumps(entry))
+                fp.write(']')
+            else:
+                fp.write(json.dumps(value))
+        fp.write('}')
+
+    def load_json(self, fp, chunk_size=65536):
+        """
+        Replaces the contents of the model with a JSON representation read from a file, decoding and adding one node
+        and one link at a time rather than parsing the whole file into memory first. Counter-operation to
+        `dump_json()`; reads anything `load_from_json()` does.
+
+        :param fp: A file object open for reading in text mode.
+        :param chunk_size: The number of characters read from the file at a time.
+        """
+        links_key = _node_link_schema()[0]
+        builder = _GraphBuilder()
+        records = dict()
+        reader = _JSONStreamReader(fp, chunk_size)
+        for key in reader.keys():
+            if key == 'nodes':
+                for node in reader.elements():
+                    builder.add_node(node)
+            elif key == links_key or key == 'links':
+                for link in reader.elements():
+                    builder.add_link(link)
+            else:
+                records[key] = reader.value()
+        if isinstance(records.get('graph'), dict):
+            builder.graph.graph.update(records['graph'])
+        self.graph = builder.graph
+        self._load_records(records)
+
+    def save_binary(self, filename):
+        """
+        Writes the model to a file in the compact binary format of `watsongraph.binary`, which loads far faster than
+        JSON and can be queried in place through a `binary.MappedConceptModel`. Counter-operation to `load_binary()`.
+
+        :param filename: The file being written.
+        """
+        self._sync_index()
+        labels = sorted(self._index)
+        ids = {concept: i for i, concept in enumerate(labels)}
+        adjacency = self.graph._adj if hasattr(self.graph, '_adj') else self.graph.adj
+        indptr, indices, weights = [0], [], []
+        for concept in labels:
+            row = sorted((ids[neighbor.concept], data['weight'])
+                         for neighbor, data in adjacency[self._index[concept]].items())
+            indices.extend([j for j, weight in row])
+            weights.extend([weight for j, weight in row])
+            indptr.append(len(indices))
+        nodes = [self._index[concept] for concept in labels]
+        columns = dict()
+        for i, node in enumerate(nodes):
+            if node._properties:
+                for prop in node._properties:
+                    if prop not in columns:
+                        columns[prop] = ([False] * len(nodes), [None] * len(nodes))
+                    present, values = columns[prop]
+                    present[i], values[i] = True, node._properties[prop]
+        with open(filename, 'wb') as f:
+            watsongraph.binary.dump(f, labels, indptr, indices, weights, columns, metadata=self._records())
+
+    def load_binary(self, filename):
+        """
+        Replaces the contents of the model with those of a file written by `save_binary()`. Counter-operation to
+        `save_binary()`.
+
+        :param filename: The file being read.
+        """
+        with open(filename, 'rb') as f:
+            model = watsongraph.binary.BinaryModel(f.read())
+        nodes = [Node(label) for label in model.labels()]
+        for prop in model.columns:
+            for i in model.present_ids(prop):
+                nodes[i].properties[prop] = model.get(prop, i)
+        graph = nx.Graph()
+        graph.add_nodes_from(nodes)
+        graph.add_weighted_edges_from((nodes[i], nodes[j], weight) for i in range(model.n)
+                                      for j, weight in model.row(i) if i <= j)
+        self.graph = graph
+        self._load_records(model.metadata)
 
                 # def visualize(self, filename='graphistry_credentials.json'):
                 #     """
@@ -458,6 +1260,269 @@ class ConceptModel:
 #                 'to:\n\nhttps://github.com/graphistry/pygraphistry#api-key')
 
 
+_schema = None
+
+
+def _node_link_schema():
+    """
+    The node-link JSON format differs between networkx releases: older ones refer to the ends of a link by their
+    position in the node list rather than by their id, and newer ones may call the list of links something other than
+    `links`. `to_json()` writes, and `load_from_json()` reads, the format of whichever release is installed, which is
+    found out by asking it to serialize a two-node graph.
+
+    :return: A `(links key, whether links refer to nodes by position, template)` tuple, where the template is the
+     serialized graph, whose keys are in the order they are written in.
+    """
+    global _schema
+    if _schema is None:
+        graph = nx.Graph()
+        graph.add_edge('a', 'b', weight=1.0)
+        with warnings.catch_warnings():
+            # Newer releases warn that the default name of the links key is going to change.
+            warnings.simplefilter('ignore')
+            template = json_graph.node_link_data(graph)
+        links_key = [key for key in template if key not in ('directed', 'multigraph', 'graph', 'nodes')][0]
+        _schema = (links_key, isinstance(template[links_key][0]['source'], int), template)
+    return _schema
+
+
+class _GraphBuilder:
+    """
+    Assembles the graph of a `ConceptModel` out of the node and link entries of its JSON representation, one at a
+    time.
+    """
+
+    def __init__(self):
+        self.graph = nx.Graph()
+        self.nodes = []
+        self.index = dict()
+
+    def _node(self, end):
+        if isinstance(end, int):
+            return self.nodes[end]
+        node = self.index.get(end)
+        if node is None:
+            node = self.add_node({'id': end})
+        return node
+
+    def add_node(self, entry):
+        properties = {key: value for key, value in entry.items() if key != 'id'}
+        node = Node(entry['id'])
+        if properties:
+            node.properties = properties
+        self.graph.add_node(node)
+        self.nodes.append(node)
+        self.index[node.concept] = node
+        return node
+
+    def add_link(self, entry):
+        data = {key: value for key, value in entry.items() if key != 'source' and key != 'target'}
+        self.graph.add_edge(self._node(entry['source']), self._node(entry['target']), **data)
+
+
+class _JSONStreamReader:
+    """
+    An incremental parser for a JSON object whose entries are read from a file one at a time. Entries, and the
+    elements of array entries, are decoded with `json.JSONDecoder.raw_decode()` out of a buffer which is refilled
+    from the file as they are consumed, so that only as much of the file as the largest single element is ever held
+    in memory.
+    """
+
+    def __init__(self, fp, chunk_size=65536):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size=None):
+        """
+        Reads more of the file into the buffer, dropping what has already been consumed.
+
+        :return: Whether anything was read.
+        """
+        if self.eof:
+            return False
+        chunk = self.fp.read(size if size is not None else self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """
+        :return: The next non-whitespace character, which is not consumed, or an empty string at the end of the file.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\n\r':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def _expect(self, characters):
+        character = self._peek()
+        if not character or character not in characters:
+            raise ValueError('Expected one of ' + repr(characters) + ' in the JSON stream, found ' + repr(character))
+        self.pos += 1
+        return character
+
+    def value(self):
+        """
+        :return: The next JSON value in the stream, decoded.
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                # The value runs past the end of the buffer. Read as much again as is buffered, so that a value
+                # much larger than a chunk is only decoded a logarithmic number of times.
+                if not self._fill(max(self.chunk_size, len(self.buffer) - self.pos)):
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end < len(self.buffer) or not self._fill():
+                self.pos = end
+                return value
+
+    def keys(self):
+        """
+        :return: A generator of the keys of the object, each of which must have its value consumed, by `value()` or
+         `elements()`, before the next one is read.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            if self._expect(',}') == '}':
+                return
+
+    def elements(self):
+        """
+        :return: A generator of the decoded elements of the array which comes next in the stream.
+        """
+        self._expect('[')
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self._expect(',]') == ']':
+                return
+
+
+class _ExpansionFrontier:
+    """
+    The priority frontier and budget of a best-first expansion. See `ConceptModel.expand_iter()`.
+    """
+
+    def __init__(self, concept_model, level, limit, concepts, max_calls, deadline, max_nodes, cancel):
+        self.model = concept_model
+        self.level = level
+        self.limit = limit
+        self.max_calls = max_calls
+        self.max_nodes = max_nodes
+        self.cancel = cancel
+        self.calls = 0
+        self.expires = time.monotonic() + deadline if deadline is not None else None
+        self.expanded = set()
+        # A heap of `(-priority, insertion order, concept)` entries. A concept may be pushed more than once; only its
+        # first, highest priority, entry is used.
+        self.heap = []
+        self.pushed = 0
+        if concepts is None:
+            concepts = list(concept_model.concept_set())
+        for concept in concepts:
+            node = concept_model.get_node(concept)
+            self.push(concept, node.get_relevance() if node.has_property('relevance') else 1.0)
+
+    def push(self, concept, priority):
+        if concept not in self.expanded:
+            heapq.heappush(self.heap, (-priority, self.pushed, concept))
+            self.pushed += 1
+
+    def remaining_time(self):
+        return max(0.0, self.expires - time.monotonic()) if self.expires is not None else None
+
+    def full(self):
+        return self.max_nodes is not None and len(self.model.concept_set()) >= self.max_nodes
+
+    def done(self):
+        return ((self.cancel is not None and self.cancel.is_set()) or
+                (self.max_calls is not None and self.calls >= self.max_calls) or
+                (self.expires is not None and time.monotonic() >= self.expires) or
+                self.full())
+
+    def next_batch(self, size):
+        """
+        :return: Up to `size` `(concept, priority)` pairs of the highest priority concepts yet to be expanded, within
+         the call budget.
+        """
+        if self.max_calls is not None:
+            size = min(size, self.max_calls - self.calls)
+        batch = []
+        while self.heap and len(batch) < size:
+            negative_priority, order, concept = heapq.heappop(self.heap)
+            if concept in self.expanded:
+                continue
+            self.expanded.add(concept)
+            if self.model.is_augmented(concept, self.level, self.limit):
+                # Already augmented: move on to its neighbors without making a call.
+                node = self.model.get_node(concept)
+                for neighbor, data in self.model.graph[node].items():
+                    self.push(neighbor.concept, -negative_priority * data['weight'])
+            else:
+                batch.append((concept, -negative_priority))
+        self.calls += len(batch)
+        return batch
+
+    def apply(self, batch, responses):
+        """
+        Merges the related concepts fetched for a batch into the model, as far as `max_nodes` allows, and pushes
+        them onto the frontier.
+
+        :return: The concepts which are new to the model, in order.
+        """
+        concept_set = self.model.concept_set()
+        room = self.max_nodes - len(concept_set) if self.max_nodes is not None else None
+        added = []
+        added_set = set()
+        trimmed_responses = []
+        complete = []
+        for (concept, priority), response in zip(batch, responses):
+            kept = []
+            trimmed = False
+            for raw_concept in response['concepts']:
+                label = raw_concept['concept']['label']
+                if label == concept:
+                    continue
+                if label not in concept_set and label not in added_set:
+                    if room is not None and len(added) >= room:
+                        trimmed = True
+                        continue
+                    added.append(label)
+                    added_set.add(label)
+                kept.append(raw_concept)
+                self.push(label, priority * raw_concept['score'])
+            # Leave the raw response itself untouched: it may be shared through the cache.
+            trimmed_responses.append(dict(response, concepts=kept))
+            if not trimmed:
+                complete.append(concept)
+        self.model._apply_related_concepts([self.model.get_node(concept) for concept, priority in batch],
+                                           trimmed_responses)
+        # Concepts whose related concepts did not all fit under `max_nodes` are not recorded as augmented.
+        for concept in complete:
+            self.model._record_augmented(concept, self.level, self.limit)
+        return added
+
+
 def model(user_input):
     """
     Models arbitrary user input and returns an associated ConceptModel. See also the similar `concept.conceptualize`
@@ -467,11 +1532,30 @@ def model(user_input):
      "the iPhone 5C, released this Thursday..." -> iPhone).
     :return: The constructed `ConceptModel` object. Might be empty!
     """
-    new_model = ConceptModel()
     if user_input:
-        related_concepts_raw = watsongraph.event_insight_lib.annotate_text(user_input)
-        new_data = [(raw_concept['concept']['label'], raw_concept['score']) for raw_concept in
-                    related_concepts_raw['annotations']]
-        for data in new_data:
-            new_model.graph.add_node(Node(data[0], relevance=data[1]))
+        return _model_from_annotations(watsongraph.event_insight_lib.annotate_text(user_input))
+    return ConceptModel()
+
+
+async def amodel(user_input):
+    """
+    The awaitable counterpart of `model()`.
+
+    :param user_input: Arbitrary user input.
+    :return: The constructed `ConceptModel` object. Might be empty!
+    """
+    if user_input:
+        return _model_from_annotations(await watsongraph.event_insight_lib.aannotate_text(user_input))
+    return ConceptModel()
+
+
+def _model_from_annotations(related_concepts_raw):
+    """
+    Builds the `ConceptModel` described by a raw `annotate_text` response. Used by `model()` and `amodel()`.
+    """
+    new_model = ConceptModel()
+    new_data = [(raw_concept['concept']['label'], raw_concept['score']) for raw_concept in
+                related_concepts_raw['annotations']]
+    for data in new_data:
+        new_model._add_node(Node(data[0], relevance=data[1]))
     return new_model
@@ -3,11 +3,24 @@
     A Python Bluemix-Watson API which would make this module redundant is currently in stalled development by the
     Bluemix team. For now, this file's methodology is sufficient."""
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
 import requests
-from time import gmtime
-import urllib
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
+import time
+import urllib.parse
+from watsongraph.cache import AnnotationCache, RelatedConceptsCache
+from watsongraph.scheduling import SingleFlight
+
+try:
+    import aiohttp
+except ImportError:
+    # Only needed by the asyncio API; see `AsyncWatsonClient`.
+    aiohttp = None
 
 
 def _import_credentials(filename='concept_insight_credentials.json'):
@@ -18,24 +31,22 @@ def _import_credentials(filename='concept_insight_credentials.json'):
     :param filename -- The filename at which Concept Insights service credentials are stored. Defaults to
     `concept_insight_credentials.json`.
     """
-    if filename in [f for f in os.listdir('.') if os.path.isfile(f)]:
-        data = json.load(open(filename))['credentials']
-        return data
+    if os.path.isfile(filename):
+        with open(filename) as f:
+            return json.load(f)['credentials']
     else:
         raise IOError(
             'This API requires a Bluemix/Watson credentials token to work. Did you forget to define '
             'one? For more information refer to:\n\nhttps://github.com/ResidentMario/watsongraph#setup')
 
 
-def _generate_token(filename='concept_insight_credentials.json', token_file='token.json'):
+def _generate_token(filename='concept_insight_credentials.json'):
     """
-    Generate the Base64 token that IBM uses for API authorization. Wraps `import_credentials()`. Itself a submethod
-    of the `getToken()` method. See also `validateToken()`.
+    Generate the Base64 token that IBM uses for API authorization. Wraps `_import_credentials()`. Itself a submethod
+    of `TokenProvider`, which takes care of caching the result; see also `get_token()`.
 
     :param filename -- The filename at which Concept Insights service credentials are stored. Defaults to
     `concept_insight_credentials.json`.
-    :param token_file -- The filename at which the token (which this application saves as a file, not an object)
-    will be stored. Defaults to `token.json`.
     """
     credentials = _import_credentials(filename)
     r = requests.get(
@@ -43,8 +54,6 @@ def _generate_token(filename='concept_insight_credentials.json', token_file='tok
         "/concept-insights/api",
         auth=(credentials['username'], credentials['password']))
     if r.status_code == requests.codes.ok:
-        f = open(token_file, 'w')
-        f.write(json.dumps({'token': r.text, 'time': gmtime()}, indent=4))
         return r.text
     else:
         raise RuntimeError(
@@ -52,47 +61,702 @@ def _generate_token(filename='concept_insight_credentials.json', token_file='tok
             'Are your account credentials correct?')
 
 
-def _validate_token(token_file='token.json'):
+class TokenProvider:
     """
-    The generateToken() method creates a JSON file with both a token and a time parameter.
-    This methods checks if the token file is still valid. Tokens live for an hour, so if the token was generated
-    less than an hour ago it should work. In that case the additional overhead of regenerating the token is not
-    necessary! This method is a submethod of the primary-use `getToken()` method. See also `generateToken()`, above.
+    Holds a Watson API access token in memory and hands it out to every API call made by this library.
 
-    :param token_file -- The filename at which the token (which this application saves as a file, not an object)
-    will be stored. Defaults to `token.json`.
+    Tokens live for an hour. The provider tracks the real expiry time of the token it holds and regenerates it
+    `refresh_margin` seconds ahead of that time. Regeneration happens under a lock, so when several threads find the
+    token stale at once only one of them goes to the network and the rest wait on (and then reuse) its result.
+
+    The token file is only used as a warm-start cache: it is read once, the first time a token is needed, and
+    written whenever a new token is generated, so that a freshly started process can reuse a token minted by an
+    earlier one. It is never consulted again afterwards.
     """
-    if token_file in [f for f in os.listdir('.') if os.path.isfile(f)]:
+
+    def __init__(self, credentials_file='concept_insight_credentials.json', token_file='token.json',
+                 lifetime=3600, refresh_margin=300):
         """
-        The timestamp is in UTC. The timestamp is in the format [year, month, day, hour, minute, second, ..., ..., ...]
-        Generated via `gmtime()` in `generateToken()`. See https://docs.python.org/2/library/time.html#time.struct_time
-        In our case it's simplest to compare the hour parameter and make sure we haven't incremented into the next
-        hour yet.
+        :param credentials_file: The filename at which Concept Insights service credentials are stored.
+
+        :param token_file: The filename used as a warm-start cache for the token. Pass `None` to keep the token in
+         memory only.
+
+        :param lifetime: How long, in seconds, a freshly generated token is valid for. Watson tokens last an hour.
+
+        :param refresh_margin: How long, in seconds, before expiry the token is regenerated.
         """
-        timestamp = json.load(open(token_file))['time']
-        hourstamp = timestamp[3]
-        if hourstamp - gmtime()[3] == 0:
-            return True
-        else:
-            return False
-    else:
-        return False
+        self.credentials_file = credentials_file
+        self.token_file = token_file
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires = 0.0
+        self._replacement = None
+        self._warm_started = False
+        self._lock = threading.Lock()
+
+    def _is_fresh(self):
+        return self._token is not None and time.time() < self._expires - self.refresh_margin
+
+    def get_token(self):
+        """
+        :return: A valid access token, generating a new one first if the current one is missing or about to expire.
+        """
+        if self._is_fresh():
+            return self._token
+        with self._lock:
+            # Another thread may have refreshed the token while we were waiting on the lock.
+            if self._is_fresh():
+                return self._token
+            if not self._warm_started:
+                self._warm_started = True
+                self._load_token_file()
+                if self._is_fresh():
+                    return self._token
+            return self._generate()
+
+    def _generate(self):
+        """
+        Generates a new token and saves it. Must hold the lock.
+        """
+        self._token = _generate_token(self.credentials_file)
+        self._expires = time.time() + self.lifetime
+        self._replacement = None
+        self._save_token_file()
+        return self._token
+
+    def reauthorize(self, rejected):
+        """
+        Replaces a token which the service rejected before its expected expiry. Callers which find the same token
+        rejected at once share a single replacement, and a replacement which is itself rejected is not replaced in
+        turn, since that points at the credentials rather than at the token; the token is next regenerated when it
+        expires, or when `invalidate()` is called.
+
+        :param rejected: The token the service rejected.
+        :return: The token to retry the request with, or `None` if it should not be retried.
+        """
+        with self._lock:
+            if self._token != rejected:
+                # Replaced by another caller in the meantime.
+                return self._token if self._is_fresh() else self._generate()
+            if rejected == self._replacement:
+                return None
+            self._generate()
+            self._replacement = self._token
+            return self._token
+
+    def invalidate(self):
+        """
+        Discards the held token, forcing the next `get_token()` call to generate a new one. Useful when the service
+        rejects a token before its expected expiry.
+        """
+        with self._lock:
+            self._token = None
+            self._expires = 0.0
+
+    def _load_token_file(self):
+        """
+        Loads a previously saved token, if there is one. Token files written by earlier versions of this library
+        carry no expiry time and are ignored.
+        """
+        if not self.token_file or not os.path.isfile(self.token_file):
+            return
+        try:
+            with open(self.token_file) as f:
+                data = json.load(f)
+            token, expires = data['token'], float(data['expires'])
+        except (ValueError, KeyError, TypeError, OSError):
+            return
+        self._token, self._expires = token, expires
+
+    def _save_token_file(self):
+        if not self.token_file:
+            return
+        try:
+            with open(self.token_file, 'w') as f:
+                f.write(json.dumps({'token': self._token, 'expires': self._expires}, indent=4))
+        except OSError:
+            # The file is only a cache, so failing to write it must not fail the API call that needed the token.
+            pass
+
+
+_token_providers = dict()
+_token_providers_lock = threading.Lock()
+
+
+def _get_token_provider(token_file='token.json'):
+    """
+    Returns the process-wide `TokenProvider` associated with the given token file, creating it if necessary.
+
+    :param token_file -- The filename at which the token will be cached between processes. Defaults to `token.json`.
+    """
+    with _token_providers_lock:
+        if token_file not in _token_providers:
+            _token_providers[token_file] = TokenProvider(token_file=token_file)
+        return _token_providers[token_file]
 
 
 def get_token(token_file='token.json'):
     """
-    This is the primary-use access method meant to be used throughout the application. Implements `validateToken()`
-    and `generateToken()` submethods, above. If a token exists that was created within the current hour, it is still
-    valid, reused, and returned (fast). If a token exists but has expired, or does not exist at all, one is created
-    and returned (requires networking, slower).
+    This is the primary-use access method meant to be used throughout the application. Returns the token held in
+    memory by the process-wide `TokenProvider` for `token_file` (fast), which regenerates it shortly before it expires
+    (requires networking, slower).
 
-    :param token_file -- The filename at which the token (which this application saves as a file, not an object)
-    will be stored. Defaults to `token.json`.
+    :param token_file -- The filename at which the token will be cached between processes. Defaults to `token.json`.
     """
-    if _validate_token():
-        return json.load(open(token_file))['token']
-    else:
-        return _generate_token()
+    return _get_token_provider(token_file).get_token()
+
+
+GRAPH_URL = 'https://gateway.watsonplatform.net/concept-insights/api/v2/graphs/wikipedia/en-20120601'
+
+
+def _quote_label(label):
+    """
+    Percent encodes a concept label according to Wikipedia's encoding scheme, e.g. "Watson (computer)" ->
+    "Watson_%28computer%29".
+    """
+    return urllib.parse.quote(label.replace(' ', '_'), safe='_,')
+
+
+def _related_concepts_url(base_url, label, level, limit):
+    url = base_url + '/related_concepts?concepts=["/graphs/wikipedia/en-20120601/concepts/'
+    return url + _quote_label(label) + '"]&level=' + str(level) + '&limit=' + str(limit)
+
+
+def _relation_scores_url(base_url, label, list_of_target_labels):
+    url = base_url + '/concepts/' + _quote_label(label) + '/relation_scores?concepts=['
+    url += ','.join(_relation_scores_target(t_label) for t_label in list_of_target_labels)
+    return url + ']'
+
+
+def _relation_scores_target(label):
+    return '"/graphs/wikipedia/en-20120601/concepts/' + _quote_label(label) + '"'
+
+
+"""
+Every target of a `relation_scores` call is spelled out in its URL, and the service rejects URLs much longer than
+this. Longer target lists are split across several calls; see `relation_scores_batches()`.
+"""
+MAX_URL_LENGTH = 2000
+
+
+def relation_scores_batches(label, list_of_target_labels, max_url_length=MAX_URL_LENGTH, base_url=GRAPH_URL):
+    """
+    Splits a list of target labels into batches small enough that the URL of a `relation_scores` call for each of them
+    stays within `max_url_length` characters. A single target which is too long on its own still gets a batch.
+
+    :param label -- The Concept label for whom relations are being fetched.
+    :param list_of_target_labels -- The labels against which relations are being fetched.
+    :param max_url_length -- The maximum URL length. Defaults to `MAX_URL_LENGTH`.
+    :param base_url -- The graph endpoint the calls are made against, i.e. the `base_url` of the client making them.
+    Defaults to `GRAPH_URL`.
+    :return: A list of lists of target labels, in their original order.
+    """
+    overhead = len(_relation_scores_url(base_url, label, []))
+    batches = []
+    batch = []
+    length = overhead
+    for t_label in list_of_target_labels:
+        # Account for the separating comma, too.
+        piece = len(_relation_scores_target(t_label)) + 1
+        if batch and length + piece > max_url_length:
+            batches.append(batch)
+            batch = []
+            length = overhead
+        batch.append(t_label)
+        length += piece
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class Backend:
+    """
+    The interface through which this library talks to the Concept Insights API. Each method returns the decoded
+    JSON response of the corresponding Watson method.
+
+    `WatsonClient`, which calls the real service over HTTP, is the default implementation. `watsongraph.replay`
+    provides offline ones for testing and benchmarking. Install a backend with `set_backend()`.
+
+    `base_url` is the graph endpoint the backend calls, against which `relation_scores` target lists are split into
+    batches; see `relation_scores_batches()`.
+    """
+
+    base_url = GRAPH_URL
+
+    def annotate_text(self, text, content_type='text/plain'):
+        raise NotImplementedError
+
+    def get_related_concepts(self, label, level=0, limit=10):
+        raise NotImplementedError
+
+    def get_relation_scores(self, label, list_of_target_labels):
+        raise NotImplementedError
+
+
+class AsyncBackend:
+    """
+    The asyncio counterpart of `Backend`: the same three methods, as coroutines. `AsyncWatsonClient` is the default
+    implementation.
+    """
+
+    base_url = GRAPH_URL
+
+    async def annotate_text(self, text, content_type='text/plain'):
+        raise NotImplementedError
+
+    async def get_related_concepts(self, label, level=0, limit=10):
+        raise NotImplementedError
+
+    async def get_relation_scores(self, label, list_of_target_labels):
+        raise NotImplementedError
+
+
+class ThreadedAsyncBackend(AsyncBackend):
+    """
+    Adapts a synchronous `Backend` to the `AsyncBackend` interface by running its calls in the event loop's default
+    executor.
+    """
+
+    def __init__(self, backend):
+        """
+        :param backend: The synchronous `Backend` being wrapped.
+        """
+        self.backend = backend
+
+    @property
+    def base_url(self):
+        return self.backend.base_url
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: func(*args))
+
+    async def annotate_text(self, text, content_type='text/plain'):
+        return await self._run(self.backend.annotate_text, text, content_type)
+
+    async def get_related_concepts(self, label, level=0, limit=10):
+        return await self._run(self.backend.get_related_concepts, label, level, limit)
+
+    async def get_relation_scores(self, label, list_of_target_labels):
+        return await self._run(self.backend.get_relation_scores, label, list_of_target_labels)
+
+
+class WatsonClient(Backend):
+    """
+    Owns the HTTP plumbing behind every Concept Insights API call made by this library.
+
+    All calls go through a single pooled, keep-alive `requests.Session`, so consecutive calls (an `explode()` on a
+    large model makes hundreds of them) reuse open connections instead of paying for a fresh TCP and TLS handshake
+    each time. Server-side 5xx responses, which the service is prone to returning intermittently (see
+    https://github.com/ResidentMario/watsongraph/issues/6), are retried with exponential backoff before an error is
+    raised.
+    """
+
+    def __init__(self, token_provider=None, base_url=GRAPH_URL, pool_size=10, timeout=(5, 30), retries=None,
+                 backoff_factor=0.5, retry_statuses=(500, 502, 503, 504), scheduler=None):
+        """
+        :param token_provider: The `TokenProvider` supplying access tokens. Defaults to the process-wide provider
+         for `token.json`.
+
+        :param base_url: The URL of the `wikipedia/en-20120601` graph endpoint. Overridable for testing against a
+         local stand-in for the service.
+
+        :param pool_size: The maximum number of connections kept open to the service. Should be at least the number
+         of threads making calls concurrently.
+
+        :param timeout: A `(connect, read)` tuple of timeouts, in seconds, passed to every request.
+
+        :param retries: The number of times a request that failed with one of `retry_statuses` or a connection
+         error is retried before giving up. Defaults to 3, or to 0 if a `scheduler` is given, since the scheduler
+         does its own retrying.
+
+        :param backoff_factor: Retries sleep for `backoff_factor * 2 ** (retry number - 1)` seconds.
+
+        :param retry_statuses: The HTTP status codes which are retried.
+
+        :param scheduler: An optional `watsongraph.scheduling.Scheduler` which rate limits, adaptively caps the
+         concurrency of, and retries every call.
+        """
+        self.token_provider = token_provider if token_provider else _get_token_provider()
+        self.base_url = base_url
+        self.timeout = timeout
+        self.scheduler = scheduler
+        if retries is None:
+            retries = 0 if scheduler else 3
+        retry_kwargs = dict(total=retries, backoff_factor=backoff_factor, status_forcelist=retry_statuses,
+                            raise_on_status=False)
+        # `annotate_text` is a read-only POST, so it is safe to retry too.
+        try:
+            retry = Retry(allowed_methods=frozenset(['GET', 'POST']), **retry_kwargs)
+        except TypeError:
+            # urllib3 < 1.26.
+            retry = Retry(method_whitelist=frozenset(['GET', 'POST']), **retry_kwargs)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, content_type='text/plain', data=None, endpoint='request'):
+        """
+        Makes an authorized request against the service and returns the decoded JSON response.
+
+        :param method: The HTTP method, e.g. `GET`.
+
+        :param url: The full URL being requested.
+
+        :param content_type: The content type of `data`.
+
+        :param data: The request body, if any.
+
+        :param endpoint: The name of the Watson method being called, under whose budget the `scheduler` (if any)
+         runs the request.
+        """
+        if self.scheduler:
+            return self.scheduler.call(endpoint, lambda: self._request(method, url, content_type, data))
+        return self._request(method, url, content_type, data)
+
+    def _request(self, method, url, content_type, data):
+        token = self.token_provider.get_token()
+        headers = {'X-Watson-Authorization-Token': token,
+                   'Content-Type': content_type,
+                   'Accept': 'application/json'}
+        r = self.session.request(method, url, headers=headers, data=data, timeout=self.timeout)
+        if r.status_code == requests.codes.unauthorized:
+            # The token was revoked or expired early. Try once more with a new one, if the provider will mint one.
+            token = self.token_provider.reauthorize(token)
+            if token is not None:
+                headers['X-Watson-Authorization-Token'] = token
+                r = self.session.request(method, url, headers=headers, data=data, timeout=self.timeout)
+        r.raise_for_status()
+        return json.loads(r.text)
+
+    def annotate_text(self, text, content_type='text/plain'):
+        """
+        Makes a call to the `annotate_text` Watson method. See the module-level `annotate_text()`.
+        """
+        dat = text.encode(encoding='UTF-8', errors='ignore')
+        return self.request('POST', self.base_url + '/annotate_text', content_type=content_type, data=dat,
+                            endpoint='annotate_text')
+
+    def get_related_concepts(self, label, level=0, limit=10):
+        """
+        Makes a call to the `related_concepts` Watson method. See the module-level `get_related_concepts()`.
+        """
+        return self.request('GET', _related_concepts_url(self.base_url, label, level, limit),
+                            endpoint='related_concepts')
+
+    def get_relation_scores(self, label, list_of_target_labels):
+        """
+        Makes a call to the `relation_scores` Watson method. See the module-level `get_relation_scores()`.
+        """
+        return self.request('GET', _relation_scores_url(self.base_url, label, list_of_target_labels),
+                            endpoint='relation_scores')
+
+    def close(self):
+        """
+        Closes every pooled connection held by the client.
+        """
+        self.session.close()
+
+
+_clients = dict()
+_clients_lock = threading.Lock()
+
+
+def get_client(token_file='token.json'):
+    """
+    Returns the process-wide client through which API calls authorized by the given token file are made, creating a
+    default `WatsonClient` for it if none has been set.
+
+    :param token_file -- The filename at which the token will be cached between processes. Defaults to `token.json`.
+    """
+    with _clients_lock:
+        if token_file not in _clients:
+            _clients[token_file] = WatsonClient(token_provider=_get_token_provider(token_file))
+        return _clients[token_file]
+
+
+def set_client(client, token_file='token.json'):
+    """
+    Replaces the process-wide client used for API calls authorized by the given token file, e.g. with a
+    `WatsonClient` configured with a larger connection pool.
+
+    :param client: The client to use from now on.
+
+    :param token_file -- The filename at which the token will be cached between processes. Defaults to `token.json`.
+    """
+    with _clients_lock:
+        _clients[token_file] = client
+
+
+class AsyncWatsonClient(AsyncBackend):
+    """
+    The asyncio counterpart of `WatsonClient`, used by the awaitable `a`-prefixed functions of this library (e.g.
+    `aannotate_text()`, `ConceptModel.aexplode()`).
+
+    Requests are made through a single `aiohttp.ClientSession`, so an application running an event loop can keep
+    thousands of calls in flight on one thread. A semaphore caps how many of them are actually sent at once. Like
+    `WatsonClient`, server-side 5xx responses and connection errors are retried with exponential backoff.
+
+    Requires the optional `aiohttp` dependency.
+    """
+
+    def __init__(self, token_provider=None, base_url=GRAPH_URL, max_concurrency=64, timeout=30, retries=None,
+                 backoff_factor=0.5, retry_statuses=(500, 502, 503, 504), scheduler=None):
+        """
+        :param token_provider: The `TokenProvider` supplying access tokens. Defaults to the process-wide provider
+         for `token.json`.
+
+        :param base_url: The URL of the `wikipedia/en-20120601` graph endpoint. Overridable for testing against a
+         local stand-in for the service.
+
+        :param max_concurrency: The maximum number of requests sent at once. Further requests wait their turn.
+
+        :param timeout: The total timeout, in seconds, of each request.
+
+        :param retries: The number of times a request that failed with one of `retry_statuses` or a connection
+         error is retried before giving up. Defaults to 3, or to 0 if a `scheduler` is given, since the scheduler
+         does its own retrying.
+
+        :param backoff_factor: Retries sleep for `backoff_factor * 2 ** (retry number - 1)` seconds.
+
+        :param retry_statuses: The HTTP status codes which are retried.
+
+        :param scheduler: An optional `watsongraph.scheduling.Scheduler` which rate limits, adaptively caps the
+         concurrency of, and retries every call. It may be shared with a `WatsonClient`.
+        """
+        if aiohttp is None:
+            raise ImportError('The asyncio API requires the aiohttp package. Install it with `pip install aiohttp`.')
+        self.token_provider = token_provider if token_provider else _get_token_provider()
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.retries = retries if retries is not None else (0 if scheduler else 3)
+        self.backoff_factor = backoff_factor
+        self.retry_statuses = retry_statuses
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+
+    def _bind(self):
+        """
+        Sessions and semaphores belong to the event loop they were created in, so (re)create them whenever the
+        client is used from a new loop, e.g. by successive `asyncio.run()` calls.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                                  connector=aiohttp.TCPConnector(limit=self.max_concurrency))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _get_token(self):
+        # Token generation makes a blocking call, so keep it off the event loop.
+        return await asyncio.get_running_loop().run_in_executor(None, self.token_provider.get_token)
+
+    async def request(self, method, url, content_type='text/plain', data=None, endpoint='request'):
+        """
+        Makes an authorized request against the service and returns the decoded JSON response.
+
+        :param method: The HTTP method, e.g. `GET`.
+
+        :param url: The full URL being requested.
+
+        :param content_type: The content type of `data`.
+
+        :param data: The request body, if any.
+
+        :param endpoint: The name of the Watson method being called, under whose budget the `scheduler` (if any)
+         runs the request.
+        """
+        if self.scheduler:
+            return await self.scheduler.acall(endpoint, lambda: self._request(method, url, content_type, data))
+        return await self._request(method, url, content_type, data)
+
+    async def _request(self, method, url, content_type, data):
+        self._bind()
+        token = await self._get_token()
+        headers = {'X-Watson-Authorization-Token': token,
+                   'Content-Type': content_type,
+                   'Accept': 'application/json'}
+        reauthorized = False
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    async with self._session.request(method, url, headers=headers, data=data) as r:
+                        if r.status == 401 and not reauthorized:
+                            # The token was revoked or expired early. Try once more with a new one, if the provider
+                            # will mint one.
+                            reauthorized = True
+                            token = await asyncio.get_running_loop().run_in_executor(
+                                None, self.token_provider.reauthorize, token)
+                            if token is not None:
+                                headers['X-Watson-Authorization-Token'] = token
+                                continue
+                        if r.status not in self.retry_statuses or attempt >= self.retries:
+                            r.raise_for_status()
+                            return json.loads(await r.text())
+            except aiohttp.ClientConnectionError:
+                if attempt >= self.retries:
+                    raise
+            attempt += 1
+            await asyncio.sleep(self.backoff_factor * 2 ** (attempt - 1))
+
+    async def annotate_text(self, text, content_type='text/plain'):
+        """
+        Makes a call to the `annotate_text` Watson method. See the module-level `annotate_text()`.
+        """
+        dat = text.encode(encoding='UTF-8', errors='ignore')
+        return await self.request('POST', self.base_url + '/annotate_text', content_type=content_type, data=dat,
+                                  endpoint='annotate_text')
+
+    async def get_related_concepts(self, label, level=0, limit=10):
+        """
+        Makes a call to the `related_concepts` Watson method. See the module-level `get_related_concepts()`.
+        """
+        return await self.request('GET', _related_concepts_url(self.base_url, label, level, limit),
+                                  endpoint='related_concepts')
+
+    async def get_relation_scores(self, label, list_of_target_labels):
+        """
+        Makes a call to the `relation_scores` Watson method. See the module-level `get_relation_scores()`.
+        """
+        return await self.request('GET', _relation_scores_url(self.base_url, label, list_of_target_labels),
+                                  endpoint='relation_scores')
+
+    async def close(self):
+        """
+        Closes the underlying session. Must be awaited from the event loop the client was last used in.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._loop = None
+
+
+_async_clients = dict()
+
+
+def get_async_client(token_file='token.json'):
+    """
+    The asyncio counterpart of `get_client()`: returns the process-wide client through which awaitable API calls
+    authorized by the given token file are made, creating a default `AsyncWatsonClient` for it if none has been set.
+
+    :param token_file -- The filename at which the token will be cached between processes. Defaults to `token.json`.
+    """
+    with _clients_lock:
+        if token_file not in _async_clients:
+            _async_clients[token_file] = AsyncWatsonClient(token_provider=_get_token_provider(token_file))
+        return _async_clients[token_file]
+
+
+def set_async_client(client, token_file='token.json'):
+    """
+    The asyncio counterpart of `set_client()`.
+
+    :param client: The client to use from now on.
+
+    :param token_file -- The filename at which the token will be cached between processes. Defaults to `token.json`.
+    """
+    with _clients_lock:
+        _async_clients[token_file] = client
+
+
+def set_backend(backend, async_backend=None, token_file='token.json'):
+    """
+    Routes every API call authorized by the given token file, synchronous and awaitable alike, through `backend`.
+    For example, `set_backend(ReplayBackend(graph=SyntheticConceptGraph()))` runs the library entirely
+    offline.
+
+    :param backend: The `Backend` to use from now on.
+
+    :param async_backend: The `AsyncBackend` to use from now on. Defaults to running `backend` in a thread pool.
+
+    :param token_file -- The filename at which the token will be cached between processes. Defaults to `token.json`.
+    """
+    if async_backend is None:
+        async_backend = async_backend_for(backend)
+    set_client(backend, token_file)
+    set_async_client(async_backend, token_file)
+
+
+def async_backend_for(backend):
+    """
+    :return: The `AsyncBackend` counterpart of a synchronous `Backend`, as provided by its `async_backend()` method if
+     it has one, or else a `ThreadedAsyncBackend` wrapping it.
+    """
+    if hasattr(backend, 'async_backend'):
+        return backend.async_backend()
+    return ThreadedAsyncBackend(backend)
+
+
+_annotation_cache = AnnotationCache()
+_related_concepts_cache = RelatedConceptsCache()
+
+
+def get_related_concepts_cache():
+    """
+    :return: The cache consulted by `get_related_concepts()`, or `None` if caching is disabled.
+    """
+    return _related_concepts_cache
+
+
+def set_related_concepts_cache(cache):
+    """
+    Replaces the cache consulted by `get_related_concepts()`. By default responses are held in an in-memory
+    `RelatedConceptsCache`; pass one backed by a `watsongraph.cache.SQLiteCache` to share them between processes, or
+    `None` to disable caching altogether.
+
+    :param cache: The new cache. Any object exposing the `get()` and `set()` methods of `RelatedConceptsCache` will do.
+    """
+    global _related_concepts_cache
+    _related_concepts_cache = cache
+
+
+_single_flight = SingleFlight()
+
+
+def set_request_coalescing(enabled):
+    """
+    Turns request coalescing on or off. While it is on (the default), concurrent callers making an identical API
+    call, e.g. many users exploding overlapping interests at the same time, share a single request and its result.
+
+    :param enabled: Whether identical concurrent calls should be coalesced.
+    """
+    global _single_flight
+    _single_flight = SingleFlight() if enabled else None
+
+
+def _coalesce(key, func):
+    single_flight = _single_flight
+    return single_flight.do(key, func) if single_flight is not None else func()
+
+
+async def _acoalesce(key, func):
+    single_flight = _single_flight
+    return await single_flight.ado(key, func) if single_flight is not None else await func()
+
+
+def get_annotation_cache():
+    """
+    :return: The cache consulted by `annotate_text()`, or `None` if caching is disabled.
+    """
+    return _annotation_cache
+
+
+def set_annotation_cache(cache):
+    """
+    Replaces the cache consulted by `annotate_text()`. By default responses are held in a bounded in-memory
+    `AnnotationCache`; pass one backed by a `watsongraph.cache.SQLiteCache` to share them between processes, or `None`
+    to disable caching altogether.
+
+    :param cache: The new cache. Any object exposing the `get()` and `set()` methods of `AnnotationCache` will do.
+    """
+    global _annotation_cache
+    _annotation_cache = cache
 
 
 def annotate_text(text, content_type='text/plain', token_file='token.json'):
@@ -106,16 +770,22 @@ def annotate_text(text, content_type='text/plain', token_file='token.json'):
     `text/html` is the alternative option.
     :param token_file -- The filename at which the token (which this application saves as a file, not an object)
     will be stored. Defaults to `token.json`.
+
+    Responses are served from the annotation cache when possible; see `set_annotation_cache()`.
     """
-    token = get_token(token_file)
-    base_url = 'https://gateway.watsonplatform.net/concept-insights/api/v2/graphs/wikipedia/en-20120601/annotate_text'
-    headers = {'X-Watson-Authorization-Token': token, 'Content-Type': content_type, 'Accept': 'application/json'}
-    dat = text.encode(encoding='UTF-8', errors='ignore')
-    r = requests.post(base_url, headers=headers, data=dat)
-    # Catch a recurring error of unknown server-side provenance. Further details:
-    # https://github.com/ResidentMario/watsongraph/issues/6
-    r.raise_for_status()
-    return json.loads(r.text)
+    cache = _annotation_cache
+    if cache is not None:
+        cached = cache.get(text, content_type)
+        if cached is not None:
+            return cached
+
+    def fetch():
+        response = get_client(token_file).annotate_text(text, content_type=content_type)
+        if cache is not None:
+            cache.set(text, content_type, response)
+        return response
+
+    return _coalesce(('annotate_text', token_file, text, content_type), fetch)
 
 
 def get_related_concepts(label, level=0, limit=10, token_file='token.json'):
@@ -133,45 +803,108 @@ def get_related_concepts(label, level=0, limit=10, token_file='token.json'):
     directly to the IBM Watson API call.
     :param token_file -- The filename at which the token (which this application saves as a file, not an object)
     will be stored. Defaults to `token.json`.
+
+    Responses are served from the related concepts cache when possible; see `set_related_concepts_cache()`.
     """
-    headers = {'X-Watson-Authorization-Token': get_token(token_file),
-               'Content-Type': 'text/plain',
-               'Accept': 'application/json'}
-    # Percent encode the URI according to Wikipedia's encoding scheme.
-    # noinspection PyUnresolvedReferences
-    label = urllib.parse.quote(label.replace(' ', '_'), safe='_,')
-    base_url = 'https://gateway.watsonplatform.net/concept-insights/api/v2/graphs/wikipedia/en-20120601'
-    base_url += '/related_concepts?concepts=["/graphs/wikipedia/en-20120601/concepts/' + label
-    base_url += '"]&level=' + str(level) + '&limit=' + str(limit)
-    r = requests.get(base_url, headers=headers)
-    r.raise_for_status()
-    return json.loads(r.text)
+    cache = _related_concepts_cache
+    if cache is not None:
+        cached = cache.get(label, level, limit)
+        if cached is not None:
+            return cached
+
+    def fetch():
+        response = get_client(token_file).get_related_concepts(label, level=level, limit=limit)
+        if cache is not None:
+            cache.set(label, level, limit, response)
+        return response
 
+    return _coalesce(('related_concepts', token_file, label, level, limit), fetch)
 
-# noinspection PyUnresolvedReferences
-def get_relation_scores(label, list_of_target_labels, token_file='token.json'):
+
+def get_relation_scores(label, list_of_target_labels, token_file='token.json', workers=1):
     """
     Given the name of a concept within the Wikipedia concept graph and a list of other concepts to be checked against,
     returns the result of an API call to the `relation_scores` Watson method. This method requires the name of
     the concept that is to be searched for. That name must be precise.
 
+    Long target lists are split into several calls, so as to keep each URL, made against the `base_url` of the
+    client, within `MAX_URL_LENGTH`; the scores they return are concatenated into a single response.
+
     :param label -- The Concept label for whom relations are being fetched. Note that this method is executed on a
     label, not a Concept--executing it on a Concept would incur unnecessary additional overhead.
     :param list_of_target_labels -- A list of other labels for which matching correlations will be fetched.
     :param token_file -- The filename at which the token (which this application saves as a file, not an object)
     will be stored. Defaults to `token.json`.
+    :param workers -- The number of calls made concurrently when the target list has to be split.
     """
-    headers = {'X-Watson-Authorization-Token': get_token(token_file),
-               'Content-Type': 'text/plain',
-               'Accept': 'application/json'}
-    # Percent encode the URI according to Wikipedia's encoding scheme.
-    s_label = urllib.parse.quote(label.replace(' ', '_'), safe='_,')
-    list_of_target_labels = [urllib.parse.quote(lb.replace(' ', '_'), safe='_,') for lb in list_of_target_labels]
-    base_url = 'https://gateway.watsonplatform.net/concept-insights/api/v2/graphs/wikipedia/en-20120601'
-    base_url += '/concepts/' + s_label + '/relation_scores?concepts=['
-    for t_label in list_of_target_labels:
-        base_url += '"/graphs/wikipedia/en-20120601/concepts/' + t_label + '",'
-    base_url = base_url[:-1] + ']'
-    r = requests.get(base_url, headers=headers)
-    r.raise_for_status()
-    return json.loads(r.text)
+    client = get_client(token_file)
+
+    def fetch(batch):
+        return _coalesce(('relation_scores', token_file, label, tuple(batch)),
+                         lambda: client.get_relation_scores(label, batch))
+
+    batches = relation_scores_batches(label, list_of_target_labels, base_url=client.base_url)
+    if len(batches) <= 1:
+        return fetch(list(list_of_target_labels))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+            responses = list(executor.map(fetch, batches))
+    else:
+        responses = [fetch(batch) for batch in batches]
+    return {'scores': [score for response in responses for score in response['scores']]}
+
+
+async def aannotate_text(text, content_type='text/plain', token_file='token.json'):
+    """
+    The awaitable counterpart of `annotate_text()`, made through the `AsyncWatsonClient` and sharing its cache.
+    """
+    cache = _annotation_cache
+    if cache is not None:
+        cached = cache.get(text, content_type)
+        if cached is not None:
+            return cached
+
+    async def fetch():
+        response = await get_async_client(token_file).annotate_text(text, content_type=content_type)
+        if cache is not None:
+            cache.set(text, content_type, response)
+        return response
+
+    return await _acoalesce(('annotate_text', token_file, text, content_type), fetch)
+
+
+async def aget_related_concepts(label, level=0, limit=10, token_file='token.json'):
+    """
+    The awaitable counterpart of `get_related_concepts()`, made through the `AsyncWatsonClient` and sharing its cache.
+    """
+    cache = _related_concepts_cache
+    if cache is not None:
+        cached = cache.get(label, level, limit)
+        if cached is not None:
+            return cached
+
+    async def fetch():
+        response = await get_async_client(token_file).get_related_concepts(label, level=level, limit=limit)
+        if cache is not None:
+            cache.set(label, level, limit, response)
+        return response
+
+    return await _acoalesce(('related_concepts', token_file, label, level, limit), fetch)
+
+
+async def aget_relation_scores(label, list_of_target_labels, token_file='token.json'):
+    """
+    The awaitable counterpart of `get_relation_scores()`, made through the `AsyncWatsonClient`. The batches a long
+    target list is split into are fetched concurrently.
+    """
+    client = get_async_client(token_file)
+
+    def fetch(batch):
+        return _acoalesce(('relation_scores', token_file, label, tuple(batch)),
+                          lambda: client.get_relation_scores(label, batch))
+
+    batches = relation_scores_batches(label, list_of_target_labels, base_url=client.base_url)
+    if len(batches) <= 1:
+        return await fetch(list(list_of_target_labels))
+    responses = await asyncio.gather(*[fetch(batch) for batch in batches])
+    return {'scores': [score for response in responses for score in response['scores']]}
@@ -2,6 +2,7 @@ import os
 import json
 from watsongraph.conceptmodel import ConceptModel
 from watsongraph.conceptmodel import model as model_input
+from watsongraph.conceptmodel import amodel as amodel_input
 
 # Every augmentation is the ConceptModel of a new user-indicated Item of interest. I have to come up with some sort
 # of mathematically justified way of merging this new Item into the old model: decaying the old nodes and reinforcing
@@ -49,12 +50,14 @@ class Item:
         """
         return self.model.concepts()
 
-    def relevancies(self):
+    def relevancies(self, k=None):
         """
+        :param k: If given, only the `k` most relevant pairs are returned.
         :return: Sorted (relevance, concept) pairs associated with the Item.
         """
-        return sorted([("{0:.3f}".format(node.properties['relevance']), node.concept) for node in self.nodes()],
-                      reverse=True)
+        ranked = self.model.concepts_by_property('relevance') if k is None else self.model.top_k('relevance', k)
+        # Sort on the numbers themselves, and format them only afterwards.
+        return [("{0:.3f}".format(relevance), concept) for relevance, concept in ranked]
 
     def to_json(self):
         """
@@ -79,7 +82,8 @@ class Item:
 
     def save(self, filename='items.json'):
         """
-        Saves the Item to a JSON representation.
+        Saves the Item to a JSON representation. This rewrites the whole file; use a `catalog.ItemCatalog` to keep
+        many items.
 
         :param filename: The filename for the items storage file; `items.json` is the default.
         """
@@ -119,7 +123,24 @@ class Item:
             raise IOError("The item definitions file" + filename + "  appears to be missing!")
         list_of_items = json.load(open(filename))['items']
         for item in list_of_items:
-            if item['name'] != self:
-                continue
-            else:
+            if item['name'] == self.name:
                 self.load_from_json(item)
+                break
+
+
+async def aitem(name="", description=""):
+    """
+    The awaitable counterpart of `Item(name, description)`, which mines the description without blocking the event
+    loop.
+
+    :param name: The Item's name.
+
+    :param description: A textual description of what the Item is about or describes.
+
+    :return: The constructed `Item`.
+    """
+    item = Item(name)
+    item.description = description
+    if len(description) > 0:
+        item.model = await amodel_input(description)
+    return item
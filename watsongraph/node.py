@@ -1,6 +1,6 @@
-from mwviews.api import PageviewsClient
-import hashlib
+import sys
 import watsongraph.event_insight_lib
+import watsongraph.pageviews
 
 
 class Node:
@@ -13,19 +13,10 @@ class Node:
     through the overall `ConceptModel`.
     """
 
-    """
-    The name of the Wikipedia article associated with the node, e.g. Apple, Apple Inc., Nirvana (band), etc.
-    "Label" is the terminology used by the IBM Watson API for this attribute; "Concept" is the terminology used
-    instead by this library (we are building a `ConceptModel()` not a `LabelModel()`!).
-    """
-    concept = ""
-
-    """
-    A dictionary of arbitrary parameter:value tuples. `view_count` and `relevance` are two such parameters which
-    have baked-in support, but the point of this abstraction is that the user ought to be able to extend the data saved
-    in the ConceptModel object however they want to.
-    """
-    properties = None
+    # Nodes are by far the most numerous objects in a model, and networkx hashes them constantly, so they are kept as
+    # small and as cheap to hash as possible: no per-instance `__dict__`, a hash computed once up front, and no
+    # `properties` dictionary until one is needed.
+    __slots__ = ('_concept', '_hash', '_properties')
 
     def __init__(self, concept, **kwargs):
         """
@@ -36,37 +27,95 @@ class Node:
 
         :param kwargs: A list of property:value tuples to be passed to the `properties` parameter.
         """
-        self.concept = concept
-        self.properties = kwargs
-        if not self.properties:
-            self.properties = dict()
+        # Interning makes every Node of a given concept share a single copy of its label.
+        self._concept = sys.intern(concept)
+        self._hash = hash(self._concept)
+        self._properties = kwargs if kwargs else None
+
+    @property
+    def concept(self):
+        """
+        The name of the Wikipedia article associated with the node, e.g. Apple, Apple Inc., Nirvana (band), etc.
+        "Label" is the terminology used by the IBM Watson API for this attribute; "Concept" is the terminology used
+        instead by this library (we are building a `ConceptModel()` not a `LabelModel()`!). Read-only, since the
+        node's hash depends on it.
+        """
+        return self._concept
+
+    @property
+    def properties(self):
+        """
+        A dictionary of arbitrary parameter:value tuples. `view_count` and `relevance` are two such parameters which
+        have baked-in support, but the point of this abstraction is that the user ought to be able to extend the data
+        saved in the ConceptModel object however they want to. Allocated on first access.
+        """
+        if self._properties is None:
+            self._properties = dict()
+        return self._properties
+
+    @properties.setter
+    def properties(self, properties):
+        self._properties = properties
 
     def __eq__(self, other):
         """
         Two `Node` objects are equal when their `concept` attributes are the same string.
         """
-        if self and other:
-            return self.concept == other.concept
+        if isinstance(other, Node):
+            return self._concept == other._concept
         else:
             return False
 
     def __hash__(self):
         """
         Two concepts have an equivalent hash if their labels are equivalent. Comparison-by-hash is overwritten this
-        way to support `nx.compose()` as used in `conceptmodel.merge_with()`.
+        way so that nodes of the same concept coming from different models meet in `conceptmodel.merge_with()`.
         """
-        return int(hashlib.md5(self.concept.encode()).hexdigest(), 16)
+        return self._hash
+
+    def __repr__(self):
+        return 'Node(' + repr(self._concept) + ')'
+
+    def __getstate__(self):
+        # String hashes differ between processes, so the cached hash must not be pickled along with the node.
+        return self._concept, self._properties
 
-    def set_view_count(self):
+    def __setstate__(self, state):
+        concept, self._properties = state
+        self._concept = sys.intern(concept)
+        self._hash = hash(self._concept)
+
+    def copy(self):
+        """
+        :return: A new `Node` of the same concept, with a shallow copy of this node's properties.
         """
-        Sets the view_count parameter appropriately, using a 30-day average.
+        node = Node(self._concept)
+        if self._properties:
+            node._properties = dict(self._properties)
+        return node
+
+    def merge_properties(self, other, merge):
         """
-        p = PageviewsClient().article_views("en.wikipedia", [self.concept.replace(' ', '_')])
-        p = [p[key][self.concept.replace(' ', '_')] for key in p.keys()]
-        p = int(sum([daily_view_count for daily_view_count in p if daily_view_count])/len(p))
-        # self.view_count = p
-        self.properties['view_count'] = p
-        print(self.properties['view_count'])
+        Folds the properties of another `Node` of the same concept into this one. Properties which only `other` has
+        are copied over; for properties which both have, the value kept is `merge(prop, this value, other value)`.
+
+        :param other: The `Node` whose properties are being merged in. It is left unchanged.
+        :param merge: The function reconciling the values of properties which both nodes have.
+        """
+        if not other._properties:
+            return
+        properties = self.properties
+        for prop, value in other._properties.items():
+            properties[prop] = merge(prop, properties[prop], value) if prop in properties else value
+
+    def set_view_count(self, enricher=None):
+        """
+        Sets the view_count parameter appropriately, using a 30-day average. See `watsongraph.pageviews`.
+
+        :param enricher: The `pageviews.PageviewsEnricher` to use. Defaults to the process-wide one.
+        """
+        enricher = enricher if enricher is not None else watsongraph.pageviews.get_enricher()
+        self.set_property('view_count', enricher.view_counts([self.concept])[self.concept])
 
     def set_relevance(self, relevance):
         """
@@ -92,7 +141,16 @@ class Node:
         """
         :param prop: The property to be retrieved.
         """
-        return self.properties[prop]
+        if self._properties is None:
+            raise KeyError(prop)
+        return self._properties[prop]
+
+    def has_property(self, prop):
+        """
+        :param prop: The property being checked for.
+        :return: Whether or not the property is set, without allocating a `properties` dictionary if there is none.
+        """
+        return self._properties is not None and prop in self._properties
 
 
 def conceptualize(user_input):
@@ -106,6 +164,23 @@ def conceptualize(user_input):
     """
     # Fetch the precise name of the node (article title) associated with the institution.
     raw_concepts = watsongraph.event_insight_lib.annotate_text(user_input)
+    return _concept_from_annotations(raw_concepts)
+
+
+async def aconceptualize(user_input):
+    """
+    The awaitable counterpart of `conceptualize()`.
+
+    :param user_input: Arbitrary input, be it a name or a text string.
+    """
+    raw_concepts = await watsongraph.event_insight_lib.aannotate_text(user_input)
+    return _concept_from_annotations(raw_concepts)
+
+
+def _concept_from_annotations(raw_concepts):
+    """
+    Picks the best matching concept out of a raw `annotate_text` response, if there is one.
+    """
     # If the correction call is successful, keep going.
     if 'annotations' in raw_concepts.keys() and len(raw_concepts['annotations']) != 0:
         matched_concept_node_label = raw_concepts['annotations'][0]['concept']['label']
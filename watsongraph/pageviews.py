@@ -0,0 +1,212 @@
+"""pageviews.py
+    Wikipedia pageview enrichment: fills in the `view_count` property of concepts.
+    A `PageviewsEnricher` fetches the daily pageview series of many articles at a time through one shared `mwviews`
+    `PageviewsClient`, in concurrent batches, keeps each article's series until the day is out, and fills in the
+    `view_count` of every concept of a whole list of models in a single pass. The client is injectable, so that e.g.
+    `watsongraph.replay.SyntheticPageviewsClient` can stand in for the Wikimedia pageviews endpoint."""
+
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import threading
+from watsongraph.cache import CacheStats, MemoryCache
+from mwviews.api import PageviewsClient
+
+"""
+The User-Agent sent to the Wikimedia REST API, which asks that clients identify themselves.
+"""
+USER_AGENT = 'watsongraph (https://github.com/ResidentMario/watsongraph)'
+
+
+def _article(concept):
+    return concept.replace(' ', '_')
+
+
+def _default_client(parallelism):
+    """
+    :return: A `PageviewsClient` running `parallelism` requests at once.
+    """
+    try:
+        return PageviewsClient(USER_AGENT, parallelism=parallelism)
+    except TypeError:
+        # Older mwviews releases take no user agent.
+        return PageviewsClient(parallelism=parallelism)
+
+
+def average_views(series):
+    """
+    :param series: A `{day: views}` dictionary, in which days without data have a view count of `None`.
+    :return: The average number of views per day, rounded down, counting the days without data as zeroes.
+    """
+    return int(sum([views for views in series.values() if views]) / len(series)) if series else 0
+
+
+class PageviewsCache:
+    """
+    Cache for the daily pageview series of articles. An article's series for the `days` days up to today is valid
+    until the date changes, after which the next lookup is a miss and fetches it afresh.
+    """
+
+    def __init__(self, store=None):
+        """
+        :param store: The cache tier (or `TieredCache`) series are kept in. Defaults to a `MemoryCache`. Pass e.g.
+         `TieredCache(MemoryCache(), SQLiteCache(table='pageviews'))` to keep series across processes.
+        """
+        self.store = store if store is not None else MemoryCache(max_entries=100000)
+        self.stats = CacheStats()
+
+    @staticmethod
+    def _key(project, article, days):
+        return json.dumps(['pageviews', project, article, days])
+
+    def get(self, project, article, days, today):
+        """
+        :return: The cached `{YYYYMMDD: views}` series of the article, or `None` on a miss.
+        """
+        raw = self.store.get(self._key(project, article, days))
+        if raw is not None:
+            entry = json.loads(raw)
+            if entry['date'] == today.isoformat():
+                self.stats.hit()
+                return entry['series']
+        self.stats.miss()
+        return None
+
+    def set(self, project, article, days, today, series):
+        """
+        Stores the series of an article, as fetched on the date `today`.
+        """
+        self.store.set(self._key(project, article, days), json.dumps({'date': today.isoformat(), 'series': series}))
+
+    def clear(self):
+        self.store.clear()
+        self.stats.reset()
+
+
+class PageviewsEnricher:
+    """
+    Fetches Wikipedia pageview statistics for concepts in bulk and stores them as their `view_count` property.
+    """
+
+    def __init__(self, client=None, project='en.wikipedia', days=30, batch_size=50, workers=4, cache=None):
+        """
+        :param client: The `mwviews.api.PageviewsClient`, or a stand-in with the same `article_views()` method, that
+         requests are made through. Created on first use if not given.
+
+        :param project: The Wikimedia project the articles belong to.
+
+        :param days: The number of days, up to today, `view_count` is averaged over.
+
+        :param batch_size: The number of articles asked for in each `article_views()` call.
+
+        :param workers: The number of batches fetched concurrently. Each batch is itself fetched concurrently by the
+         client.
+
+        :param cache: The `PageviewsCache` article series are kept in. Defaults to an in-memory one.
+        """
+        self._client = client
+        self.project = project
+        self.days = days
+        self.batch_size = batch_size
+        self.workers = workers
+        self.cache = cache if cache is not None else PageviewsCache()
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = _default_client(parallelism=self.batch_size)
+            return self._client
+
+    def _today(self):
+        return datetime.date.today()
+
+    def _fetch(self, articles, start, end):
+        """
+        :return: A `{article: {YYYYMMDD: views}}` dictionary of the series of the given articles.
+        """
+        raw = self.client.article_views(self.project, articles, start=start, end=end)
+        series = {article: dict() for article in articles}
+        for day, views in raw.items():
+            for article in articles:
+                series[article][day.strftime('%Y%m%d')] = views.get(article)
+        return series
+
+    def series(self, concepts):
+        """
+        :param concepts: A list of concepts.
+        :return: A `{concept: {YYYYMMDD: views}}` dictionary of the daily pageviews of each of the concepts over the
+         last `days` days. Days without data have a view count of `None`.
+        """
+        today = self._today()
+        start = today - datetime.timedelta(self.days)
+        found = dict()
+        missing = []
+        for article in dict.fromkeys(_article(concept) for concept in concepts):
+            cached = self.cache.get(self.project, article, self.days, today)
+            if cached is not None:
+                found[article] = cached
+            else:
+                missing.append(article)
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        if self.workers > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+                fetched = list(executor.map(lambda batch: self._fetch(batch, start, today), batches))
+        else:
+            fetched = [self._fetch(batch, start, today) for batch in batches]
+        for batch_series in fetched:
+            for article, article_series in batch_series.items():
+                self.cache.set(self.project, article, self.days, today, article_series)
+                found[article] = article_series
+        return {concept: found[_article(concept)] for concept in concepts}
+
+    def view_counts(self, concepts):
+        """
+        :param concepts: A list of concepts.
+        :return: A `{concept: view_count}` dictionary of the average daily pageviews of each of the concepts over the
+         last `days` days.
+        """
+        return {concept: average_views(series) for concept, series in self.series(concepts).items()}
+
+    def enrich(self, models):
+        """
+        Sets the `view_count` property of every concept of the given models, fetching the pageviews of each distinct
+        concept once.
+
+        :param models: A `ConceptModel` or `CompactConceptModel`, or a list of them.
+        """
+        if not isinstance(models, (list, tuple)):
+            models = [models]
+        concepts = list(dict.fromkeys(concept for model in models for concept in model.concept_set()))
+        view_counts = self.view_counts(concepts)
+        for model in models:
+            model.set_properties('view_count', {concept: view_counts[concept] for concept in model.concept_set()})
+
+
+_enricher = None
+_enricher_lock = threading.Lock()
+
+
+def get_enricher():
+    """
+    :return: The process-wide `PageviewsEnricher` used by `ConceptModel.set_view_counts()` and
+     `Node.set_view_count()`, creating a default one if none has been set.
+    """
+    global _enricher
+    with _enricher_lock:
+        if _enricher is None:
+            _enricher = PageviewsEnricher()
+        return _enricher
+
+
+def set_enricher(enricher):
+    """
+    Replaces the process-wide `PageviewsEnricher`, e.g. with one reading from a local stand-in client or keeping its
+    cache on disk.
+
+    :param enricher: The enricher to use from now on.
+    """
+    global _enricher
+    with _enricher_lock:
+        _enricher = enricher
@@ -0,0 +1,374 @@
+"""replay.py
+    Offline stand-ins for the IBM Watson Concept Insights API.
+    `ReplayBackend` answers `annotate_text`, `related_concepts` and `relation_scores` calls from a `FixtureStore` of
+    recorded responses, a `SyntheticConceptGraph`, or both, with optional injected latency. `RecordingBackend` wraps
+    a live backend and captures its responses into a `FixtureStore`. Either can be installed with
+    `watsongraph.event_insight_lib.set_backend()`, which lets `ConceptModel`, `Item` and `User` run without a network
+    connection, e.g. in CI or in performance tests. `SyntheticPageviewsClient` likewise stands in for the Wikipedia
+    pageviews API used by `watsongraph.pageviews`."""
+
+import asyncio
+import datetime
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from watsongraph.event_insight_lib import AsyncBackend, Backend, get_client
+
+CONCEPT_PREFIX = '/graphs/wikipedia/en-20120601/concepts/'
+
+
+def _concept_id(label):
+    return CONCEPT_PREFIX + label.replace(' ', '_')
+
+
+class FixtureStore:
+    """
+    A collection of recorded API responses, keyed on the request that produced them, which can be saved to and
+    loaded from a JSON file.
+    """
+
+    def __init__(self, filename=None):
+        """
+        :param filename: The fixture file to load responses from and save them to. If it exists, it is loaded
+         immediately.
+        """
+        self.filename = filename
+        self._responses = dict()
+        # The key of the `related_concepts` response with the largest limit recorded for each `(label, level)`.
+        self._largest = dict()
+        self._lock = threading.Lock()
+        if filename and os.path.isfile(filename):
+            self.load(filename)
+
+    @staticmethod
+    def _key(endpoint, *args):
+        return json.dumps([endpoint] + list(args))
+
+    def get(self, endpoint, *args):
+        """
+        :param endpoint: One of `annotate_text`, `related_concepts` or `relation_scores`.
+        :param args: The arguments of the request, as passed to the corresponding `Backend` method.
+        :return: The recorded response, or `None` if there is none.
+        """
+        with self._lock:
+            response = self._responses.get(self._key(endpoint, *args))
+            if response is None and endpoint == 'related_concepts':
+                # A recorded response for a larger limit also answers a smaller one.
+                label, level, limit = args
+                largest = self._largest.get(self._key(label, level))
+                if largest is not None and largest[0] >= limit:
+                    candidate = self._responses[largest[1]]
+                    response = dict(candidate, concepts=candidate['concepts'][:limit])
+        return response
+
+    def _record(self, request, response):
+        """
+        Records a response under the lock, given its request as an `[endpoint, *args]` list.
+        """
+        key = json.dumps(request)
+        self._responses[key] = response
+        if request[0] == 'related_concepts':
+            endpoint, label, level, limit = request
+            largest = self._largest.get(self._key(label, level))
+            if largest is None or limit >= largest[0]:
+                self._largest[self._key(label, level)] = (limit, key)
+
+    def put(self, endpoint, args, response):
+        """
+        Records a response.
+
+        :param endpoint: One of `annotate_text`, `related_concepts` or `relation_scores`.
+        :param args: The arguments of the request, as a list.
+        :param response: The response.
+        """
+        with self._lock:
+            self._record([endpoint] + list(args), response)
+
+    def load(self, filename):
+        with open(filename) as f:
+            data = json.load(f)
+        with self._lock:
+            for record in data['responses']:
+                self._record(record['request'], record['response'])
+
+    def save(self, filename=None):
+        """
+        Writes every recorded response to `filename`, or to the file the store was created with.
+        """
+        filename = filename if filename else self.filename
+        with self._lock:
+            records = [{'request': json.loads(key), 'response': response}
+                       for key, response in self._responses.items()]
+        with open(filename, 'w') as f:
+            json.dump({'version': 1, 'responses': records}, f, indent=4)
+
+    def __len__(self):
+        return len(self._responses)
+
+
+class SyntheticConceptGraph:
+    """
+    A deterministic, procedurally generated stand-in for the `wikipedia/en-20120601` concept graph. Any label is a
+    valid concept; its related concepts and relation scores are derived from a checksum of its label, so the same
+    question always gets the same answer, in any process.
+    """
+
+    def __init__(self, size=100000, seed=0):
+        """
+        :param size: The number of distinct concepts (`Concept 0` through `Concept {size - 1}`) that related concept
+         lookups and text annotations draw from.
+        :param seed: Varies the generated graph.
+        """
+        self.size = size
+        self.seed = seed
+
+    def _random(self, *args):
+        return random.Random(zlib.crc32(json.dumps([self.seed] + list(args)).encode('utf-8')))
+
+    def _label(self, i):
+        return 'Concept ' + str(i)
+
+    def annotate_text(self, text, content_type='text/plain'):
+        annotations = []
+        seen = set()
+        for match in re.finditer(r'\w+', text):
+            word = match.group(0).lower()
+            if word in seen:
+                continue
+            seen.add(word)
+            rng = self._random('annotate', word)
+            label = self._label(rng.randrange(self.size))
+            annotations.append({'concept': {'id': _concept_id(label), 'label': label},
+                                'score': round(rng.uniform(0.5, 1.0), 6),
+                                'text_index': [match.start(), match.end()]})
+        return {'annotations': annotations}
+
+    def get_related_concepts(self, label, level=0, limit=10):
+        """
+        :return: The `limit` concepts most related to `label`, ranked. Each rank is drawn in turn, from random streams
+         of its own, so that the answer for a smaller `limit` is always a prefix of that for a larger one, as it is
+         for the real service and as the caches, which serve smaller limits out of larger ones, expect.
+        """
+        labels_rng = self._random('related', label, level)
+        scores_rng = self._random('related scores', label, level)
+        concepts = []
+        seen = set()
+        # Scores decrease from rank to rank, from close to 1 toward 0.5.
+        distance = 0.0
+        while len(concepts) < min(limit, self.size):
+            i = labels_rng.randrange(self.size)
+            if i in seen:
+                continue
+            seen.add(i)
+            distance += scores_rng.uniform(0.0, 0.2)
+            related = self._label(i)
+            concepts.append({'concept': {'id': _concept_id(related), 'label': related},
+                             'score': round(0.5 + 0.5 / (1.0 + distance), 6)})
+        return {'concepts': concepts}
+
+    def get_relation_scores(self, label, list_of_target_labels):
+        scores = []
+        for t_label in list_of_target_labels:
+            # Relation scores are symmetric.
+            rng = self._random('relation', *sorted([label, t_label]))
+            scores.append({'concept': _concept_id(t_label), 'score': round(rng.random(), 6)})
+        return {'scores': scores}
+
+
+class SyntheticPageviewsClient:
+    """
+    A deterministic local stand-in for `mwviews.api.PageviewsClient`, for use with
+    `watsongraph.pageviews.PageviewsEnricher`. Every article has a made-up daily view count, derived from a checksum of
+    its name and of the day.
+    """
+
+    def __init__(self, seed=0, max_views=10000, latency=0.0):
+        """
+        :param seed: Varies the generated view counts.
+        :param max_views: View counts range from zero up to this.
+        :param latency: Seconds of delay injected into every `article_views()` call.
+        """
+        self.seed = seed
+        self.max_views = max_views
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def article_views(self, project, articles, access='all-access', agent='all-agents', granularity='daily',
+                      start=None, end=None):
+        """
+        :return: The same `{day: {article: views}}` dictionary as `PageviewsClient.article_views()`, for daily
+         granularity, with days as `datetime.datetime` objects. `start` and `end` must be `datetime.date` objects.
+        """
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(articles, str):
+            articles = [articles]
+        articles = [article.replace(' ', '_') for article in articles]
+        end = end if end is not None else datetime.date.today()
+        start = start if start is not None else end - datetime.timedelta(30)
+        output = dict()
+        for offset in range((end - start).days + 1):
+            day = start + datetime.timedelta(offset)
+            output[datetime.datetime(day.year, day.month, day.day)] = {
+                article: zlib.crc32(json.dumps([self.seed, project, article, day.isoformat()]).encode('utf-8')) %
+                (self.max_views + 1) for article in articles}
+        return output
+
+
+class ReplayBackend(Backend):
+    """
+    A `Backend` which answers API calls locally: from a `FixtureStore` of recorded responses if it has the answer,
+    and otherwise from a `SyntheticConceptGraph`, if one was given. With neither able to answer, a `KeyError` is
+    raised.
+    """
+
+    def __init__(self, fixtures=None, graph=None, latency=0.0, jitter=0.0):
+        """
+        :param fixtures: A `FixtureStore`, or the filename of one.
+
+        :param graph: A `SyntheticConceptGraph` answering whatever the fixtures do not.
+
+        :param latency: Seconds of delay injected into every call, to simulate the round trip to the service.
+         Either a number, or a dictionary mapping each of `annotate_text`, `related_concepts` and `relation_scores`
+         to a number.
+
+        :param jitter: Up to this many seconds of additional, uniformly distributed delay are injected into every
+         call.
+        """
+        if isinstance(fixtures, str):
+            fixtures = FixtureStore(fixtures)
+        self.fixtures = fixtures
+        self.graph = graph
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def delay(self, endpoint):
+        """
+        :return: The number of seconds a call to `endpoint` should be delayed by.
+        """
+        latency = self.latency.get(endpoint, 0.0) if isinstance(self.latency, dict) else self.latency
+        return latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def respond(self, endpoint, *args):
+        """
+        Looks up the response to a call without injecting any latency.
+        """
+        with self._lock:
+            self.calls += 1
+        if self.fixtures is not None:
+            response = self.fixtures.get(endpoint, *args)
+            if response is not None:
+                return json.loads(json.dumps(response))
+        if self.graph is not None:
+            if endpoint == 'annotate_text':
+                return self.graph.annotate_text(*args)
+            elif endpoint == 'related_concepts':
+                return self.graph.get_related_concepts(*args)
+            else:
+                return self.graph.get_relation_scores(*args)
+        raise KeyError('No recorded response for the ' + endpoint + ' request ' + json.dumps(list(args)))
+
+    def _call(self, endpoint, *args):
+        delay = self.delay(endpoint)
+        if delay:
+            time.sleep(delay)
+        return self.respond(endpoint, *args)
+
+    def annotate_text(self, text, content_type='text/plain'):
+        return self._call('annotate_text', text, content_type)
+
+    def get_related_concepts(self, label, level=0, limit=10):
+        return self._call('related_concepts', label, level, limit)
+
+    def get_relation_scores(self, label, list_of_target_labels):
+        return self._call('relation_scores', label, list(list_of_target_labels))
+
+    def async_backend(self):
+        """
+        :return: An `AsyncBackend` serving the same responses, whose injected latency does not block the event loop.
+        """
+        return AsyncReplayBackend(self)
+
+
+class AsyncReplayBackend(AsyncBackend):
+    """
+    The asyncio counterpart of `ReplayBackend`. Created by `ReplayBackend.async_backend()`.
+    """
+
+    def __init__(self, backend):
+        """
+        :param backend: The `ReplayBackend` whose responses are served.
+        """
+        self.backend = backend
+
+    @property
+    def base_url(self):
+        return self.backend.base_url
+
+    async def _call(self, endpoint, *args):
+        delay = self.backend.delay(endpoint)
+        if delay:
+            await asyncio.sleep(delay)
+        return self.backend.respond(endpoint, *args)
+
+    async def annotate_text(self, text, content_type='text/plain'):
+        return await self._call('annotate_text', text, content_type)
+
+    async def get_related_concepts(self, label, level=0, limit=10):
+        return await self._call('related_concepts', label, level, limit)
+
+    async def get_relation_scores(self, label, list_of_target_labels):
+        return await self._call('relation_scores', label, list(list_of_target_labels))
+
+
+class RecordingBackend(Backend):
+    """
+    A `Backend` which forwards every call to another one, usually the live `WatsonClient`, and records the responses
+    into a `FixtureStore` for later replay by a `ReplayBackend`. Note that calls answered by the caches in
+    `event_insight_lib` never reach the backend, so clear them before recording.
+    """
+
+    def __init__(self, fixtures, backend=None):
+        """
+        :param fixtures: The `FixtureStore` responses are recorded into, or the filename of one.
+
+        :param backend: The backend being recorded. Defaults to the current process-wide client.
+        """
+        if isinstance(fixtures, str):
+            fixtures = FixtureStore(fixtures)
+        self.fixtures = fixtures
+        self.backend = backend if backend is not None else get_client()
+
+    @property
+    def base_url(self):
+        return self.backend.base_url
+
+    def annotate_text(self, text, content_type='text/plain'):
+        response = self.backend.annotate_text(text, content_type)
+        self.fixtures.put('annotate_text', [text, content_type], response)
+        return response
+
+    def get_related_concepts(self, label, level=0, limit=10):
+        response = self.backend.get_related_concepts(label, level, limit)
+        self.fixtures.put('related_concepts', [label, level, limit], response)
+        return response
+
+    def get_relation_scores(self, label, list_of_target_labels):
+        response = self.backend.get_relation_scores(label, list_of_target_labels)
+        self.fixtures.put('relation_scores', [label, list(list_of_target_labels)], response)
+        return response
+
+    def save(self, filename=None):
+        """
+        Writes the recorded responses to disk. See `FixtureStore.save()`.
+        """
+        self.fixtures.save(filename)
@@ -0,0 +1,386 @@
+"""scheduling.py
+    Flow control for calls to the IBM Watson Concept Insights API.
+    The service throttles clients which call it too quickly and intermittently fails under load (see
+    https://github.com/ResidentMario/watsongraph/issues/6). A `Scheduler` wraps each call with a token-bucket rate
+    limit, an adaptive (AIMD) cap on the number of calls in flight and jittered exponential-backoff retries, with
+    separate budgets per API endpoint, so that bulk jobs run as fast as the service tolerates instead of failing.
+    Schedulers are used by passing them to `event_insight_lib.WatsonClient` or `event_insight_lib.AsyncWatsonClient`.
+    `SingleFlight`, which `event_insight_lib` uses to merge identical calls made at the same time, also lives here."""
+
+import asyncio
+import concurrent.futures
+import random
+import threading
+import time
+
+"""
+HTTP status codes which indicate that the service is overloaded or otherwise temporarily unable to answer, and that
+the call should be retried.
+"""
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def is_retryable(exc):
+    """
+    The default test of whether a failed call should be retried: it should if the service answered with one of
+    `RETRY_STATUSES`, or if it could not be reached at all (connection errors and timeouts).
+
+    :param exc: The exception raised by the call.
+    """
+    response = getattr(exc, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        # aiohttp.ClientResponseError carries the status on the exception itself.
+        status = getattr(exc, 'status', None)
+    if isinstance(status, int):
+        return status in RETRY_STATUSES
+    return isinstance(exc, (OSError, asyncio.TimeoutError))
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: allows `rate` calls per second on average, and bursts of up to `burst` calls.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        :param rate: The sustained number of calls allowed per second.
+        :param burst: The number of calls which may be made back-to-back. Defaults to `rate` (one second's worth).
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes a token, going into debt if the bucket is empty.
+
+        :return: The number of seconds the caller must wait before making its call.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class AdaptiveLimit:
+    """
+    A cap on the number of calls in flight which adapts to how the service is coping, in the manner of TCP congestion
+    control (additive increase, multiplicative decrease). Every successful call raises the cap by `increase /
+    limit`, so that it grows by about `increase` per round of calls. A failed call, or a call slower than
+    `latency_target`, multiplies it by `decrease` instead.
+
+    Both threads and coroutines may wait for a slot.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1.0, decrease=0.5, latency_target=None):
+        """
+        :param initial: The initial cap.
+        :param minimum: The cap is never lowered below this.
+        :param maximum: The cap is never raised above this.
+        :param increase: How much the cap grows per round of successful calls.
+        :param decrease: The factor the cap is multiplied by upon a failure.
+        :param latency_target: Calls which take longer than this many seconds count as a sign of overload. `None`,
+         the default, disables the latency signal, so that only errors lower the cap.
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._async_waiters = []
+
+    def _try_acquire(self):
+        # Must hold the lock.
+        if self.in_flight < max(1, int(self.limit)):
+            self.in_flight += 1
+            return True
+        return False
+
+    def acquire(self):
+        """
+        Blocks until a slot is free, then takes it.
+        """
+        with self._condition:
+            while not self._try_acquire():
+                self._condition.wait()
+
+    async def aacquire(self):
+        """
+        Waits, without blocking the event loop, until a slot is free, then takes it.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self, ok, latency=None):
+        """
+        Gives a slot back and adjusts the cap according to how the call went.
+
+        :param ok: Whether the call succeeded, or `None` to leave the cap unchanged.
+        :param latency: How long the call took, in seconds.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if ok is not None:
+                overloaded = not ok or (self.latency_target is not None and latency is not None and
+                                        latency > self.latency_target)
+                if overloaded:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                else:
+                    self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._condition.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Scheduler:
+    """
+    Runs API calls under a per-endpoint rate limit and adaptive concurrency cap, retrying failed calls with jittered
+    exponential backoff. Each endpoint (`annotate_text`, `related_concepts`, `relation_scores`) has its own budget, so
+    that a flood of calls to one does not starve the others.
+    """
+
+    def __init__(self, rate=None, burst=None, initial_concurrency=4, max_concurrency=64, latency_target=None,
+                 retries=5, backoff_factor=0.5, max_backoff=30.0, retryable=is_retryable, budgets=None):
+        """
+        :param rate: The default number of calls per second allowed to each endpoint. `None` means unlimited.
+
+        :param burst: The default token-bucket burst size. See `TokenBucket`.
+
+        :param initial_concurrency: The default initial cap on calls in flight to each endpoint.
+
+        :param max_concurrency: The default upper bound of that cap.
+
+        :param latency_target: The default latency, in seconds, above which calls count as a sign of overload. See
+         `AdaptiveLimit`.
+
+        :param retries: How many times a failed call is retried before its error is raised.
+
+        :param backoff_factor: Retry `n` sleeps for a random time between 0 and `backoff_factor * 2 ** n` seconds.
+
+        :param max_backoff: The longest a retry ever sleeps for, in seconds.
+
+        :param retryable: A function deciding whether the exception raised by a failed call warrants a retry.
+
+        :param budgets: A dictionary overriding any of `rate`, `burst`, `initial_concurrency`, `max_concurrency` and
+         `latency_target` per endpoint, e.g. `{'relation_scores': {'rate': 2}}`.
+        """
+        self.defaults = {'rate': rate, 'burst': burst, 'initial_concurrency': initial_concurrency,
+                         'max_concurrency': max_concurrency, 'latency_target': latency_target}
+        self.budgets = budgets if budgets else dict()
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retryable = retryable
+        self._endpoints = dict()
+        self._lock = threading.Lock()
+
+    def _endpoint(self, endpoint):
+        """
+        :return: The `(TokenBucket or None, AdaptiveLimit)` budget of the given endpoint, created on first use.
+        """
+        with self._lock:
+            if endpoint not in self._endpoints:
+                settings = dict(self.defaults, **self.budgets.get(endpoint, dict()))
+                bucket = TokenBucket(settings['rate'], settings['burst']) if settings['rate'] else None
+                limit = AdaptiveLimit(initial=settings['initial_concurrency'],
+                                      maximum=settings['max_concurrency'],
+                                      latency_target=settings['latency_target'])
+                self._endpoints[endpoint] = (bucket, limit)
+            return self._endpoints[endpoint]
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+    def call(self, endpoint, func):
+        """
+        Calls `func()` under the budget of `endpoint`, retrying it as necessary.
+
+        :param endpoint: The name of the endpoint being called.
+        :param func: A function making the call and returning its result.
+        """
+        bucket, limit = self._endpoint(endpoint)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                wait = bucket.reserve()
+                if wait:
+                    time.sleep(wait)
+            limit.acquire()
+            start = time.monotonic()
+            try:
+                result = func()
+            except Exception as exc:
+                retryable = self.retryable(exc)
+                # Only overload and timeouts say anything about how the service is coping; a bad request does not.
+                limit.release(False if retryable else None)
+                if attempt >= self.retries or not retryable:
+                    raise
+            except BaseException:
+                # Cancelled, or interrupted: says nothing about the service's health.
+                limit.release(None)
+                raise
+            else:
+                limit.release(True, time.monotonic() - start)
+                return result
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    async def acall(self, endpoint, func):
+        """
+        The asyncio counterpart of `call()`.
+
+        :param endpoint: The name of the endpoint being called.
+        :param func: A function returning an awaitable which makes the call.
+        """
+        bucket, limit = self._endpoint(endpoint)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                wait = bucket.reserve()
+                if wait:
+                    await asyncio.sleep(wait)
+            await limit.aacquire()
+            start = time.monotonic()
+            try:
+                result = await func()
+            except Exception as exc:
+                retryable = self.retryable(exc)
+                # Only overload and timeouts say anything about how the service is coping; a bad request does not.
+                limit.release(False if retryable else None)
+                if attempt >= self.retries or not retryable:
+                    raise
+            except BaseException:
+                # Cancelled, or interrupted: says nothing about the service's health.
+                limit.release(None)
+                raise
+            else:
+                limit.release(True, time.monotonic() - start)
+                return result
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def stats(self):
+        """
+        :return: A dictionary mapping each endpoint called so far to its current concurrency cap and number of calls
+         in flight.
+        """
+        with self._lock:
+            return {endpoint: {'limit': limit.limit, 'in_flight': limit.in_flight}
+                    for endpoint, (bucket, limit) in self._endpoints.items()}
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for a given key is in flight, further callers asking for the
+    same key wait for it and share its result (or its exception) instead of making calls of their own. Threads and
+    coroutines may mix freely, each joining calls made by the other.
+
+    The result is shared, not copied, so callers must not modify it.
+    """
+
+    def __init__(self):
+        self._calls = dict()
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        """
+        :return: A `(future, leader)` tuple: the future of the call in flight for `key`, and whether the caller is
+         the one who must make it.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = concurrent.futures.Future()
+            self._calls[key] = future
+            return future, True
+
+    def _finish(self, key, future, result=None, exc=None, abandoned=False):
+        with self._lock:
+            del self._calls[key]
+        if abandoned:
+            # The leader was cancelled or interrupted. Cancelling the future sends the followers back to try again.
+            future.cancel()
+        elif exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    def do(self, key, func):
+        """
+        Returns the result of `func()`, or of the identical call already in flight for `key`.
+
+        :param key: A hashable identifying the call, e.g. `('related_concepts', label, level, limit)`.
+        :param func: A function making the call.
+        """
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return future.result()
+                except concurrent.futures.CancelledError:
+                    continue
+            try:
+                result = func()
+            except Exception as exc:
+                self._finish(key, future, exc=exc)
+                raise
+            except BaseException:
+                self._finish(key, future, abandoned=True)
+                raise
+            self._finish(key, future, result=result)
+            return result
+
+    async def ado(self, key, func):
+        """
+        The asyncio counterpart of `do()`.
+
+        :param key: A hashable identifying the call.
+        :param func: A function returning an awaitable which makes the call.
+        """
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return await asyncio.wrap_future(future)
+                except asyncio.CancelledError:
+                    if future.cancelled():
+                        continue
+                    raise
+            try:
+                result = await func()
+            except Exception as exc:
+                self._finish(key, future, exc=exc)
+                raise
+            except BaseException:
+                self._finish(key, future, abandoned=True)
+                raise
+            self._finish(key, future, result=result)
+            return result
+
+    def in_flight(self):
+        """
+        :return: The number of distinct calls currently in flight.
+        """
+        return len(self._calls)
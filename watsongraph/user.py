@@ -1,8 +1,11 @@
-import os
-import json
+import asyncio
 import statistics
+import threading
+import time
 from watsongraph.conceptmodel import ConceptModel
-from watsongraph.node import conceptualize
+from watsongraph.item import Item
+from watsongraph.node import conceptualize, aconceptualize
+from watsongraph.userstore import get_store
 
 
 class User:
@@ -48,12 +51,14 @@ class User:
         """
         return self.model.concepts()
 
-    def interests(self):
+    def interests(self, k=None):
         """
+        :param k: If given, only the user's `k` strongest interests are returned.
         :return: Returns (interest, concept) pair tuples associated with the user.
         """
-        return sorted([("{0:.3f}".format(node.get_relevance()), node.concept) for node in self.model.nodes()],
-                      reverse=True)
+        ranked = self.model.concepts_by_property('relevance') if k is None else self.model.top_k('relevance', k)
+        # Sort on the numbers themselves, and format them only afterwards.
+        return [("{0:.3f}".format(relevance), concept) for relevance, concept in ranked]
 
     def interest_in(self, item):
         """
@@ -98,17 +103,22 @@ class User:
         # Raise correlated relevancies.
         item_copy = item.model.copy()
         # self.model.merge_with(item.model)
-        for concept in [concept for concept in item.concepts() if concept in self.concepts()]:
+        user_concepts = self.model.concept_set()
+        item_concepts = item_copy.concept_set()
+        for concept in [concept for concept in item_concepts if concept in user_concepts]:
             new_relevance = min(1.0, statistics.mean([self.model.get_node(concept).get_relevance(),
                                                       item.model.get_node(concept).get_relevance()]) * 1.2)
             item_copy.get_node(concept).properties['relevance'] = new_relevance
         # Bump down uncorrelated relevancies.
-        for concept in [concept for concept in self.concepts() if concept not in item_copy.concepts()]:
+        for concept in [concept for concept in user_concepts if concept not in item_concepts]:
             self.model.get_node(concept).properties['relevance'] *= 0.9
         # Remove irrelevant concepts (to keep the model relatively clean).
         self.model.merge_with(item_copy)
-        for concept in [concept for concept in self.concepts() if self.model.get_node(concept).get_relevance() <= 0.2]:
-            self.model.remove(concept)
+        self._remove_irrelevant_concepts()
+        # Mark the concepts the item accounts for, so that abridging the model's expansions keeps them.
+        user_concepts = self.model.concept_set()
+        for concept in [concept for concept in item_concepts if concept in user_concepts]:
+            self.model.add_reference(concept, item.name)
         self.exceptions.append(item.name)
 
     def express_disinterest(self, item):
@@ -121,11 +131,80 @@ class User:
         """
         self.exceptions.append(item.name)
         # Scale down overlapping concepts.
-        for concept in [concept for concept in item.concepts() if concept in self.concepts()]:
+        user_concepts = self.model.concept_set()
+        for concept in [concept for concept in item.model.concept_set() if concept in user_concepts]:
             self.model.get_node(concept).properties['relevance'] *= 0.75
+            self.model.remove_reference(concept, item.name)
         # Remove irrelevant concepts (to keep the model relatively clean).
-        for concept in [concept for concept in self.concepts() if self.model.get_node(concept).get_relevance() <= 0.2]:
-            self.model.remove(concept)
+        self._remove_irrelevant_concepts()
+
+    def record_interest(self, item, filename='accounts.db', store=None):
+        """
+        Expresses interest in an item (see `express_interest()`) and persists it by appending a feedback event to the
+        user's log in the account storage, which costs time proportional to the size of the item rather than to that
+        of the user's model. `load_user()` replays the event.
+
+        :param item: Event object the user is expressing interest in.
+
+        :param filename: The filename for the account storage file; `accounts.db` is the default.
+
+        :param store: The `userstore.UserStore` to log to, in place of the one of `filename`. It must keep an event
+         log, as `userstore.SQLiteUserStore` does.
+
+        """
+        self._record_feedback(item, 'interest', filename, store)
+
+    def record_disinterest(self, item, filename='accounts.db', store=None):
+        """
+        Expresses disinterest in an item (see `express_disinterest()`) and persists it by appending a feedback event
+        to the user's log. See `record_interest()`.
+
+        :param item: Event object the user is expressing disinterest in.
+
+        :param filename: The filename for the account storage file; `accounts.db` is the default.
+
+        :param store: The `userstore.UserStore` to log to, in place of the one of `filename`.
+
+        """
+        self._record_feedback(item, 'disinterest', filename, store)
+
+    def _record_feedback(self, item, kind, filename, store):
+        store = store if store is not None else get_store(filename)
+        if not store.keeps_events:
+            raise RuntimeError(type(store).__name__ + ' keeps no feedback event log.')
+        self._apply_feedback(item, kind)
+        if self.id in store:
+            store.append_events(self.id, [{'item': item.name, 'kind': kind, 'timestamp': time.time(),
+                                           'model': item.model.to_json()}])
+        else:
+            # There is no snapshot to log the event against yet, so the first one covers it.
+            store.save(self._to_record())
+
+    def _apply_feedback(self, item, kind):
+        if kind == 'interest':
+            self.express_interest(item)
+        elif kind == 'disinterest':
+            self.express_disinterest(item)
+        else:
+            raise RuntimeError('Unknown kind of feedback ' + str(kind))
+
+    def _replay(self, events):
+        """
+        Applies logged feedback events to the user, in order.
+
+        :param events: The `(sequence number, event)` tuples returned by `userstore.UserStore.load_events()`.
+        """
+        for seq, event in events:
+            item = Item(event['item'])
+            item.model.load_from_json(event['model'])
+            self._apply_feedback(item, event['kind'])
+
+    def _remove_irrelevant_concepts(self):
+        """
+        Removes the concepts with a relevance of 0.2 or less from the user's model.
+        """
+        for node in [node for node in self.model.nodes() if node.get_relevance() <= 0.2]:
+            self.model.remove(node.concept)
 
     def input_interest(self, interest, level=0, limit=20):
         """
@@ -147,10 +226,35 @@ class User:
             mapped_model = ConceptModel([mapped_concept])
             mapped_model.get_node(mapped_concept).properties['relevance'] = 1.0
             mapped_model.explode(level=level, limit=limit)
-            # Set relevancies based on edge weights.
-            for node in list(mapped_model.graph[mapped_model.get_node(mapped_concept)].keys()):
-                node.properties['relevance'] = mapped_model.graph[mapped_model.get_node(mapped_concept)][node]['weight']
-            self.model.merge_with(mapped_model)
+            self._merge_interest_model(mapped_concept, mapped_model)
+
+    async def ainput_interest(self, interest, level=0, limit=20):
+        """
+        The awaitable counterpart of `input_interest()`.
+        """
+        await self.ainput_interests([interest], level=level, limit=limit)
+
+    async def _amodel_interest(self, interest, level=0, limit=20):
+        """
+        Resolves arbitrary user input to a concept and returns it alongside its exploded `ConceptModel`, or `(None,
+        None)` if the input does not resolve to anything.
+        """
+        mapped_concept = await aconceptualize(interest)
+        if not mapped_concept:
+            return None, None
+        mapped_model = ConceptModel([mapped_concept])
+        mapped_model.get_node(mapped_concept).properties['relevance'] = 1.0
+        await mapped_model.aexplode(level=level, limit=limit)
+        return mapped_concept, mapped_model
+
+    def _merge_interest_model(self, mapped_concept, mapped_model):
+        """
+        Sets the relevancies of an exploded interest's concepts based on their edge weights, and adds them to the
+        user's model.
+        """
+        for node in list(mapped_model.graph[mapped_model.get_node(mapped_concept)].keys()):
+            node.properties['relevance'] = mapped_model.graph[mapped_model.get_node(mapped_concept)][node]['weight']
+        self.model.merge_with(mapped_model)
 
     def input_interests(self, interests, level=0, limit=20):
         """
@@ -170,105 +274,215 @@ class User:
         for interest in interests:
             self.input_interest(interest, level=level, limit=limit)
 
+    async def ainput_interests(self, interests, level=0, limit=20):
+        """
+        The awaitable counterpart of `input_interests()`. Every interest is resolved and exploded concurrently, then
+        added to the user's model in the order given.
+        """
+        mapped = await asyncio.gather(*[self._amodel_interest(interest, level=level, limit=limit)
+                                        for interest in interests])
+        for mapped_concept, mapped_model in mapped:
+            if mapped_concept:
+                self._merge_interest_model(mapped_concept, mapped_model)
+
     #######################
     # Read/write methods. #
     #######################
 
-    def save_user(self, filename='accounts.json'):
+    def _to_record(self):
         """
-        Saves a user to a JSON file.
-
-        :param self: The user to be saved to JSON.
-
-        :param filename: The filename for the account storage file; `accounts.json` is the default.
-
+        :return: The user's account record, as kept by a `userstore.UserStore`.
         """
-        user_schema = {
+        return {
             "password": self.password,
             "model": self.model.to_json(),
             "id": self.id,
             "exceptions": self.exceptions
         }
-        if filename not in [f for f in os.listdir('.') if os.path.isfile(f)]:
-            new_file_schema = {
-                "accounts":
-                    [user_schema]
-            }
-            f = open(filename, 'w')
-            f.write(json.dumps(new_file_schema, indent=4))
-            f.close()
-        else:
-            data = json.load(open(filename))
-            ids = [account['id'] for account in data['accounts']]
-            if self.id not in ids:
-                data['accounts'].append(user_schema)
-                with open(filename, 'w') as outfile:
-                    json.dump(data, outfile, indent=4)
-            if self.id in ids:
-                user_index = 0
-                for i in range(0, len(data['accounts'])):
-                    if data['accounts'][i]['id'] == self.id:
-                        user_index = i
-                        break
-                data['accounts'][user_index] = user_schema
-                with open(filename, 'w') as outfile:
-                    json.dump(data, outfile, indent=4)
-
-    def load_user(self, filename='accounts.json'):
-        """
-        Load a user from a JSON file.
-
-        :param filename: The filename for the account storage file; `accounts.json` is the default.
-
-        """
-        if filename not in [f for f in os.listdir('.') if os.path.isfile(f)]:
-            raise IOError('Error: accounts file ' + filename + ' not found.')
-        else:
-            data = json.load(open(filename))
-            user_ids = [account['id'] for account in data['accounts']]
-            if self.id not in user_ids:
-                raise IOError('Error: User with the ID ' + self.id + ' not found in accounts file ' + filename)
-            else:
-                user_index = 0
-                for i in range(0, len(data['accounts'])):
-                    if data['accounts'][i]['id'] == self.id:
-                        user_index = i
-                        break
-                user_data = data['accounts'][user_index]
-                self.id = user_data['id']
-                self.model.load_from_json(user_data['model'])
-                self.exceptions = user_data['exceptions']
-                if not self.exceptions:
-                    self.exceptions = []
-                self.password = user_data['password']
 
-    def update_user_credentials(self, filename='accounts.json'):
+    def _load_record(self, record):
+        self.id = record['id']
+        self.model.load_from_json(record['model'])
+        # A copy, so that feedback does not change the record it was loaded from.
+        self.exceptions = list(record['exceptions'] or [])
+        self.password = record['password']
+
+    def save_user(self, filename='accounts.db', store=None):
         """
-        Updates User information in the JSON. This is a seperate method in order to account for password and id
-        manipulation (otherwise `save_user()` alone works fine).
+        Saves a user to the account storage, replacing any account with the same id.
 
-        :param filename: The filename for the account storage file; `accounts.json` is the default.
+        :param self: The user to be saved.
+
+        :param filename: The filename for the account storage file; `accounts.db` is the default. A `.json` filename
+         selects the original `accounts.json` format. See `userstore.get_store()`.
+
+        :param store: The `userstore.UserStore` to save to, in place of the one of `filename`.
 
         """
-        self.delete_user(filename)
-        self.save_user(filename)
+        (store if store is not None else get_store(filename)).save(self._to_record())
 
-    def delete_user(self, filename='accounts.json'):
+    def load_user(self, filename='accounts.db', store=None):
         """
-        Deletes a User object from the JSON entirely.
+        Load a user from the account storage.
+
+        :param filename: The filename for the account storage file; `accounts.db` is the default.
 
-        :param filename: The filename for the account storage file; `accounts.json` is the default.
+        :param store: The `userstore.UserStore` to load from, in place of the one of `filename`.
 
         """
-        if filename not in [f for f in os.listdir('.') if os.path.isfile(f)]:
-            raise IOError('Error: accounts file ' + filename + ' not found.')
-        else:
-            data = json.load(open(filename))
-            user_index = 0
-            for i in range(0, len(data['accounts'])):
-                if data['accounts'][i]['id'] == self.id:
-                    user_index = i
-                    break
-            data['accounts'].pop(user_index)
-            with open(filename, 'w') as outfile:
-                json.dump(data, outfile, indent=4)
+        store = store if store is not None else get_store(filename)
+        record, events = store.load_with_events(self.id)
+        if record is None:
+            raise IOError('Error: User with the ID ' + self.id + ' not found in accounts file ' +
+                          getattr(store, 'filename', str(store)))
+        self._load_record(record)
+        self._replay(events)
+
+    def update_user_credentials(self, filename='accounts.db', store=None):
+        """
+        Updates User information in the account storage. This is a seperate method in order to account for password
+        and id manipulation (otherwise `save_user()` alone works fine). Since saving replaces the account with the
+        same id, this is a single write.
+
+        :param filename: The filename for the account storage file; `accounts.db` is the default.
+
+        :param store: The `userstore.UserStore` to update, in place of the one of `filename`.
+
+        """
+        self.save_user(filename, store=store)
+
+    def delete_user(self, filename='accounts.db', store=None):
+        """
+        Deletes a User object from the account storage entirely.
+
+        :param filename: The filename for the account storage file; `accounts.db` is the default.
+
+        :param store: The `userstore.UserStore` to delete from, in place of the one of `filename`.
+
+        """
+        store = store if store is not None else get_store(filename)
+        if not store.delete(self.id):
+            raise IOError('Error: User with the ID ' + self.id + ' not found in accounts file ' +
+                          getattr(store, 'filename', str(store)))
+
+
+def save_users(users, filename='accounts.db', store=None):
+    """
+    Saves many users to the account storage at once, in a single transaction.
+
+    :param users: The `User` objects being saved.
+
+    :param filename: The filename for the account storage file; `accounts.db` is the default.
+
+    :param store: The `userstore.UserStore` to save to, in place of the one of `filename`.
+    """
+    (store if store is not None else get_store(filename)).save_many([user._to_record() for user in users])
+
+
+def load_users(user_ids, filename='accounts.db', store=None):
+    """
+    Loads many users from the account storage at once.
+
+    :param user_ids: The ids of the users being loaded.
+
+    :param filename: The filename for the account storage file; `accounts.db` is the default.
+
+    :param store: The `userstore.UserStore` to load from, in place of the one of `filename`.
+
+    :return: A list of the users found, in the order of `user_ids`. Ids without an account are skipped.
+    """
+    records = (store if store is not None else get_store(filename)).load_many(user_ids)
+    users = []
+    for user_id in user_ids:
+        if user_id in records:
+            user = User(model=ConceptModel())
+            user._load_record(records[user_id])
+            users.append(user)
+    return users
+
+
+def compact_user(user_id, filename='accounts.db', store=None):
+    """
+    Brings the saved snapshot of a user up to date with their feedback event log: replays the events on top of the
+    snapshot, saves the result, and drops the events it accounts for. Events logged in the meantime are kept.
+
+    :param user_id: The id of the user.
+
+    :param filename: The filename for the account storage file; `accounts.db` is the default.
+
+    :param store: The `userstore.UserStore` to compact, in place of the one of `filename`.
+
+    :return: The number of events folded into the snapshot: none if the user's record was saved, or their log
+     compacted, by someone else in the meantime, in which case the compaction is left to the next attempt.
+    """
+    store = store if store is not None else get_store(filename)
+    record, events = store.load_with_events(user_id)
+    if record is None or not events:
+        return 0
+    user = User(model=ConceptModel())
+    user._load_record(record)
+    user._replay(events)
+    if not store.compact_events(user._to_record(), events[-1][0], base=record, count=len(events)):
+        return 0
+    return len(events)
+
+
+class SnapshotCompactor:
+    """
+    Compacts the feedback event logs of a user store in a background thread: every `interval` seconds, each user
+    with at least `min_events` logged events has them folded into a new snapshot by `compact_user()`.
+    """
+
+    def __init__(self, filename='accounts.db', store=None, interval=60.0, min_events=50):
+        """
+        :param filename: The filename for the account storage file; `accounts.db` is the default.
+
+        :param store: The `userstore.UserStore` to compact, in place of the one of `filename`.
+
+        :param interval: The number of seconds between compaction passes.
+
+        :param min_events: The number of logged events which makes a user's log worth compacting.
+        """
+        self.store = store if store is not None else get_store(filename)
+        self.interval = interval
+        self.min_events = min_events
+        self.compacted = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """
+        Runs a single compaction pass in the current thread.
+
+        :return: The number of events folded into snapshots.
+        """
+        compacted = 0
+        for user_id in self.store.pending_events(self.min_events):
+            if self._stopped.is_set():
+                break
+            compacted += compact_user(user_id, store=self.store)
+        self.compacted += compacted
+        return compacted
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        """
+        Starts compacting in a daemon thread.
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='watsongraph-snapshot-compactor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the background thread, waiting for the pass in progress, if any, to finish.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
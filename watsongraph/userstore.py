@@ -0,0 +1,471 @@
+"""userstore.py
+    Storage backends for `User` accounts.
+    An account is stored as a record: a `{'id', 'password', 'exceptions', 'model'}` dictionary, the model being in its
+    `ConceptModel.to_json()` form. `SQLiteUserStore`, the default, keeps records in an indexed SQLite table in WAL mode,
+    so that a single account is saved, loaded or deleted in O(log n) time in a transaction of its own, and several
+    worker processes can share one database. It can also keep a log of feedback events per user, so that a single
+    `express_interest()` or `express_disinterest()` is persisted by appending the event rather than by saving the whole
+    model again; the account's record then serves as a snapshot which the events are replayed on top of, and which
+    `compact_events()` brings up to date. `JSONUserStore` reads and writes the original `accounts.json` format, and
+    `import_accounts_json()` moves the accounts of such a file into another store, which `get_store()` does by itself
+    the first time it opens an `accounts.db` next to an `accounts.json`. `accounts.db` is the default account file of
+    `User` since this store was added; earlier versions used `accounts.json`."""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+
+class UserStore:
+    """
+    The interface through which `User` accounts are stored. `SQLiteUserStore` is the default implementation.
+    """
+
+    """
+    Whether the store keeps feedback event logs (see `append_events()`).
+    """
+    keeps_events = False
+
+    def load(self, user_id):
+        """
+        :return: The record of the given user, or `None` if there is none.
+        """
+        raise NotImplementedError
+
+    def load_many(self, user_ids):
+        """
+        :return: A `user id -> record` dictionary of those of the given users which have records.
+        """
+        records = dict()
+        for user_id in user_ids:
+            record = self.load(user_id)
+            if record is not None:
+                records[user_id] = record
+        return records
+
+    def save(self, record):
+        """
+        Inserts a record, or replaces the record with the same id.
+        """
+        self.save_many([record])
+
+    def save_many(self, records):
+        """
+        Inserts or replaces many records at once.
+        """
+        raise NotImplementedError
+
+    def delete(self, user_id):
+        """
+        Deletes the record of the given user.
+
+        :return: Whether there was one.
+        """
+        raise NotImplementedError
+
+    def ids(self):
+        """
+        :return: A list of the ids of every user with a record.
+        """
+        raise NotImplementedError
+
+    def append_events(self, user_id, events):
+        """
+        Appends feedback events to the log of the given user. Stores which keep no event log raise a
+        `RuntimeError`.
+
+        :param user_id: The id of the user.
+        :param events: A list of `{'item', 'kind', 'timestamp', 'model'}` dictionaries.
+        """
+        raise RuntimeError(type(self).__name__ + ' keeps no feedback event log.')
+
+    def load_events(self, user_id):
+        """
+        :return: The `(sequence number, event)` tuples of the events logged for the given user since their record
+         was last saved, oldest first.
+        """
+        return []
+
+    def load_with_events(self, user_id):
+        """
+        :return: A `(record, events)` tuple of the record of the given user, or `None`, and the events logged on top
+         of it, as returned by `load_events()`, read consistently with one another.
+        """
+        return self.load(user_id), self.load_events(user_id)
+
+    def pending_events(self, min_events=1):
+        """
+        :return: A `user id -> number of events` dictionary of the users with at least `min_events` events logged
+         since their record was last saved.
+        """
+        return dict()
+
+    def compact_events(self, record, through, base=None, count=None):
+        """
+        Saves a new snapshot of a user, and drops the events it accounts for, in one transaction. Events logged in
+        the meantime are kept.
+
+        :param record: The record of the user, with every event up to `through` applied.
+        :param through: The sequence number of the last event applied.
+        :param base: The record the events were applied to. If given, the compaction is skipped unless it is still
+         the saved record, so that a record saved in the meantime is not overwritten by an older one.
+        :param count: The number of events applied. If given, the compaction is skipped unless that many events up
+         to `through` are still logged.
+        :return: Whether the compaction was made.
+        """
+        raise RuntimeError(type(self).__name__ + ' keeps no feedback event log.')
+
+    def __contains__(self, user_id):
+        return self.load(user_id) is not None
+
+    def __len__(self):
+        return len(self.ids())
+
+    def close(self):
+        pass
+
+
+class SQLiteUserStore(UserStore):
+    """
+    Stores accounts in a SQLite database in WAL mode, keyed on the user id. Every operation is a transaction of its
+    own, which SQLite serializes across threads and processes, and `save_many()` writes all of its records in one.
+    Connections are not carried across `fork()`: a child process opens a connection of its own on first use.
+    """
+
+    keeps_events = True
+
+    def __init__(self, filename='accounts.db', table='accounts'):
+        """
+        :param filename: The database file. Created if it does not exist.
+
+        :param table: The table the accounts are kept in, so that several stores can share one database file.
+        """
+        self.filename = filename
+        self.table = table
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        with self._lock:
+            self._connect()
+
+    def _connect(self):
+        """
+        :return: The connection of the current process, which is opened if need be. Must hold the lock.
+        """
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.filename, timeout=30, check_same_thread=False,
+                                               isolation_level=None)
+            self._pid = os.getpid()
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS "{0}" (id TEXT PRIMARY KEY, password TEXT NOT NULL, '
+                                     'exceptions TEXT NOT NULL, model TEXT NOT NULL) '
+                                     'WITHOUT ROWID'.format(self.table))
+            self._connection.execute('CREATE TABLE IF NOT EXISTS "{0}_events" (seq INTEGER PRIMARY KEY AUTOINCREMENT, '
+                                     'user_id TEXT NOT NULL, item TEXT NOT NULL, kind TEXT NOT NULL, '
+                                     'timestamp REAL NOT NULL, model TEXT NOT NULL)'.format(self.table))
+            self._connection.execute('CREATE INDEX IF NOT EXISTS "{0}_events_user" ON "{0}_events" '
+                                     '(user_id, seq)'.format(self.table))
+            self._connection.execute('CREATE TABLE IF NOT EXISTS "{0}_meta" (key TEXT PRIMARY KEY, '
+                                     'value TEXT NOT NULL)'.format(self.table))
+        return self._connection
+
+    def _transaction(self, statements):
+        """
+        Runs a list of `(sql, parameters, many)` statements in a single write transaction. Must hold the lock.
+
+        :return: The cursor of the last statement.
+        """
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for sql, parameters, many in statements:
+                cursor = connection.executemany(sql, parameters) if many else connection.execute(sql, parameters)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return cursor
+
+    @staticmethod
+    def _row(record):
+        return (record['id'], record['password'], json.dumps(record['exceptions']), json.dumps(record['model']))
+
+    @staticmethod
+    def _record(row):
+        return {'id': row[0], 'password': row[1], 'exceptions': json.loads(row[2]), 'model': json.loads(row[3])}
+
+    def load(self, user_id):
+        with self._lock:
+            row = self._connect().execute('SELECT id, password, exceptions, model FROM "{0}" '
+                                          'WHERE id = ?'.format(self.table), (user_id,)).fetchone()
+        return self._record(row) if row is not None else None
+
+    def load_many(self, user_ids):
+        user_ids = list(user_ids)
+        rows = []
+        with self._lock:
+            connection = self._connect()
+            # Stay well under SQLite's limit on the number of parameters of a statement.
+            for i in range(0, len(user_ids), 500):
+                batch = user_ids[i:i + 500]
+                rows.extend(connection.execute('SELECT id, password, exceptions, model FROM "{0}" WHERE id IN ({1})'
+                                               .format(self.table, ', '.join('?' * len(batch))), batch).fetchall())
+        return {row[0]: self._record(row) for row in rows}
+
+    def save_many(self, records):
+        rows = [self._row(record) for record in records]
+        with self._lock:
+            # A saved record supersedes the events logged before it.
+            self._transaction([
+                ('INSERT OR REPLACE INTO "{0}" (id, password, exceptions, model) '
+                 'VALUES (?, ?, ?, ?)'.format(self.table), rows, True),
+                ('DELETE FROM "{0}_events" WHERE user_id = ?'.format(self.table), [(row[0],) for row in rows], True)
+            ])
+
+    def delete(self, user_id):
+        with self._lock:
+            cursor = self._transaction([
+                ('DELETE FROM "{0}_events" WHERE user_id = ?'.format(self.table), (user_id,), False),
+                ('DELETE FROM "{0}" WHERE id = ?'.format(self.table), (user_id,), False)
+            ])
+        return cursor.rowcount > 0
+
+    def append_events(self, user_id, events):
+        rows = [(user_id, event['item'], event['kind'], event['timestamp'], json.dumps(event['model']))
+                for event in events]
+        with self._lock:
+            self._transaction([('INSERT INTO "{0}_events" (user_id, item, kind, timestamp, model) '
+                                'VALUES (?, ?, ?, ?, ?)'.format(self.table), rows, True)])
+
+    def load_events(self, user_id):
+        with self._lock:
+            rows = self._connect().execute('SELECT seq, item, kind, timestamp, model FROM "{0}_events" '
+                                           'WHERE user_id = ? ORDER BY seq'.format(self.table), (user_id,)).fetchall()
+        return [self._event(row) for row in rows]
+
+    def load_with_events(self, user_id):
+        with self._lock:
+            connection = self._connect()
+            # A read transaction sees a single state of the database, which a concurrent compaction cannot split.
+            connection.execute('BEGIN')
+            try:
+                row = connection.execute('SELECT id, password, exceptions, model FROM "{0}" '
+                                         'WHERE id = ?'.format(self.table), (user_id,)).fetchone()
+                rows = connection.execute('SELECT seq, item, kind, timestamp, model FROM "{0}_events" '
+                                          'WHERE user_id = ? ORDER BY seq'.format(self.table), (user_id,)).fetchall()
+            finally:
+                connection.execute('COMMIT')
+        return self._record(row) if row is not None else None, [self._event(row) for row in rows]
+
+    @staticmethod
+    def _event(row):
+        seq, item, kind, timestamp, model = row
+        return seq, {'item': item, 'kind': kind, 'timestamp': timestamp, 'model': json.loads(model)}
+
+    def pending_events(self, min_events=1):
+        with self._lock:
+            return dict(self._connect().execute('SELECT user_id, COUNT(*) FROM "{0}_events" GROUP BY user_id '
+                                                'HAVING COUNT(*) >= ?'.format(self.table), (min_events,)))
+
+    def compact_events(self, record, through, base=None, count=None):
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                if base is not None:
+                    row = connection.execute('SELECT id, password, exceptions, model FROM "{0}" '
+                                             'WHERE id = ?'.format(self.table), (record['id'],)).fetchone()
+                    if row is None or self._record(row) != base:
+                        connection.execute('ROLLBACK')
+                        return False
+                if count is not None:
+                    logged = connection.execute('SELECT COUNT(*) FROM "{0}_events" WHERE user_id = ? AND seq <= ?'
+                                                .format(self.table), (record['id'], through)).fetchone()[0]
+                    if logged != count:
+                        connection.execute('ROLLBACK')
+                        return False
+                connection.execute('INSERT OR REPLACE INTO "{0}" (id, password, exceptions, model) '
+                                   'VALUES (?, ?, ?, ?)'.format(self.table), self._row(record))
+                connection.execute('DELETE FROM "{0}_events" WHERE user_id = ? AND seq <= ?'.format(self.table),
+                                   (record['id'], through))
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+            return True
+
+    def import_legacy(self, filename):
+        """
+        Imports the accounts of an `accounts.json`-format file into a store which has never held any, once. The
+        import runs in a single transaction which also marks the store as migrated, so that of several processes
+        opening the store at once only one imports, and accounts are inserted without replacing any saved in the
+        meantime. A store which already holds accounts the first time it is migrated is marked as such without
+        importing, so that accounts deleted from it are not brought back.
+
+        :param filename: The accounts file being imported. Only read if the store has not been migrated yet.
+        :return: The number of accounts imported.
+        """
+        marker = ('SELECT 1 FROM "{0}_meta" WHERE key = \'legacy_import\''.format(self.table), ())
+        with self._lock:
+            if self._connect().execute(*marker).fetchone() is not None:
+                return 0
+        accounts = JSONUserStore(filename)._read() if os.path.isfile(filename) else []
+        rows = [self._row(record) for record in accounts]
+        with self._lock:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                if connection.execute(*marker).fetchone() is not None:
+                    imported = 0
+                elif connection.execute('SELECT 1 FROM "{0}" LIMIT 1'.format(self.table)).fetchone() is not None:
+                    imported = 0
+                else:
+                    connection.executemany('INSERT OR IGNORE INTO "{0}" (id, password, exceptions, model) '
+                                           'VALUES (?, ?, ?, ?)'.format(self.table), rows)
+                    imported = len(rows)
+                connection.execute('INSERT OR REPLACE INTO "{0}_meta" (key, value) '
+                                   'VALUES (\'legacy_import\', ?)'.format(self.table), (filename,))
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+        return imported
+
+    def ids(self):
+        with self._lock:
+            return [row[0] for row in self._connect().execute('SELECT id FROM "{0}"'.format(self.table))]
+
+    def __contains__(self, user_id):
+        with self._lock:
+            return self._connect().execute('SELECT 1 FROM "{0}" WHERE id = ?'.format(self.table),
+                                           (user_id,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM "{0}"'.format(self.table)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class JSONUserStore(UserStore):
+    """
+    Stores accounts in the original `accounts.json` format: a single `{'accounts': [record, ...]}` JSON document. Every
+    change rewrites the whole file, so this store is only suited to small numbers of accounts; it is kept for
+    compatibility. The file is replaced atomically, but concurrent writers may still lose each other's changes.
+    """
+
+    def __init__(self, filename='accounts.json'):
+        """
+        :param filename: The accounts file. Created on the first save if it does not exist.
+        """
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def _read(self):
+        """
+        :return: The list of records in the file. Raises an `IOError` if there is no file.
+        """
+        if not os.path.isfile(self.filename):
+            raise IOError('Error: accounts file ' + self.filename + ' not found.')
+        with open(self.filename) as f:
+            return json.load(f)['accounts']
+
+    def _write(self, accounts):
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'accounts': accounts}, f, indent=4)
+            os.replace(temporary, self.filename)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def load(self, user_id):
+        with self._lock:
+            for record in self._read():
+                if record['id'] == user_id:
+                    return record
+        return None
+
+    def load_many(self, user_ids):
+        user_ids = set(user_ids)
+        with self._lock:
+            return {record['id']: record for record in self._read() if record['id'] in user_ids}
+
+    def save_many(self, records):
+        with self._lock:
+            accounts = self._read() if os.path.isfile(self.filename) else []
+            positions = {record['id']: i for i, record in enumerate(accounts)}
+            for record in records:
+                if record['id'] in positions:
+                    accounts[positions[record['id']]] = record
+                else:
+                    positions[record['id']] = len(accounts)
+                    accounts.append(record)
+            self._write(accounts)
+
+    def delete(self, user_id):
+        with self._lock:
+            accounts = self._read()
+            remaining = [record for record in accounts if record['id'] != user_id]
+            if len(remaining) == len(accounts):
+                return False
+            self._write(remaining)
+            return True
+
+    def ids(self):
+        with self._lock:
+            return [record['id'] for record in self._read()] if os.path.isfile(self.filename) else []
+
+
+def import_accounts_json(filename='accounts.json', store=None):
+    """
+    Copies every account of an `accounts.json` file into a store, in a single bulk save.
+
+    :param filename: The accounts file being imported.
+    :param store: The store the accounts are copied into. Defaults to the `SQLiteUserStore` of `accounts.db`.
+    :return: The number of accounts imported.
+    """
+    accounts = JSONUserStore(filename)._read()
+    (store if store is not None else get_store('accounts.db')).save_many(accounts)
+    return len(accounts)
+
+
+_stores = dict()
+_stores_lock = threading.Lock()
+
+
+def _legacy_filename(filename):
+    """
+    :return: The `accounts.json`-format file which the accounts of the given database file used to be kept in.
+    """
+    return os.path.splitext(filename)[0] + '.json'
+
+
+def get_store(filename):
+    """
+    :return: The store of the given accounts file, opened once per process: a `JSONUserStore` for a `.json` file, and a
+     `SQLiteUserStore` for anything else.
+
+     The first time a database file is opened, the accounts of its `.json` counterpart (e.g. `accounts.json` for
+     `accounts.db`), if there is one, are imported into it (see `SQLiteUserStore.import_legacy()`), so that accounts
+     saved before the default moved to `accounts.db` are not lost. This happens only once per database, however many
+     processes open it at the same time: the `.json` file is left as it is, and read no more.
+    """
+    with _stores_lock:
+        store = _stores.get(filename)
+        if store is None:
+            if filename.endswith('.json'):
+                store = JSONUserStore(filename)
+            else:
+                store = SQLiteUserStore(filename)
+                store.import_legacy(_legacy_filename(filename))
+            _stores[filename] = store
+        return store